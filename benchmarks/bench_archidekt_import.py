@@ -0,0 +1,122 @@
+"""
+Importing a synthetic 100k-row Archidekt collection export: the previous
+approach (every row of every page kept as a ``DictReader`` dict, names
+collected at the end) versus the streaming importer (each page parsed into
+merged ``OwnedCard`` records while the next page downloads).
+
+The stand-in runs in a child process so that ``tracemalloc`` only sees the
+importer's allocations.
+
+    python -m benchmarks.bench_archidekt_import [--rows 100000]
+"""
+import argparse, csv, io, json, multiprocessing, random, time, tracemalloc
+
+from benchmarks.stand_in import StandInServer, archidekt_export_route
+from benchmarks.synthetic import make_cards
+from core.collection import Collection, parse_export
+from core.http_client import HttpClient
+from core.scryfall_api import ScryfallAPI
+
+FINISHES = ['Normal', 'Normal', 'Normal', 'Foil', 'Etched']
+CONDITIONS = ['NM', 'NM', 'LP', 'MP', 'HP']
+
+
+def make_rows(n, printings, seed=7):
+    rng = random.Random(seed)
+    cards = make_cards(printings)
+    rows = []
+    for _ in range(n):
+        card = rng.choice(cards)
+        rows.append({
+            'Quantity': rng.choice([1, 1, 1, 2, 4]), 'Name': card['name'],
+            'Finish': rng.choice(FINISHES), 'Condition': rng.choice(CONDITIONS),
+            'Date Added': f'2024-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}',
+            'Language': 'EN', 'Purchase Price': f'{rng.random() * 20:.2f}', 'Tags': '',
+            'Edition Name': card['set'].upper(), 'Edition Code': card['set'],
+            'Multiverse Id': str(rng.randint(1, 600000)), 'Scryfall ID': card['id'],
+            'Collector Number': card['collector_number'],
+        })
+    return rows
+
+
+def _serve(rows, printings, latency, ready):
+    rows = make_rows(rows, printings)
+    # Pages are rendered up front so that the importer, not CSV writing in
+    # the stand-in, is what gets timed.
+    pages = {}
+    size = ScryfallAPI.ARCHIDEKT_PAGE_SIZE
+    route = archidekt_export_route(rows, size)
+    for page in range(1, len(rows) // size + 2):
+        pages[page] = json.dumps(route({}, json.dumps({'page': page}), {})[1]).encode()
+
+    def handler(query, body, headers):
+        return 200, pages[json.loads(body)['page']], {'Content-Type': 'application/json'}
+
+    with StandInServer({'/api/collection/export/v2/1/': handler}, latency) as server:
+        ready.put(server.url)
+        while True:
+            time.sleep(3600)
+
+
+def baseline(api, collection_id):
+    """The importer as it was: whole pages of dicts, names built at the end."""
+    all_cards, page, has_more = [], 1, True
+    while has_more:
+        json_response = api._fetch_archidekt_page(collection_id, page)
+        csv_content = json_response.get('content')
+        has_more = json_response.get('moreContent', False)
+        if not csv_content:
+            break
+        all_cards.extend(list(csv.DictReader(io.StringIO(csv_content))))
+        page += 1
+    return {card['Name'].strip() for card in all_cards if 'Name' in card}
+
+
+def streaming(api, collection_id):
+    collection = Collection()
+    for text in api.iter_archidekt_pages(collection_id):
+        collection.add_all(parse_export(text))
+    return collection.names()
+
+
+def measure(fn, api):
+    start = time.perf_counter()
+    names = fn(api, 1)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn(api, 1)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return names, seconds, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--printings', type=int, default=30_000)
+    parser.add_argument('--latency', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context('fork')
+    ready = ctx.Queue()
+    server = ctx.Process(target=_serve, args=(args.rows, args.printings, args.latency, ready), daemon=True)
+    server.start()
+    try:
+        url = ready.get(timeout=120)
+        api = ScryfallAPI(http=HttpClient(pool_size=2))
+        api.ARCHIDEKT_BASE_URL = url
+        print(f'{args.rows} rows, {args.latency * 1000:.0f} ms latency per page')
+        for label, fn in (('before', baseline), ('streaming', streaming)):
+            names, seconds, peak = measure(fn, api)
+            print(f'  {label:10} {seconds:6.2f}s  {args.rows / seconds:9,.0f} rows/s  '
+                  f'peak {peak / 2**20:6.1f} MB  {len(names)} names')
+        collection = Collection()
+        for text in api.iter_archidekt_pages(1):
+            collection.add_all(parse_export(text))
+        print(f'  {collection.rows} rows merged into {len(collection)} printings')
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Cold thumbnail loads with each way of keeping downloads on disk: how long
+until the thumbnails are delivered, how long until the cache files are
+all written, how much disk they take, and the per-stage timings.
+
+``webp, before`` is the old behaviour: the download is re-encoded to WebP
+and written before the thumbnail is sent.  The other rows write the cache
+file after the thumbnail has been sent.  Last, the idle transcode pass
+re-encodes an ``original`` cache to WebP.
+
+    python -m benchmarks.bench_cache_format [--images 60] [--width 488]
+"""
+import argparse, os, random, shutil, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from benchmarks.bench_load_scheduler import wait_for
+from benchmarks.stand_in import StandInServer
+from core import http_client, image_loader
+from core.cache_manager import cache_manager_for
+from core.image_loader import ImageLoaderSignals, stage_timings, transcode_file
+from core.load_scheduler import VISIBLE, LoadScheduler
+
+MODES = [('webp, before', 'webp', False), ('webp, after', 'webp', True),
+         ('png, after', 'png', True), ('original, before', 'original', False),
+         ('original, after', 'original', True)]
+
+
+def _photo(width, seed):
+    """A JPEG with smooth detail, closer to card art than a flat fill."""
+    rng = random.Random(seed)
+    small = QtGui.QImage(12, 17, QtGui.QImage.Format.Format_RGB32)
+    for x in range(small.width()):
+        for y in range(small.height()):
+            small.setPixelColor(x, y, QtGui.QColor(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    image = small.scaled(width, int(width * 1.4), QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                         QtCore.Qt.TransformationMode.SmoothTransformation)
+    data = QtCore.QByteArray()
+    buf = QtCore.QBuffer(data)
+    buf.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buf, 'JPG', 90)
+    return bytes(data)
+
+
+def _disk_bytes(cache_dir):
+    return sum(entry.stat().st_size for entry in os.scandir(cache_dir) if '.sqlite' not in entry.name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', type=int, default=60)
+    parser.add_argument('--width', type=int, default=488)
+    parser.add_argument('--workers', type=int, default=6)
+    parser.add_argument('--latency', type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    http_client.configure(pool_size=args.workers)
+    size = QtCore.QSize(146, 204)
+    bodies = [_photo(args.width, i) for i in range(8)]
+    route = lambda q, b, h: (200, bodies[int(q['i']) % len(bodies)], {'Content-Type': 'image/jpeg'})
+
+    rows = []
+    with StandInServer({'/img': route}, args.latency) as server:
+        for label, cache_format, defer in MODES:
+            image_loader.configure(cache_format=cache_format, defer_writes=defer)
+            stage_timings.reset()
+            cache_dir = tempfile.mkdtemp()
+            scheduler = LoadScheduler(max_workers=args.workers)
+            signals = ImageLoaderSignals()
+            urls = [f'{server.url}/img?mode={label}&i={i}' for i in range(args.images)]
+            start = time.perf_counter()
+            for url in urls:
+                scheduler.submit(url, cache_dir, size, signals, VISIBLE)
+            delivered = wait_for(app, urls, signals)
+            scheduler.wait_for_done()
+            written = time.perf_counter() - start
+            rows.append((label, delivered, written, _disk_bytes(cache_dir), stage_timings.snapshot()))
+            if cache_format == 'original' and defer:
+                transcode_dir = cache_dir
+            else:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f'{args.images} cold loads of {args.width} px JPEGs, {args.workers} workers')
+    for label, delivered, written, disk, stages in rows:
+        timings = '  '.join(f"{stage} {stats['p50_ms']:5.1f}" for stage, stats in stages.items())
+        print(f'  {label:17} delivered {delivered:5.2f}s  written {written:5.2f}s  '
+              f'{disk / 1024:7.0f} KB  p50 ms: {timings}')
+
+    cache = cache_manager_for(transcode_dir)
+    before = _disk_bytes(transcode_dir)
+    start = time.perf_counter()
+    converted, saved = cache.transcode('webp', lambda src, dst: transcode_file(src, dst, 'webp', 85))
+    print(f'  idle transcode to webp: {converted} files in {time.perf_counter() - start:.2f}s, '
+          f'{before / 1024:.0f} KB -> {_disk_bytes(transcode_dir) / 1024:.0f} KB')
+    assert cache.report()['bytes'] == _disk_bytes(transcode_dir)
+    shutil.rmtree(transcode_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Offline index vs. live search latency.
+
+Builds a card index from a synthetic bulk-data dump and compares query
+latency with ``ScryfallAPI.search`` against a recorded HTTP stand-in that
+adds a realistic round-trip delay.
+
+    python -m benchmarks.bench_card_index [--cards 30000] [--latency 0.15]
+"""
+import argparse, json, os, statistics, tempfile, time
+
+from benchmarks.stand_in import StandInServer, paged_search_route
+from benchmarks.synthetic import make_cards
+from core.card_index import CardIndex
+from core.scryfall_api import ScryfallAPI
+
+QUERIES = ['t:goblin', 'o:"draw a card" c:u', 'cmc<=2 r:rare', 'set:neo t:creature', 'zen']
+
+
+def timed(func, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=30000)
+    parser.add_argument('--latency', type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    cards = make_cards(args.cards)
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, 'bulk.json')
+        with open(dump, 'w', encoding='utf-8') as f:
+            json.dump(cards, f)
+        index = CardIndex(os.path.join(tmp, 'cards.sqlite'))
+        start = time.perf_counter()
+        index.build_from_bulk(dump)
+        print(f'build: {args.cards} cards in {time.perf_counter() - start:.2f}s, '
+              f'{os.path.getsize(index.path) / 2**20:.1f} MB index '
+              f'({os.path.getsize(dump) / 2**20:.1f} MB dump)')
+
+        offline = ScryfallAPI(card_index=index)
+        for query in QUERIES:
+            total = offline.search(query)['total_cards']
+            ms = timed(lambda: offline.search(query))
+            print(f'offline  {query:24} {total:6} cards  {ms:8.2f} ms/page')
+
+        # The stand-in replays one recorded result set per query, paged like the real API.
+        server = StandInServer(latency=args.latency)
+        live = ScryfallAPI()
+        with server:
+            live.BASE_URL = f'{server.url}/cards/search'
+            for query in QUERIES[:2]:
+                recorded = index.search(query, 1)['data']
+                server.routes['/cards/search'] = paged_search_route(recorded)
+                ms = timed(lambda: live.search(query), repeat=3)
+                print(f'live     {query:24} {"":6}        {ms:8.2f} ms/page')
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Joining 50k search results against a 20k-card collection: the exact-name
+set membership the filtered search used to do versus ``CollectionIndex``,
+which also matches printings, double-faced names and accent-free spellings
+and annotates the owned quantity.
+
+A quarter of the owned double-faced cards are recorded under their front
+face only, as Archidekt does, and some names lose their accents; the
+name-set join misses those.
+
+    python -m benchmarks.bench_collection_index [--results 50000] [--owned 20000]
+"""
+import argparse, random, time
+
+from benchmarks.synthetic import make_cards
+from core.collection import Collection, OwnedCard
+from core.collection_index import CollectionIndex
+
+
+def make_results(n, seed=3):
+    rng = random.Random(seed)
+    cards = make_cards(n)
+    for i, card in enumerate(cards):
+        card['collector_number'] = str(i)  # one printing per set and number
+        roll = rng.random()
+        if roll < 0.1:
+            card['name'] = f"{card['name']} // {card['name'].split()[0]} Reborn {i}"
+        elif roll < 0.15:
+            card['name'] = card['name'].replace('o', 'ö', 1)
+    return cards
+
+
+def make_collection(results, n, seed=5):
+    rng = random.Random(seed)
+    records = []
+    for card in rng.sample(results, n):
+        name = card['name'].replace('ö', 'o')
+        by_printing = rng.random() < 0.5
+        if '//' in name and rng.random() < 0.25:
+            name = name.split(' // ')[0]
+        records.append(OwnedCard(
+            name, rng.choice([1, 1, 2, 4]), 'Normal', 'NM',
+            card['set'] if by_printing else '', card['collector_number'] if by_printing else '',
+            card['id'] if by_printing else ''))
+    return Collection(records)
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return value, best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--results', type=int, default=50_000)
+    parser.add_argument('--owned', type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    results = make_results(args.results)
+    collection = make_collection(results, args.owned)
+    names = collection.names()
+
+    matches, ms = timed(lambda: [c for c in results if c.get('name') in names])
+    print(f'{len(results)} results x {len(collection)} owned printings')
+    print(f'  name set join    {ms:7.1f} ms  {len(matches):6} matches')
+    index, build_ms = timed(lambda: CollectionIndex(collection))
+    print(f'  index build      {build_ms:7.1f} ms')
+    matches, ms = timed(lambda: index.join(results))
+    print(f'  index join       {ms:7.1f} ms  {len(matches):6} matches  '
+          f'{sum(c["owned_quantity"] for c in matches)} copies')
+    missed = sum(1 for c in matches if c['name'] not in names)
+    print(f'  matched only by printing, face or spelling: {missed}')
+    assert len(matches) == args.owned, 'every owned card should be found'
+    assert ms < 1000
+
+
+if __name__ == '__main__':
+    main()
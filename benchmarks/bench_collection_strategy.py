@@ -0,0 +1,69 @@
+"""
+Paging vs. ``/cards/collection`` resolution for collection-filtered searches.
+
+Also checks that a ``set:`` query keeps an owned card whose lookup returns
+a printing from another set: such queries must page.
+
+    python -m benchmarks.bench_collection_strategy [--collection 300] [--latency 0.15]
+"""
+import argparse, os, tempfile, time
+
+from benchmarks.stand_in import StandInServer, collection_route, paged_search_route
+from benchmarks.synthetic import make_cards
+from core.card_index import CardIndex
+from core.scryfall_api import ScryfallAPI
+
+QUERY = 't:creature'
+
+
+def run(api, server, names):
+    before, start = server.request_count, time.perf_counter()
+    cards = api.filtered_search(QUERY, names)
+    return cards, server.request_count - before, time.perf_counter() - start
+
+
+def check_printing_query(latency):
+    card = make_cards(1, seed=7)[0]
+    printing, other = dict(card, set='lea'), dict(card, set='m21')
+    routes = {'/cards/search': paged_search_route([printing]), '/cards/collection': collection_route([other])}
+    with StandInServer(routes, latency=latency) as server:
+        api = ScryfallAPI()
+        api.BASE_URL = f'{server.url}/cards/search'
+        api.COLLECTION_URL = f'{server.url}/cards/collection'
+        found = api.filtered_search('set:lea', {card['name']})
+    assert [c['set'] for c in found] == ['lea'], 'set: query lost the owned card'
+    print(f'set:lea, owned card: {len(found)} match (collection lookup returns its m21 printing)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=30)
+    parser.add_argument('--collection', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    cards = make_cards(args.pages * ScryfallAPI.PAGE_SIZE)
+    creatures = [c for c in cards if 'creature' in c['type_line'].lower()]
+    names = {c['name'] for c in cards[::max(1, len(cards) // args.collection)]}
+    routes = {'/cards/search': paged_search_route(creatures), '/cards/collection': collection_route(cards)}
+    with StandInServer(routes, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        paging = ScryfallAPI()
+        paging.BASE_URL = f'{server.url}/cards/search'
+        paging.estimate_collection_requests = lambda names: float('inf')
+        expected, requests, seconds = run(paging, server, names)
+        print(f'paging:             {requests:3} requests {seconds:6.2f}s  {len(expected)} matches')
+
+        store = CardIndex(os.path.join(tmp, 'store.sqlite'))
+        batched = ScryfallAPI(card_store=store)
+        batched.BASE_URL = f'{server.url}/cards/search'
+        batched.COLLECTION_URL = f'{server.url}/cards/collection'
+        for label in ('collection (cold):', 'collection (warm):'):
+            found, requests, seconds = run(batched, server, names)
+            assert sorted(c['id'] for c in found) == sorted(c['id'] for c in expected)
+            print(f'{label:19} {requests:3} requests {seconds:6.2f}s  {len(found)} matches')
+        store.close()
+    check_printing_query(args.latency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Re-syncing a synthetic 100k-row Archidekt collection against the local
+``CollectionStore``: the first sync, a sync with nothing changed, and a
+sync after rows were appended to the last page.  Also times restoring the
+stored collection at startup and loading a CSV export the first time,
+unchanged, and touched but not modified.
+
+Export pages are rendered up front and served from memory, so the timings
+are the parsing and store writes a sync does, not the download (which is
+the same for every sync).
+
+    python -m benchmarks.bench_collection_sync [--rows 100000]
+"""
+import argparse, csv, io, os, tempfile, time
+
+from benchmarks.bench_archidekt_import import make_rows
+from benchmarks.stand_in import ARCHIDEKT_COLUMNS
+from core.collection import Collection, CollectionStore, load_csv, parse_export, sync_archidekt
+from core.scryfall_api import ScryfallAPI
+
+
+def render(rows, page_size):
+    pages = []
+    for start in range(0, len(rows), page_size):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, ARCHIDEKT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows[start:start + page_size])
+        pages.append(out.getvalue())
+    return pages
+
+
+class InMemoryExport:
+    """Stands in for ``ScryfallAPI`` with pre-rendered export pages."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def iter_archidekt_pages(self, collection_id, cancelled=None):
+        yield from self.pages
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--printings', type=int, default=30_000)
+    parser.add_argument('--added', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    size = ScryfallAPI.ARCHIDEKT_PAGE_SIZE
+    rows = make_rows(args.rows + args.added, args.printings)
+    before, after = rows[:args.rows], rows
+    api = InMemoryExport(render(before, size))
+    tmp = tempfile.mkdtemp()
+    store = CollectionStore(os.path.join(tmp, 'collections.sqlite'))
+    print(f'{args.rows} rows in {len(api.pages)} pages of {size}')
+
+    def parse_all():
+        collection = Collection()
+        for text in api.pages:
+            collection.add_all(parse_export(text))
+        return collection
+
+    _, ms = timed(parse_all)
+    print(f'  parse every page      {ms:8.1f} ms')
+    for label in ('first sync', 'unchanged re-sync'):
+        (collection, pages, changed), ms = timed(lambda: sync_archidekt(api, store, 1))
+        print(f'  {label:21} {ms:8.1f} ms  {changed:2} of {pages} pages changed  {len(collection)} printings')
+    api.pages = render(after, size)
+    (collection, pages, changed), ms = timed(lambda: sync_archidekt(api, store, 1))
+    print(f'  +{args.added} rows re-sync{"":7} {ms:8.1f} ms  {changed:2} of {pages} pages changed  '
+          f'{collection.rows} rows')
+    collection, ms = timed(lambda: store.load('archidekt:1'))
+    print(f'  restore from store    {ms:8.1f} ms  {len(collection)} printings')
+
+    path = os.path.join(tmp, 'collection.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, ARCHIDEKT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(before)
+    for label in ('CSV first load', 'CSV unchanged', 'CSV touched'):
+        if label == 'CSV touched':
+            os.utime(path)
+        (collection, changed), ms = timed(lambda: load_csv(store, path))
+        print(f'  {label:21} {ms:8.1f} ms  {"parsed" if changed else "from store"}')
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Sequential vs. concurrent paging in ``ScryfallAPI.filtered_search``.
+
+    python -m benchmarks.bench_filtered_search [--pages 20] [--latency 0.3]
+"""
+import argparse, time
+
+from benchmarks.stand_in import StandInServer, paged_search_route
+from benchmarks.synthetic import make_cards
+from core.http_client import HttpClient
+from core.scryfall_api import ScryfallAPI
+
+
+def sequential(api, query, names):
+    # The pre-concurrency implementation: one page after another.
+    page, results = 1, []
+    while True:
+        data = api.search(query, page)
+        results.extend(c for c in data['data'] if c['name'] in names)
+        if not data.get('has_more'):
+            return results
+        page += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.3)
+    args = parser.parse_args(argv)
+
+    cards = make_cards(args.pages * ScryfallAPI.PAGE_SIZE)
+    names = {c['name'] for c in cards[::50]}
+    with StandInServer({'/cards/search': paged_search_route(cards)}, latency=args.latency) as server:
+        # Apply Scryfall's 10 req/s limit to the stand-in host as well.
+        api = ScryfallAPI(http=HttpClient(host_rates={'127.0.0.1': 10}))
+        api.BASE_URL = f'{server.url}/cards/search'
+        api.estimate_collection_requests = lambda names: float('inf')  # measure the pager
+
+        start = time.perf_counter()
+        expected = sequential(api, 't:creature', names)
+        seq = time.perf_counter() - start
+
+        start, first = time.perf_counter(), None
+        results = []
+        for matches in api.iter_filtered_search('t:creature', names):
+            if matches and first is None:
+                first = time.perf_counter() - start
+            results.extend(matches)
+        par = time.perf_counter() - start
+
+    assert [c['id'] for c in results] == [c['id'] for c in expected]
+    print(f'{args.pages} pages @ {args.latency * 1000:.0f} ms, {len(results)} matches')
+    print(f'sequential: {seq:6.2f}s')
+    print(f'concurrent: {par:6.2f}s (first matches after {first:.2f}s)  speedup x{seq / par:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Frame times while scrolling the gallery view through many cards.  Every
+thumbnail is already in the pixmap cache, so this measures layout and
+painting only.  Runs offscreen unless a display is forced.
+
+    python -m benchmarks.bench_gallery_view [--cards 10000]
+"""
+import argparse, os, sys, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from benchmarks.synthetic import make_cards
+from core.pixmap_cache import PixmapCache
+from ui.gallery_view import CardDelegate, CardGalleryView, CardListModel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=10_000)
+    parser.add_argument('--thumb-width', type=int, default=120)
+    parser.add_argument('--steps', type=int, default=300)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    size = QtCore.QSize(args.thumb_width, int(args.thumb_width * 1.4))
+    cache = PixmapCache()
+    cards = make_cards(args.cards)
+    pix = QtGui.QPixmap(size)
+    pix.fill(QtGui.QColor('darkred'))
+    for card in cards:
+        cache.put(card['id'], size, pix)
+
+    model = CardListModel(lambda card: card['id'])
+    view = CardGalleryView()
+    view.setItemDelegate(CardDelegate(lambda url, card: cache.peek(url, size), lambda url: None, view))
+    view.setModel(model)
+    view.set_thumb_size(size)
+    view.resize(1280, 900)
+    view.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    model.set_cards(cards)
+    app.processEvents()
+    print(f'populate {args.cards} cards   {(time.perf_counter() - start) * 1000:7.1f} ms')
+
+    bar = view.verticalScrollBar()
+    frames = []
+    for step in range(args.steps):
+        start = time.perf_counter()
+        bar.setValue(bar.maximum() * step // args.steps)
+        view.viewport().repaint()
+        frames.append((time.perf_counter() - start) * 1000)
+    frames.sort()
+    p50, p99 = frames[len(frames) // 2], frames[int(len(frames) * 0.99)]
+    print(f'scroll frame p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  max {frames[-1]:6.2f} ms')
+    print(f'visible rows at end    {len(view.visible_rows(0))}')
+
+
+if __name__ == '__main__':
+    main()
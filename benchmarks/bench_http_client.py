@@ -0,0 +1,60 @@
+"""
+Filling a 175-card page: bare ``requests.get`` per thumbnail vs. the shared
+pooled client, on as many threads as the Qt worker pool would use.  The
+stand-in charges *connect-latency* per new connection (TCP + TLS handshake)
+and fails every 25th request with a 503 to exercise the retry path.
+
+    python -m benchmarks.bench_http_client [--latency 0.03] [--connect-latency 0.1]
+"""
+import argparse, itertools, os, time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stand_in import StandInServer
+from core.http_client import HttpClient
+
+IMAGE = os.urandom(40 * 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=175)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.03)
+    parser.add_argument('--connect-latency', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    counter = itertools.count(1)
+
+    def image(query, body, headers):
+        if next(counter) % 25 == 0:
+            return 503, b'busy', {'Retry-After': '0'}
+        return 200, IMAGE, {'Content-Type': 'image/jpeg'}
+
+    with StandInServer({'/img': image}, args.latency, args.connect_latency) as server:
+        urls = [f'{server.url}/img?id={i}' for i in range(args.cards)]
+
+        def bare(url):
+            resp = requests.get(url)
+            return resp.status_code
+
+        client = HttpClient(pool_size=args.workers)
+
+        def pooled(url):
+            return client.get(url).status_code
+
+        for label, fetch in (('bare requests.get', bare), ('shared HttpClient', pooled)):
+            before = server.connection_count
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.workers) as pool:
+                statuses = list(pool.map(fetch, urls))
+            seconds = time.perf_counter() - start
+            failed = sum(1 for s in statuses if s != 200)
+            print(f'{label:18} {seconds:6.2f}s  {server.connection_count - before:4} connections  '
+                  f'{failed:3} failed')
+        print('client stats:', client.stats.snapshot())
+
+
+if __name__ == '__main__':
+    main()
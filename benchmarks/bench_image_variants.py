@@ -0,0 +1,59 @@
+"""
+Bytes and time to fill a 175-card page of 120 px thumbnails when always
+downloading ``png`` versus the size-aware variant choice.  Bodies have the
+typical size of each Scryfall variant and the stand-in limits bandwidth.
+
+    python -m benchmarks.bench_image_variants [--bandwidth-mbit 50]
+"""
+import argparse, os, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from benchmarks.stand_in import StandInServer
+from benchmarks.synthetic import make_cards
+from core.http_client import HttpClient
+from utils.helpers import best_image_url
+
+VARIANT_BYTES = {'small': 12_000, 'normal': 75_000, 'large': 140_000, 'png': 1_000_000}
+BODIES = {k: os.urandom(n) for k, n in VARIANT_BYTES.items()}
+
+
+def fill_page(client, urls, workers):
+    start, first, total = time.perf_counter(), None, 0
+    with ThreadPoolExecutor(workers) as pool:
+        for future in as_completed([pool.submit(client.get, url) for url in urls]):
+            total += len(future.result().content)
+            if first is None:
+                first = time.perf_counter() - start
+    return total, first, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=175)
+    parser.add_argument('--thumb-width', type=int, default=120)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.03)
+    parser.add_argument('--bandwidth-mbit', type=float, default=50)
+    args = parser.parse_args(argv)
+
+    def image(query, body, headers):
+        return 200, BODIES[query['v']], {'Content-Type': 'image/jpeg'}
+
+    # Each worker gets its share of the link.
+    bandwidth = args.bandwidth_mbit * 125_000 / args.workers
+    with StandInServer({'/img': image}, args.latency, bandwidth=bandwidth) as server:
+        cards = make_cards(args.cards)
+        for card in cards:
+            card['image_uris'] = {v: f"{server.url}/img?id={card['id']}&v={v}" for v in VARIANT_BYTES}
+        client = HttpClient(pool_size=args.workers)
+        runs = {
+            'png (before)': [card['image_uris']['png'] for card in cards],
+            'size-aware': [best_image_url(card, args.thumb_width) for card in cards],
+        }
+        for label, urls in runs.items():
+            total, first, seconds = fill_page(client, urls, args.workers)
+            print(f'{label:13} {total / 2**20:7.1f} MB  first thumbnail {first:5.2f}s  page {seconds:6.2f}s')
+
+
+if __name__ == '__main__':
+    main()
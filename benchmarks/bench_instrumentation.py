@@ -0,0 +1,136 @@
+"""
+Cost of the instrumentation hooks, and a recorded trace of the window.
+
+Calls a trivial function plain, wrapped by ``traced`` with recording off
+and with it on, then lays out and paints 1000 results with recording off
+and on.  Finally records a search with its thumbnails against the
+stand-in with the stats panel open, exports the trace and checks that
+API, HTTP, image and layout spans and the sampled counters are in it.
+
+    python -m benchmarks.bench_instrumentation [--calls 1000000] [--latency 0.05]
+"""
+import argparse, json, os, statistics, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtWidgets
+
+from benchmarks.bench_cache_format import _photo
+from benchmarks.check_responsiveness import run_until
+from benchmarks.stand_in import StandInServer, paged_search_route
+from benchmarks.synthetic import make_cards
+from core.instrumentation import summarize, traced, tracer
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls
+
+
+def bench_hooks(calls):
+    def plain(x):
+        return x
+
+    wrapped = traced('bench.call')(plain)
+    results = {'plain': per_call(plain, calls)}
+    tracer.enabled = False
+    results['traced, off'] = per_call(wrapped, calls)
+    tracer.enabled = True
+    results['traced, recording'] = per_call(wrapped, calls // 10)
+    tracer.enabled = False
+    tracer.clear()
+    return results
+
+
+def bench_layout(app, window, cards, repeat=5):
+    results = {}
+    for label, enabled in (('off', False), ('recording', True), ('off again', False)):
+        tracer.enabled = enabled
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            window._display_results(cards)
+            window.view.doItemsLayout()
+            window.view.viewport().repaint()
+            samples.append(time.perf_counter() - start)
+            window.scheduler.new_generation('gallery')
+            app.processEvents()
+        results[label] = statistics.median(samples)
+    tracer.enabled = False
+    tracer.clear()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args(argv)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    hooks = bench_hooks(args.calls)
+    print(f'per call ({args.calls} calls):')
+    for label, seconds in hooks.items():
+        print(f'  {label:18} {seconds * 1e9:7.0f} ns')
+
+    from ui.config import GalleryConfig
+    from ui.main_window import ScryfallGallery
+    GalleryConfig.COLLECTION_STORE_PATH = os.path.join(tempfile.mkdtemp(), 'collections.sqlite')
+    cards = make_cards(1000)
+    photo = _photo(146, 5)
+    routes = {
+        '/cards/search': paged_search_route(cards),
+        '/img': lambda q, b, h: (200, photo, {'Content-Type': 'image/jpeg'}),
+    }
+    with StandInServer(routes, args.latency) as server:
+        for card in cards:
+            card['image_uris'] = {v: f"{server.url}/img?id={card['id']}&v={v}"
+                                  for v in ('small', 'normal', 'large', 'png')}
+        window = ScryfallGallery(tempfile.mkdtemp())
+        window.api.BASE_URL = f'{server.url}/cards/search'
+        window.api.card_index = None
+        window.api.response_cache = None
+        window.resize(1280, 900)
+        window.show()
+
+        layout = bench_layout(app, window, cards)
+        print('1000 results laid out and painted:')
+        for label, seconds in layout.items():
+            print(f'  {label:18} {seconds * 1000:7.2f} ms')
+
+        window.stats_panel.show()
+        window.stats_panel.set_recording(True)
+        window.query_edit.setText('t:creature')
+        window.search()
+        run_until(app, lambda: window.model.rowCount() > 0, 30)
+        run_until(app, lambda: not window.pending_urls, 60)
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.6:  # a few panel refreshes
+            app.processEvents()
+            time.sleep(0.005)
+        path = os.path.join(tempfile.mkdtemp(), 'trace.json')
+        written = window.stats_panel.export_to(path)
+        window.stats_panel.set_recording(False)
+        window.scheduler.wait_for_done(30000)
+        window.close()
+
+    with open(path, encoding='utf-8') as f:
+        trace = json.load(f)
+    events = trace['traceEvents']
+    categories = {e.get('cat') for e in events if e['ph'] == 'X'}
+    tracks = {e['name'] for e in events if e['ph'] == 'C'}
+    print(f'trace: {written} events, {os.path.getsize(path) / 1024:.0f} KiB; '
+          f"categories {sorted(categories)}; counter tracks {sorted(tracks)}")
+    for cat, name, count, total, longest in summarize(trace)[:8]:
+        print(f'  {cat:6} {name:28} {count:5} x  {total:8.1f} ms total  {longest:7.2f} ms max')
+    assert {'api', 'http', 'image', 'ui'} <= categories
+    assert {'gallery.layout', 'gallery.paint', 'gallery.display_results'} <= {e['name'] for e in events}
+    assert {'image queue', 'worker pool', 'pixmap cache', 'counts'} <= tracks
+    assert 'stats' in trace['otherData']
+    assert hooks['traced, off'] - hooks['plain'] < 1e-6, 'disabled hooks should cost well under a microsecond'
+
+
+if __name__ == '__main__':
+    main()
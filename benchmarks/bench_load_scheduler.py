@@ -0,0 +1,101 @@
+"""
+A search leaves a page of thumbnails loading, then the user searches again.
+How long until the new page's visible thumbnails are on screen when
+loaders go straight to a ``QThreadPool`` (before) versus through the
+``LoadScheduler``, which drops the stale work and serves visible cells
+before the prefetch margin?
+
+    python -m benchmarks.bench_load_scheduler [--stale 175] [--visible 30]
+"""
+import argparse, os, shutil, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from benchmarks.stand_in import StandInServer
+from core import http_client
+from core.image_loader import ImageLoader, ImageLoaderSignals
+from core.load_scheduler import PREFETCH, VISIBLE, LoadScheduler
+
+
+def _png():
+    image = QtGui.QImage(146, 204, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor('darkred'))
+    data = QtCore.QByteArray()
+    buf = QtCore.QBuffer(data)
+    buf.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buf, 'PNG')
+    return bytes(data)
+
+
+def wait_for(app, urls, signals):
+    remaining = set(urls)
+    signals.image_loaded.connect(lambda url, pix: remaining.discard(url))
+    signals.image_error.connect(lambda url, msg: remaining.discard(url))
+    start = time.perf_counter()
+    while remaining:
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 5)
+        time.sleep(0.001)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stale', type=int, default=175)
+    parser.add_argument('--visible', type=int, default=30)
+    parser.add_argument('--prefetch', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=6)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    body = _png()
+    http_client.configure(pool_size=args.workers)
+    size = QtCore.QSize(120, 168)
+
+    with StandInServer({'/img': lambda q, b, h: (200, body, {'Content-Type': 'image/png'})},
+                       args.latency) as server:
+        def urls(run, search, count):
+            return [f'{server.url}/img?run={run}&search={search}&i={i}' for i in range(count)]
+
+        # Before: every loader is queued FIFO in the pool and runs to completion.
+        cache_dir = tempfile.mkdtemp()
+        pool = QtCore.QThreadPool()
+        pool.setMaxThreadCount(args.workers)
+        signals = ImageLoaderSignals()
+        for url in urls('pool', 1, args.stale):
+            pool.start(ImageLoader(url, cache_dir, size, signals))
+        visible = urls('pool', 2, args.visible)
+        for url in visible + urls('pool', 2, args.prefetch + args.visible)[args.visible:]:
+            pool.start(ImageLoader(url, cache_dir, size, signals))
+        before = wait_for(app, visible, signals)
+        pool.clear()
+        pool.waitForDone()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+        # After: the new search starts a new generation; visible cells go first.
+        cache_dir = tempfile.mkdtemp()
+        scheduler = LoadScheduler(max_workers=args.workers)
+        signals = ImageLoaderSignals()
+        for url in urls('sched', 1, args.stale):
+            scheduler.submit(url, cache_dir, size, signals, PREFETCH)
+        scheduler.new_generation('gallery')
+        page = urls('sched', 2, args.visible + args.prefetch)
+        visible = page[:args.visible]
+        # Submitted in row order, as the gallery would before it knew which rows are visible.
+        for i, url in enumerate(page):
+            scheduler.submit(url, cache_dir, size, signals, VISIBLE if i < args.visible else PREFETCH)
+        after = wait_for(app, visible, signals)
+        scheduler.wait_for_done()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f'visible thumbnails of the new search after {args.stale} stale loads')
+    print(f'  QThreadPool FIFO  {before:6.2f}s')
+    print(f'  LoadScheduler     {after:6.2f}s  (x{before / after:.1f})')
+    for key, value in scheduler.stats().items():
+        print(f'  {key:10} {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Name completion and live search.
+
+First the ``NameIndex`` alone: build time for a 30k-name catalog and the
+latency of completing prefixes of one to eight characters, which must stay
+under 5 ms.  Then the window in live mode against a stand-in: a query is
+typed key by key with pauses shorter and longer than the debounce delay,
+counting the searches and catalog requests that reach the server and the
+time each keystroke (with its completion) keeps the GUI thread busy.
+
+    python -m benchmarks.bench_name_index [--names 30000] [--latency 0.2]
+"""
+import argparse, os, random, statistics, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtTest, QtWidgets
+
+from benchmarks.check_responsiveness import run_until
+from benchmarks.stand_in import StandInServer
+from benchmarks.synthetic import card_name, make_cards
+from core.name_index import NameIndex, name_prefix
+from core.response_cache import ResponseCache
+
+
+def make_names(n, seed=3):
+    rng = random.Random(seed)
+    names = [card_name(rng, i) for i in range(n)]
+    # A few real shapes: faces, accents, punctuation.
+    names += ['Fire // Ice', 'Lim-Dûl the Necromancer', 'Æther Vial', "Urza's Saga", 'Lightning Bolt']
+    return names
+
+
+def bench_index(names, samples=5000):
+    start = time.perf_counter()
+    index = NameIndex(names)
+    build = time.perf_counter() - start
+    rng = random.Random(4)
+    texts = []
+    for _ in range(samples):
+        words = rng.choice(names).split()
+        word = ' '.join(words[rng.randrange(len(words)):])
+        texts.append(word[:rng.randint(1, 8)])
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        index.complete(name_prefix(text) or '', 10)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return index, build, latencies
+
+
+def search_route(cards, counts):
+    """``/cards/search`` answering name substrings, like a plain-word query."""
+    def handler(query, body, headers):
+        counts['search'] += 1
+        q = query.get('q', '').lower()
+        found = [c for c in cards if q in c['name'].lower()]
+        if not found:
+            return 404, {'object': 'error', 'status': 404, 'details': 'No cards found'}, {}
+        return 200, {'object': 'list', 'total_cards': len(found), 'has_more': False, 'data': found[:175]}, {}
+    return handler
+
+
+def type_text(app, edit, text, gap):
+    """Type *text* into *edit* with *gap* seconds between keys; GUI time per key."""
+    busy = []
+    for ch in text:
+        start = time.perf_counter()
+        QtTest.QTest.keyClick(edit, ch)
+        busy.append(time.perf_counter() - start)
+        deadline = time.perf_counter() + gap
+        while time.perf_counter() < deadline:
+            app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 5)
+            time.sleep(0.001)
+    return busy
+
+
+def bench_live(app, names, latency):
+    from ui.config import GalleryConfig
+    from ui.main_window import ScryfallGallery
+
+    QtWidgets.QMessageBox.critical = lambda *a, **k: None
+    GalleryConfig.COLLECTION_STORE_PATH = os.path.join(tempfile.mkdtemp(), 'collections.sqlite')
+    cards = make_cards(2000)
+    counts = {'search': 0, 'catalog': 0}
+
+    def catalog(query, body, headers):
+        counts['catalog'] += 1
+        return 200, {'object': 'catalog', 'total_values': len(names), 'data': names}, {}
+
+    routes = {'/cards/search': search_route(cards, counts), '/catalog/card-names': catalog}
+    with StandInServer(routes, latency) as server:
+        window = ScryfallGallery(tempfile.mkdtemp())
+        window.api.BASE_URL = f'{server.url}/cards/search'
+        window.api.CATALOG_URL = f'{server.url}/catalog/card-names'
+        window.api.card_index = None
+        window.api.response_cache = ResponseCache(os.path.join(tempfile.mkdtemp(), 'responses.sqlite'))
+        window.chk_live.setChecked(True)
+        window.show()
+        delay = GalleryConfig.LIVE_SEARCH_DELAY / 1000
+        edit = window.query_edit
+
+        # The first keystroke loads the catalog in a worker.
+        type_text(app, edit, 'x', 0)
+        run_until(app, lambda: len(window.name_index) >= len(names), 30)
+        edit.clear()
+
+        # Typed faster than the debounce delay: one search for the whole word...
+        word = cards[7]['name'].split()[0]
+        busy = type_text(app, edit, word, delay / 3)
+        completions = window.completions.stringList()
+        run_until(app, lambda: counts['search'] == 1 and window.model.rowCount() > 0, 30)
+        first = counts['search']
+        # ... a pause long enough to start a search, then more typing while
+        # it is in flight: its results never reach the gallery.
+        second = cards[7]['name'].split()[1]
+        busy += type_text(app, edit, ' ' + second[0], delay / 3)
+        busy += type_text(app, edit, second[1], delay + latency / 2)
+        busy += type_text(app, edit, second[2:4], delay / 3)
+        final = edit.text().strip().lower()
+
+        def shown():
+            model = window.model
+            return [model.data(model.index(row, 0)).lower() for row in range(model.rowCount())]
+
+        run_until(app, lambda: shown() and all(final in name for name in shown()), 30)
+        time.sleep(latency * 2)
+        app.processEvents()
+        stale = [name for name in shown() if final not in name]
+        keys = len(edit.text())
+        window.scheduler.wait_for_done(30000)
+        window.close()
+    return {'keys': keys, 'first_searches': first, 'searches': counts['search'], 'catalog': counts['catalog'],
+            'busy': sorted(busy), 'completions': completions, 'word': word, 'stale': stale}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--names', type=int, default=30000)
+    parser.add_argument('--latency', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    names = make_names(args.names)
+    index, build, latencies = bench_index(names)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f'{len(index)} names indexed in {build * 1000:.0f} ms')
+    print(f'  complete: p50 {statistics.median(latencies) * 1e6:.0f} us  p99 {p99 * 1e6:.0f} us  '
+          f'max {latencies[-1] * 1e6:.0f} us')
+    print(f"  'bolt' -> {index.complete('bolt', 3)}  'ice' -> {index.complete('ice', 3)}  "
+          f"'aeth' -> {index.complete('aeth', 3)}  'lim-d' -> {index.complete('lim-d', 3)}")
+
+    live = bench_live(app, names, args.latency)
+    busy = live['busy']
+    print(f"live search, {args.latency * 1000:.0f} ms latency: {live['keys']} keys typed, "
+          f"{live['first_searches']} search for '{live['word']}', {live['searches']} in total, "
+          f"{live['catalog']} catalog request")
+    print(f"  GUI time per key: p50 {statistics.median(busy) * 1000:.2f} ms  max {busy[-1] * 1000:.2f} ms; "
+          f"completions for '{live['word']}': {live['completions'][:3]}")
+    assert p99 < 0.005, 'completion p99 over 5 ms'
+    assert live['first_searches'] == 1 and live['catalog'] == 1
+    assert live['searches'] <= 3 and not live['stale']
+    assert live['completions'], 'no completions'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Paging through search results with and without the next-page prefetcher:
+time from clicking "Next" until the new page's cards are listed, and until
+the first screenful of thumbnails is painted, against a stand-in with
+Scryfall-like latency.  Between clicks the user "reads" the page for
+*--dwell* seconds, which is the time the prefetcher has to work with.
+
+    python -m benchmarks.bench_prefetch [--pages 4] [--latency 0.25] [--dwell 2]
+"""
+import argparse, os, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtWidgets
+
+from benchmarks.bench_thumbnail_resize import _image
+from benchmarks.check_responsiveness import run_until
+from benchmarks.stand_in import StandInServer, paged_search_route
+from benchmarks.synthetic import make_cards
+from core.card_index import CardIndex
+from core.pixmap_cache import pixmap_cache
+from core.scryfall_api import ScryfallAPI
+from ui.gallery_view import CardRole
+
+
+def first_screen_painted(window):
+    size = window.view.itemDelegate().thumb_size
+    rows = window.view.visible_rows(0)
+    return len(rows) > 0 and all(pixmap_cache.peek(window.model.url(row), size) is not None for row in rows)
+
+
+def run(app, window, cards, pages, dwell):
+    timings = []
+    window.query_edit.setText('t:creature')
+    window.search()
+    run_until(app, lambda: window.model.rowCount() > 0, 30)
+    run_until(app, lambda: first_screen_painted(window), 60)
+    for page in range(2, pages + 1):
+        deadline = time.perf_counter() + dwell
+        run_until(app, lambda: time.perf_counter() > deadline, dwell + 1)
+        start = time.perf_counter()
+        window.next_page()
+        first = cards[(page - 1) * ScryfallAPI.PAGE_SIZE]['id']
+        run_until(app, lambda: window.model.rowCount() > 0
+                  and window.model.data(window.model.index(0), CardRole)['id'] == first, 30)
+        listed = time.perf_counter() - start
+        run_until(app, lambda: first_screen_painted(window), 60)
+        timings.append((listed, time.perf_counter() - start))
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.25)
+    parser.add_argument('--dwell', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    from ui.config import GalleryConfig
+    from ui.main_window import ScryfallGallery
+    GalleryConfig.COLLECTION_STORE_PATH = os.path.join(tempfile.mkdtemp(), 'collections.sqlite')
+
+    image = _image(146)
+    cards = make_cards(args.pages * ScryfallAPI.PAGE_SIZE)
+    routes = {
+        '/cards/search': paged_search_route(cards),
+        '/img': lambda q, b, h: (200, image, {'Content-Type': 'image/jpeg'}),
+    }
+    with StandInServer(routes, args.latency) as server:
+        results = {}
+        for label, enabled in (('without prefetch', False), ('with prefetch', True)):
+            pixmap_cache.clear()
+            for card in cards:
+                # Fresh URLs per run so nothing is cached from the previous one.
+                card['image_uris'] = {v: f"{server.url}/img?id={card['id']}&v={v}&run={label[0]}"
+                                      for v in ('small', 'normal', 'large', 'png')}
+            window = ScryfallGallery(tempfile.mkdtemp())
+            window.api.BASE_URL = f'{server.url}/cards/search'
+            window.api.response_cache = None
+            window.api.card_store = CardIndex(os.path.join(tempfile.mkdtemp(), 'store.sqlite'))
+            if not enabled:
+                window.prefetcher.prefetch = lambda *a, **k: None
+            window.resize(1280, 900)
+            window.show()
+            results[label] = run(app, window, cards, args.pages, args.dwell), window.prefetcher.stats()
+            window.scheduler.wait_for_done(30000)
+            window.close()
+
+    print(f'{args.pages} pages, {args.latency * 1000:.0f} ms latency, {args.dwell:.1f} s on each page')
+    for label, (timings, stats) in results.items():
+        listed = sum(t[0] for t in timings) / len(timings) * 1000
+        painted = sum(t[1] for t in timings) / len(timings) * 1000
+        print(f'  {label:17} next page listed {listed:7.1f} ms  first screen painted {painted:7.1f} ms')
+    stats = results['with prefetch'][1]
+    print(f"  prefetch: page hit rate {stats['page_hit_rate']}, thumbnail hit rate {stats['thumbnail_hit_rate']}, "
+          f"{stats['thumbnails_fetched']} thumbnails / {stats['bytes_fetched'] / 1024:.0f} KB fetched")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Headless pre-warm of four search pages and an Archidekt collection
+against the stand-in: cards/s and MB/s, then an interrupted run resumed
+from its checkpoint, which must not download anything twice.  A query
+matching nothing (a 404) comes first: it must be reported, asked for only
+once across both runs, and not keep the others from being warmed.
+Finally checks that everything the gallery would ask for is local.
+
+    python -m benchmarks.bench_prewarm [--pages 4] [--rows 3000] [--latency 0.05]
+"""
+import argparse, os, tempfile, threading
+
+from benchmarks.bench_archidekt_import import make_rows
+from benchmarks.bench_cache_format import _photo
+from benchmarks.stand_in import StandInServer, archidekt_export_route, collection_route, paged_search_route
+from benchmarks.synthetic import make_cards
+from core import http_client
+from core.cache_manager import cache_manager_for
+from core.card_index import CardIndex
+from core.collection import CollectionStore
+from core.prewarm import Checkpoint, Prewarmer, image_urls
+from core.response_cache import ResponseCache, search_key
+from core.scryfall_api import ScryfallAPI
+from utils.helpers import IMAGE_WIDTHS
+
+
+def make_api(server, directory):
+    api = ScryfallAPI(card_store=CardIndex(os.path.join(directory, 'cards.sqlite')),
+                      response_cache=ResponseCache(os.path.join(directory, 'responses.sqlite')))
+    api.BASE_URL = f'{server.url}/cards/search'
+    api.COLLECTION_URL = f'{server.url}/cards/collection'
+    api.ARCHIDEKT_BASE_URL = server.url
+    return api
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=3000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    printings = args.pages * ScryfallAPI.PAGE_SIZE
+    cards = make_cards(printings)
+    # The export names the same synthetic cards; a third of them are not in the search.
+    owned = make_cards(printings + printings // 3)
+    body = _photo(IMAGE_WIDTHS['small'], 2)
+    images = []
+    search = paged_search_route(cards)
+    refused = []
+
+    def search_route(query, body, headers):
+        if query.get('q') == 'nothing':
+            refused.append(query)
+            return 404, {'object': 'error', 'status': 404, 'details': 'No cards found'}, {}
+        return search(query, body, headers)
+
+    routes = {
+        '/cards/search': search_route,
+        '/cards/collection': collection_route(owned),
+        '/api/collection/export/v2/7/': archidekt_export_route(make_rows(args.rows, len(owned)), 1000),
+        '/img': lambda q, b, h: images.append(q['id']) or (200, body, {'Content-Type': 'image/jpeg'}),
+    }
+    http_client.configure(pool_size=args.workers + 4)
+    with StandInServer(routes, args.latency) as server:
+        for card in cards + owned:
+            card['image_uris'] = {v: f"{server.url}/img?id={card['id']}&v={v}" for v in IMAGE_WIDTHS}
+        directory = tempfile.mkdtemp()
+        cache_dir = os.path.join(directory, 'cache')
+        sources = ['query:nothing', 'query:t:creature', 'archidekt:7']
+
+        def prewarmer(stop=None):
+            return Prewarmer(make_api(server, directory), cache_dir,
+                             Checkpoint(os.path.join(directory, 'prewarm.sqlite')),
+                             CollectionStore(os.path.join(directory, 'collections.sqlite')),
+                             workers=args.workers, stop=stop)
+
+        # Interrupted once a third of the images are in...
+        expected = len({url for card in cards for url in image_urls(card, (120,))})
+        stop = threading.Event()
+        first = prewarmer(stop.is_set)
+        first.stats.add_image = lambda downloaded, add=first.stats.add_image: (
+            add(downloaded), first.stats.images >= expected // 3 and stop.set())
+        partial = first.run(sources)
+        # ... and resumed.
+        resumed = prewarmer().run(sources)
+
+        total, done = Checkpoint(os.path.join(directory, 'prewarm.sqlite')).image_counts()
+        cache = cache_manager_for(cache_dir)
+        missing = [card for card in cards if not cache.contains(image_urls(card, (120,)).pop())]
+        responses = make_api(server, directory).response_cache
+        uncached = [page for page in range(1, args.pages + 1)
+                    if responses.get(search_key('t:creature', page)) is None]
+
+    print(f'{args.pages} search pages + {args.rows}-row collection, {args.latency * 1000:.0f} ms latency')
+    for label, stats in (('interrupted', partial), ('resumed', resumed)):
+        print(f"  {label:11} {stats['cards']:5} cards {stats['cards_per_s']:7.1f}/s  "
+              f"{stats['images']:5} images {stats['images_per_s']:6.1f}/s  "
+              f"{stats['mb']:5.1f} MB {stats['mb_per_s']:5.2f} MB/s  {stats['seconds']:5.1f}s")
+    print(f'  {len(images)} image downloads for {total} images ({done} done), '
+          f'{len(missing)} search thumbnails and {len(uncached)} search pages missing')
+    print(f"  failed sources: {partial['failed_sources']}; refused query asked {len(refused)}x")
+    assert len(images) == len(set(images)) == total == done, 'every image downloaded exactly once'
+    assert not missing and not uncached
+    assert list(partial['failed_sources']) == ['query:nothing'] and not resumed['failed_sources']
+    assert len(refused) == 1, 'a refused query is not retried'
+
+
+if __name__ == '__main__':
+    main()
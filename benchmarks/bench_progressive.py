@@ -0,0 +1,113 @@
+"""
+Time to first paint of a full page of thumbnails: when every cell on screen
+first shows something, when it first shows an image (a blurred preview or
+the ``small`` variant), and when it shows the final thumbnail.
+
+Thumbnails are 240 px wide, so the final image is the ``normal`` variant.
+The stand-in serves each variant at about Scryfall's file size over a
+limited per-response bandwidth.  The cold run starts with empty caches;
+the warm run has the files on disk (and their previews in the cache index)
+but nothing decoded in memory, as after a restart; the thumbnails packed
+into the atlas during the cold run are final from the first paint.
+
+    python -m benchmarks.bench_progressive [--latency 0.15] [--bandwidth 400000]
+"""
+import argparse, os, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtWidgets
+
+from benchmarks.bench_thumbnail_resize import _image
+from benchmarks.check_responsiveness import run_until
+from benchmarks.stand_in import StandInServer
+from benchmarks.synthetic import make_cards
+from core.pixmap_cache import pixmap_cache
+from ui.gallery_view import CardRole
+from utils.helpers import IMAGE_WIDTHS
+
+# Typical Scryfall file sizes; bodies are padded after the JPEG data.
+FILE_SIZES = {'small': 12_000, 'normal': 75_000, 'large': 200_000, 'png': 900_000}
+
+
+def _body(variant):
+    data = _image(IMAGE_WIDTHS[variant])
+    return data + b'\0' * max(0, FILE_SIZES[variant] - len(data))
+
+
+def _cells(window):
+    for row in window.view.visible_rows(0):
+        yield window.model.url(row), window.model.data(window.model.index(row), CardRole)
+
+
+def measure(app, window, cards):
+    size = window.view.itemDelegate().thumb_size
+    marks = {}
+    start = time.perf_counter()
+    window.current_cards = cards
+    window._display_results(cards)
+    window.view.viewport().repaint()
+    marks['placeholder'] = time.perf_counter() - start
+
+    def check():
+        cells = list(_cells(window))
+        if not cells:
+            return False
+        if 'image' not in marks and all(window._thumbnail_for(url, card) is not None for url, card in cells):
+            marks['image'] = time.perf_counter() - start
+        if all(pixmap_cache.peek(url, size) is not None or window.atlas and window.atlas.contains(url, size)
+               for url, _ in cells):
+            marks['final'] = time.perf_counter() - start
+            marks.setdefault('image', marks['final'])
+            return True
+        return False
+
+    run_until(app, check, 120)
+    return marks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=175)
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--bandwidth', type=int, default=400_000, help='bytes per second per response')
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    from ui.config import GalleryConfig
+    from ui.main_window import ScryfallGallery
+    GalleryConfig.COLLECTION_STORE_PATH = os.path.join(tempfile.mkdtemp(), 'collections.sqlite')
+
+    bodies = {variant: _body(variant) for variant in IMAGE_WIDTHS}
+    route = lambda q, b, h: (200, bodies[q['v']], {'Content-Type': 'image/jpeg'})
+    rows = []
+    with StandInServer({'/img': route}, args.latency, bandwidth=args.bandwidth) as server:
+        for progressive in (False, True):
+            GalleryConfig.PROGRESSIVE_THUMBNAILS = progressive
+            cards = make_cards(args.cards)
+            for card in cards:
+                card['image_uris'] = {v: f"{server.url}/img?id={card['id']}&v={v}&p={int(progressive)}"
+                                      for v in IMAGE_WIDTHS}
+            window = ScryfallGallery(tempfile.mkdtemp())
+            window.resize(1280, 900)
+            window.slider.setValue(240)
+            window._apply_thumb_size()
+            window.show()
+            for run in ('cold', 'warm'):
+                pixmap_cache.clear()
+                window.previews.clear()
+                marks = measure(app, window, cards)
+                rows.append((progressive, run, marks))
+            window.scheduler.wait_for_done(30000)
+            window.close()
+
+    print(f'{args.cards} cards at 240 px, {args.latency * 1000:.0f} ms latency, '
+          f'{args.bandwidth / 1000:.0f} kB/s per response')
+    for progressive, run, marks in rows:
+        print(f"  {'progressive' if progressive else 'final only':12} {run}  "
+              f"placeholder {marks['placeholder'] * 1000:6.1f} ms  first image {marks['image'] * 1000:7.1f} ms  "
+              f"final {marks['final'] * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Repeat navigation with and without the search response cache.
+
+Walks pages 1 -> 2 -> 3 -> 2 -> 1 and re-runs the query twice (as toggling
+"Filter Collection" does), then repeats the walk after the TTL expired to
+show conditional revalidation.
+
+    python -m benchmarks.bench_response_cache [--latency 0.15]
+"""
+import argparse, os, tempfile, time
+
+from benchmarks.stand_in import StandInServer, paged_search_route
+from benchmarks.synthetic import make_cards
+from core.response_cache import ResponseCache
+from core.scryfall_api import ScryfallAPI
+
+WALK = [1, 2, 3, 2, 1, 1, 1]
+
+
+def walk(api, server, query='t:creature'):
+    before, start = server.request_count, time.perf_counter()
+    for page in WALK:
+        api.search(query, page)
+    return server.request_count - before, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    cards = make_cards(5 * ScryfallAPI.PAGE_SIZE)
+    with StandInServer({'/cards/search': paged_search_route(cards)}, args.latency) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        plain = ScryfallAPI()
+        plain.BASE_URL = f'{server.url}/cards/search'
+        print('no cache:       %2d requests %5.2fs' % walk(plain, server))
+
+        cache = ResponseCache(os.path.join(tmp, 'responses.sqlite'), ttl=3600)
+        cached = ScryfallAPI(response_cache=cache)
+        cached.BASE_URL = plain.BASE_URL
+        print('cache:          %2d requests %5.2fs' % walk(cached, server))
+        print('cache (warm):   %2d requests %5.2fs' % walk(cached, server))
+        cache.ttl = 0
+        print('cache (stale):  %2d requests %5.2fs (304 revalidations)' % walk(cached, server))
+        print('stats:', cache.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Warm start: a 175-card page whose images are all in the disk cache, shown
+by a freshly started window (nothing decoded in memory).  Without the
+thumbnail atlas every cell needs a cache lookup, a file read, a decode and
+a scale on the load workers; with it the first paint draws every cell
+straight from the mapped atlas file.
+
+Reports the time until every visible cell shows its final thumbnail, how
+many paint passes that took, and how many disk-cache lookups and image
+decodes happened meanwhile.
+
+    python -m benchmarks.bench_thumb_atlas [--cards 175] [--width 120]
+"""
+import argparse, os, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtWidgets
+
+from benchmarks.bench_cache_format import _photo
+from benchmarks.check_responsiveness import run_until
+from benchmarks.stand_in import StandInServer
+from benchmarks.synthetic import make_cards
+from core.cache_manager import CacheManager
+from core.image_loader import stage_timings
+from core.pixmap_cache import pixmap_cache
+from utils.helpers import IMAGE_WIDTHS
+
+
+class Counter(QtCore.QObject):
+    """Counts paint passes of *widget*, cache lookups and decodes while active."""
+
+    def __init__(self, widget):
+        super().__init__()
+        self.widget = widget
+        self.passes = self.lookups = 0
+        self._lookup = CacheManager.lookup
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Type.Paint:
+            self.passes += 1
+        return False
+
+    @property
+    def decodes(self):
+        return stage_timings.snapshot().get('decode', {}).get('count', 0)
+
+    def __enter__(self):
+        counter = self
+
+        def lookup(manager, url):
+            counter.lookups += 1
+            return counter._lookup(manager, url)
+
+        CacheManager.lookup = lookup
+        stage_timings.reset()
+        self.widget.installEventFilter(self)
+        return self
+
+    def __exit__(self, *exc):
+        CacheManager.lookup = self._lookup
+        self.widget.removeEventFilter(self)
+
+
+def final(window):
+    size = window.view.itemDelegate().thumb_size
+    for row in window.view.visible_rows(0):
+        url = window.model.url(row)
+        if pixmap_cache.peek(url, size) is None and not (window.atlas and window.atlas.contains(url, size)):
+            return False
+    return True
+
+
+def open_window(cache_dir, width):
+    from ui.main_window import ScryfallGallery
+    window = ScryfallGallery(cache_dir)
+    window.resize(1280, 900)
+    window.slider.setValue(width)
+    window._apply_thumb_size()
+    window.show()
+    return window
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=175)
+    parser.add_argument('--width', type=int, default=120)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    from ui.config import GalleryConfig
+    GalleryConfig.COLLECTION_STORE_PATH = os.path.join(tempfile.mkdtemp(), 'collections.sqlite')
+    GalleryConfig.PROGRESSIVE_THUMBNAILS = False
+
+    bodies = {variant: _photo(width, 1) for variant, width in IMAGE_WIDTHS.items()}
+    route = lambda q, b, h: (200, bodies[q['v']], {'Content-Type': 'image/jpeg'})
+    rows = []
+    with StandInServer({'/img': route}, args.latency) as server:
+        for label, widths in (('disk cache', ()), ('atlas', GalleryConfig.THUMB_ATLAS_WIDTHS)):
+            GalleryConfig.THUMB_ATLAS_WIDTHS = widths
+            cards = make_cards(args.cards)
+            for card in cards:
+                card['image_uris'] = {v: f"{server.url}/img?id={card['id']}&v={v}&run={label}" for v in IMAGE_WIDTHS}
+            cache_dir = tempfile.mkdtemp()
+            # First session: download everything into the caches.
+            window = open_window(cache_dir, args.width)
+            window._display_results(cards)
+            run_until(app, lambda: final(window) and not window.pending_urls, 120)
+            window.scheduler.wait_for_done(30000)
+            window.close()
+
+            # Second session: nothing in memory.
+            pixmap_cache.clear()
+            window = open_window(cache_dir, args.width)
+            app.processEvents()
+            with Counter(window.view.viewport()) as counter:
+                start = time.perf_counter()
+                window._display_results(cards)
+                window.view.viewport().repaint()
+                run_until(app, lambda: final(window), 120)
+                seconds = time.perf_counter() - start
+            visible = len(window.view.visible_rows(0))
+            rows.append((label, seconds, counter.passes, counter.lookups, counter.decodes, visible))
+            window.scheduler.wait_for_done(30000)
+            window.close()
+
+    print(f'warm start, {args.cards} cards at {args.width} px')
+    for label, seconds, passes, lookups, decodes, visible in rows:
+        print(f'  {label:10} all {visible} visible final after {seconds * 1000:7.1f} ms  '
+              f'{passes:3} paint passes  {lookups:4} cache lookups  {decodes:4} decodes')
+
+
+if __name__ == '__main__':
+    main()
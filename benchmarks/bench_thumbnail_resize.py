@@ -0,0 +1,98 @@
+"""
+Dragging the thumbnail slider over a loaded 175-card page: time per drag
+step, time until the smooth thumbnails are back, and how many disk-cache
+lookups and HTTP requests the resize caused.  A small resize is covered
+by the decoded sources already in memory; a large one needs the next
+image variant for the cards on screen.
+
+    python -m benchmarks.bench_thumbnail_resize
+"""
+import argparse, os, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from benchmarks.check_responsiveness import run_until
+from benchmarks.stand_in import StandInServer
+from benchmarks.synthetic import make_cards
+from core.cache_manager import CacheManager
+from core.pixmap_cache import pixmap_cache
+from utils.helpers import IMAGE_WIDTHS
+
+
+def _image(width):
+    image = QtGui.QImage(width, int(width * 1.4), QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor('navy'))
+    data = QtCore.QByteArray()
+    buf = QtCore.QBuffer(data)
+    buf.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buf, 'JPG')
+    return bytes(data)
+
+
+def all_smooth(window):
+    size = window.view.itemDelegate().thumb_size
+    rows = window.view.visible_rows(1.0)
+    return len(rows) > 0 and all(pixmap_cache.peek(window.model.url(row), size) is not None for row in rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=175)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    from ui.main_window import ScryfallGallery
+    from ui.config import GalleryConfig
+    GalleryConfig.COLLECTION_STORE_PATH = os.path.join(tempfile.mkdtemp(), 'collections.sqlite')
+
+    lookups = [0]
+    original_lookup = CacheManager.lookup
+
+    def counting_lookup(self, url):
+        lookups[0] += 1
+        return original_lookup(self, url)
+
+    CacheManager.lookup = counting_lookup
+
+    bodies = {key: _image(width) for key, width in IMAGE_WIDTHS.items()}
+    route = lambda q, b, h: (200, bodies[q['v']], {'Content-Type': 'image/jpeg'})
+    with StandInServer({'/img': route}, args.latency) as server:
+        cards = make_cards(args.cards)
+        for card in cards:
+            card['image_uris'] = {v: f"{server.url}/img?id={card['id']}&v={v}" for v in IMAGE_WIDTHS}
+        window = ScryfallGallery(tempfile.mkdtemp())
+        window.resize(1600, 1200)
+        window.show()
+        window.current_cards = cards
+        window._display_results(cards)
+        run_until(app, lambda: all_smooth(window), 60)
+        print(f'{len(window.view.visible_rows(1.0))} cards in range, loaded at width {window.thumb_width}')
+
+        for target in (140, 100, 240):
+            requests, disk = server.request_count, lookups[0]
+            window.slider.setSliderDown(True)
+            steps = []
+            start_width = window.thumb_width
+            for width in range(start_width, target, 2 if target > start_width else -2):
+                t = time.perf_counter()
+                window.slider.setValue(width)
+                window.view.viewport().repaint()
+                steps.append((time.perf_counter() - t) * 1000)
+            window.slider.setValue(target)
+            window.slider.setSliderDown(False)
+            t = time.perf_counter()
+            window._on_slider_release()
+            run_until(app, lambda: all_smooth(window), 60)
+            settle = (time.perf_counter() - t) * 1000
+            steps.sort()
+            print(f'{start_width:3} -> {target:3}px  drag step p50 {steps[len(steps) // 2]:5.1f} ms '
+                  f'max {steps[-1]:5.1f} ms  smooth after {settle:6.1f} ms  '
+                  f'disk lookups {lookups[0] - disk:3}  HTTP requests {server.request_count - requests:3}')
+        print('scheduler', window.scheduler.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Drives the gallery window against a deliberately slow local stand-in and
+checks that the GUI thread keeps processing events: a 10 ms heartbeat timer
+records the longest gap between ticks while a plain search, an Archidekt
+collection load and a collection-filtered search are in flight.  Exits
+non-zero when the longest stall exceeds *--max-stall-ms*.
+
+    python -m benchmarks.check_responsiveness [--latency 0.5] [--max-stall-ms 200]
+"""
+import argparse, os, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from benchmarks.stand_in import StandInServer, archidekt_export_route, collection_route, paged_search_route
+from benchmarks.synthetic import make_cards
+from core.card_index import CardIndex
+
+
+class Heartbeat:
+    def __init__(self, interval_ms=10):
+        self.longest = 0.0
+        self._last = time.perf_counter()
+        self._timer = QtCore.QTimer()
+        self._timer.timeout.connect(self._tick)
+        self._timer.start(interval_ms)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.longest = max(self.longest, now - self._last)
+        self._last = now
+
+    def reset(self):
+        self.longest = 0.0
+        self._last = time.perf_counter()
+
+
+def run_until(app, condition, timeout):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError('timed out waiting for the window')
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 5)
+        time.sleep(0.001)
+
+
+def _png():
+    image = QtGui.QImage(146, 204, QtGui.QImage.Format.Format_RGB32)
+    image.fill(QtGui.QColor('darkgreen'))
+    data = QtCore.QByteArray()
+    buf = QtCore.QBuffer(data)
+    buf.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buf, 'PNG')
+    return bytes(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cards', type=int, default=875)
+    parser.add_argument('--owned', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--max-stall-ms', type=float, default=200)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    # Message boxes would block the run waiting for a click.
+    QtWidgets.QMessageBox.information = QtWidgets.QMessageBox.warning = lambda *a, **k: None
+
+    from ui.main_window import ScryfallGallery
+    from ui.config import GalleryConfig
+    GalleryConfig.COLLECTION_STORE_PATH = os.path.join(tempfile.mkdtemp(), 'collections.sqlite')
+
+    png = _png()
+    cards = make_cards(args.cards)
+    rows = [{'Quantity': 1, 'Name': c['name']} for c in cards[::max(1, args.cards // args.owned)]]
+    routes = {
+        '/cards/search': paged_search_route(cards),
+        '/cards/collection': collection_route(cards),
+        '/api/collection/export/v2/1/': archidekt_export_route(rows, page_size=100),
+        '/img': lambda q, b, h: (200, png, {'Content-Type': 'image/png'}),
+    }
+    results = {}
+    with StandInServer(routes, args.latency) as server:
+        for card in cards:
+            card['image_uris'] = {v: f"{server.url}/img?id={card['id']}&v={v}"
+                                  for v in ('small', 'normal', 'large', 'png')}
+        window = ScryfallGallery(tempfile.mkdtemp())
+        window.api.BASE_URL = f'{server.url}/cards/search'
+        window.api.COLLECTION_URL = f'{server.url}/cards/collection'
+        window.api.ARCHIDEKT_BASE_URL = server.url
+        window.api.card_index = None
+        window.api.response_cache = None
+        window.api.card_store = CardIndex(os.path.join(tempfile.mkdtemp(), 'store.sqlite'))
+        window.show()
+        heartbeat = Heartbeat()
+
+        heartbeat.reset()
+        window.query_edit.setText('t:creature')
+        window.search()
+        run_until(app, lambda: window.model.rowCount() > 0, 30)
+        results['search'] = heartbeat.longest
+
+        heartbeat.reset()
+        window.archidekt_id_edit.setText('1')
+        window.load_archidekt_collection()
+        run_until(app, lambda: len(window.collection_names) == len(rows), 30)
+        results['archidekt load'] = heartbeat.longest
+
+        heartbeat.reset()
+        finished = []
+        window.search_signals.finished.connect(finished.append)
+        window.chk_filter.setChecked(True)
+        run_until(app, lambda: finished, 60)
+        results['filtered search'] = heartbeat.longest
+        window.scheduler.wait_for_done(30000)
+
+    print(f'stand-in latency {args.latency * 1000:.0f} ms per request, {server.request_count} requests')
+    worst = 0.0
+    for label, stall in results.items():
+        print(f'  {label:16} longest event-loop stall {stall * 1000:6.1f} ms')
+        worst = max(worst, stall)
+    ok = worst * 1000 <= args.max_stall_ms
+    print('OK' if ok else f'FAIL: GUI thread stalled for more than {args.max_stall_ms:.0f} ms')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
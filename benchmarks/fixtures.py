@@ -0,0 +1,128 @@
+"""
+Response fixtures for the benchmark suite, and the stand-in routes that
+serve them.
+
+A fixture set is a directory holding ``search.json`` (the query and its
+result pages as Scryfall returned them), ``archidekt.json`` (the pages of
+a collection export) and ``images/<variant>.jpg`` (one card's image in
+each variant).  ``record`` writes one from the live services, so runs can
+be repeated offline against real payloads:
+
+    python -m benchmarks.fixtures record resources/fixtures --query "t:creature" --archidekt 12345
+
+Without a recorded set, ``synthetic`` builds one of the same shape from
+``benchmarks.synthetic``.
+"""
+import argparse, json, os
+
+from benchmarks.stand_in import ARCHIDEKT_COLUMNS, archidekt_export_route, collection_route, paged_search_route
+from utils.helpers import IMAGE_WIDTHS
+
+
+class Fixtures:
+    def __init__(self, query, cards, archidekt_pages, images, source):
+        self.query = query
+        self.cards = cards                      # every card of the recorded result pages
+        self.archidekt_pages = archidekt_pages  # export responses, as bytes of JSON
+        self.images = images                    # variant -> image bytes
+        self.source = source
+
+    def routes(self):
+        """Stand-in routes for search, ``/cards/collection``, the Archidekt export and ``/img``."""
+        pages = self.archidekt_pages
+
+        def archidekt(query, body, headers):
+            page = json.loads(body or b'{}').get('page', 1)
+            return 200, pages[min(page, len(pages)) - 1], {'Content-Type': 'application/json'}
+
+        def image(query, body, headers):
+            body = self.images.get(query.get('v')) or self.images['normal']
+            return 200, body, {'Content-Type': 'image/jpeg'}
+
+        return {
+            '/cards/search': paged_search_route(self.cards),
+            '/cards/collection': collection_route(self.cards),
+            '/api/collection/export/v2/1/': archidekt,
+            '/img': image,
+        }
+
+
+def load(directory):
+    with open(os.path.join(directory, 'search.json'), encoding='utf-8') as f:
+        search = json.load(f)
+    with open(os.path.join(directory, 'archidekt.json'), encoding='utf-8') as f:
+        archidekt = [json.dumps(page).encode() for page in json.load(f)]
+    images = {}
+    for variant in IMAGE_WIDTHS:
+        path = os.path.join(directory, 'images', f'{variant}.jpg')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                images[variant] = f.read()
+    cards = [card for page in search['pages'] for card in page.get('data', [])]
+    return Fixtures(search['query'], cards, archidekt, images, os.path.abspath(directory))
+
+
+def synthetic(cards=700, rows=20_000, printings=5_000):
+    """A fixture set built from synthetic cards, export rows and JPEGs."""
+    from benchmarks.bench_archidekt_import import make_rows
+    from benchmarks.bench_cache_format import _photo
+    from benchmarks.synthetic import make_cards
+    from core.scryfall_api import ScryfallAPI
+
+    route = archidekt_export_route(make_rows(rows, printings), ScryfallAPI.ARCHIDEKT_PAGE_SIZE)
+    pages = []
+    for page in range(1, rows // ScryfallAPI.ARCHIDEKT_PAGE_SIZE + 2):
+        pages.append(json.dumps(route({}, json.dumps({'page': page}), {})[1]).encode())
+    images = {variant: _photo(width, 0) for variant, width in IMAGE_WIDTHS.items()}
+    return Fixtures('t:creature', make_cards(cards), pages, images, 'synthetic')
+
+
+def record(directory, query, pages=4, archidekt_id=None):
+    """Record *query*'s first *pages* result pages, an Archidekt export and one card's images."""
+    from core.http_client import get_client
+    from core.scryfall_api import ScryfallAPI
+    from utils.helpers import card_image_uris
+
+    api = ScryfallAPI()
+    results = [api.search(query, 1)]
+    while results[-1].get('has_more') and len(results) < pages:
+        results.append(api.search(query, len(results) + 1))
+    export = []
+    if archidekt_id is not None:
+        for page in range(1, 1000):
+            data = api._fetch_archidekt_page(archidekt_id, page)
+            export.append(data)
+            if not data.get('content') or not data.get('moreContent'):
+                break
+    else:
+        export.append({'content': ','.join(ARCHIDEKT_COLUMNS) + '\n', 'moreContent': False})
+    os.makedirs(os.path.join(directory, 'images'), exist_ok=True)
+    with open(os.path.join(directory, 'search.json'), 'w', encoding='utf-8') as f:
+        json.dump({'query': query, 'pages': results}, f)
+    with open(os.path.join(directory, 'archidekt.json'), 'w', encoding='utf-8') as f:
+        json.dump(export, f)
+    uris = card_image_uris(results[0]['data'][0])
+    for variant in IMAGE_WIDTHS:
+        if uris.get(variant) and variant != 'png':
+            resp = get_client().get(uris[variant])
+            resp.raise_for_status()
+            with open(os.path.join(directory, 'images', f'{variant}.jpg'), 'wb') as f:
+                f.write(resp.content)
+    return sum(len(page.get('data', [])) for page in results), len(export)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record response fixtures for benchmarks.suite')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help='record fixtures from the live services')
+    rec.add_argument('directory')
+    rec.add_argument('--query', default='t:creature')
+    rec.add_argument('--pages', type=int, default=4)
+    rec.add_argument('--archidekt', type=int, help='collection ID to export')
+    args = parser.parse_args(argv)
+    cards, pages = record(args.directory, args.query, args.pages, args.archidekt)
+    print(f'Recorded {cards} cards and {pages} export pages into {args.directory}')
+
+
+if __name__ == '__main__':
+    main()
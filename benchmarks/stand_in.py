@@ -0,0 +1,146 @@
+"""
+Local HTTP stand-in for the Scryfall / Archidekt endpoints.
+
+Routes map a path to a callable ``handler(query, body, headers) -> (status, payload,
+headers)`` where *query* is the parsed query string (single values) and
+*payload* is bytes, str or anything JSON serialisable.  Every response is
+delayed by *latency* seconds to mimic a real round trip, and every new
+connection by *connect_latency* to mimic the TCP / TLS handshake.  With
+*bandwidth* (bytes per second, per response) large bodies take longer.
+"""
+import csv, hashlib, io, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class StandInServer:
+    def __init__(self, routes=None, latency=0.0, connect_latency=0.0, bandwidth=None):
+        self.routes = dict(routes or {})
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.bandwidth = bandwidth
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def route(self, path):
+        def decorator(func):
+            self.routes[path] = func
+            return func
+        return decorator
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connection_count += 1
+                if server.connect_latency:
+                    time.sleep(server.connect_latency)
+
+            def _respond(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                handler = server.routes.get(parts.path)
+                if handler is None:
+                    status, payload, headers = 404, {'object': 'error', 'status': 404}, {}
+                else:
+                    status, payload, headers = handler(dict(parse_qsl(parts.query)), body, self.headers)
+                if isinstance(payload, str):
+                    payload = payload.encode()
+                elif not isinstance(payload, bytes):
+                    payload = json.dumps(payload).encode()
+                    headers = {'Content-Type': 'application/json', **headers}
+                if server.bandwidth:
+                    time.sleep(len(payload) / server.bandwidth)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def paged_search_route(cards, page_size=175):
+    """Serve *cards* the way ``/cards/search`` pages its results, with ETags."""
+    def handler(query, body, headers):
+        page = int(query.get('page', 1))
+        chunk = cards[(page - 1) * page_size:page * page_size]
+        payload = json.dumps({
+            'object': 'list',
+            'total_cards': len(cards),
+            'has_more': page * page_size < len(cards),
+            'data': chunk,
+        }).encode()
+        etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+        if headers.get('If-None-Match') == etag:
+            return 304, b'', {'ETag': etag}
+        return 200, payload, {'ETag': etag, 'Content-Type': 'application/json'}
+    return handler
+
+
+def collection_route(cards):
+    """Serve ``/cards/collection`` name lookups from *cards*."""
+    by_name = {c['name'].lower(): c for c in cards}
+
+    def handler(query, body, headers):
+        identifiers = json.loads(body)['identifiers']
+        found = [by_name[i['name'].lower()] for i in identifiers if i['name'].lower() in by_name]
+        missing = [i for i in identifiers if i['name'].lower() not in by_name]
+        return 200, {'object': 'list', 'not_found': missing, 'data': found}, {}
+    return handler
+
+
+ARCHIDEKT_COLUMNS = ['Quantity', 'Name', 'Finish', 'Condition', 'Date Added', 'Language',
+                     'Purchase Price', 'Tags', 'Edition Name', 'Edition Code',
+                     'Multiverse Id', 'Scryfall ID', 'Collector Number']
+
+
+def archidekt_export_route(rows, page_size=10000):
+    """
+    Serve the Archidekt collection export (CSV inside JSON, paged via the
+    request body) for *rows*, a list of dicts keyed by ``ARCHIDEKT_COLUMNS``.
+    """
+    def handler(query, body, headers):
+        page = json.loads(body or b'{}').get('page', 1)
+        chunk = rows[(page - 1) * page_size:page * page_size]
+        out = io.StringIO()
+        writer = csv.DictWriter(out, ARCHIDEKT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(chunk)
+        return 200, {'content': out.getvalue() if chunk else '',
+                     'moreContent': page * page_size < len(rows)}, {}
+    return handler
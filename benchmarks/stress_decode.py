@@ -0,0 +1,82 @@
+"""
+Stress test of the load pipeline: thousands of images already in the disk
+cache are decoded and scaled by the scheduler's workers, with increasing
+worker counts.  Every image must arrive exactly once, as a pixmap in
+``pixmap_cache``, with no errors; the GUI thread's longest stall and the
+number of delivery batches are reported next to the throughput.
+
+    python -m benchmarks.stress_decode [--images 3000] [--workers 1,2,4,8] [--batch 4]
+"""
+import argparse, os, shutil, sys, tempfile, time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from benchmarks.bench_cache_format import _photo
+from core.cache_manager import cache_manager_for
+from core.image_loader import ImageLoaderSignals, _write_bytes
+from core.load_scheduler import VISIBLE, LoadScheduler
+from core.pixmap_cache import pixmap_cache
+
+
+def fill_cache(cache_dir, count, width):
+    bodies = [_photo(width, i) for i in range(16)]
+    cache = cache_manager_for(cache_dir)
+    urls = []
+    for i in range(count):
+        url = f'https://cards.example/img/{i}.jpg'
+        data = bodies[i % len(bodies)]
+        cache.store(url, lambda tmp: _write_bytes(tmp, data), 'jpg')
+        urls.append(url)
+    return urls
+
+
+def run(app, urls, cache_dir, size, workers, batch):
+    pixmap_cache.clear()
+    scheduler = LoadScheduler(max_workers=workers, batch=batch)
+    signals = ImageLoaderSignals()
+    loaded, errors = [], []
+    signals.images_loaded.connect(loaded.extend)
+    signals.image_error.connect(lambda url, msg: errors.append((url, msg)))
+    start = time.perf_counter()
+    for url in urls:
+        scheduler.submit(url, cache_dir, size, signals, VISIBLE)
+    stall = 0.0
+    while len(loaded) + len(errors) < len(urls):
+        tick = time.perf_counter()
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 5)
+        stall = max(stall, time.perf_counter() - tick)
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    scheduler.wait_for_done()
+    assert not errors, errors[:3]
+    assert sorted(url for url, _ in loaded) == sorted(urls), 'every image delivered exactly once'
+    assert all(isinstance(pix, QtGui.QPixmap) and not pix.isNull() for _, pix in loaded)
+    assert all(pixmap_cache.peek(url, size) is not None for url in urls[-100:])
+    return elapsed, stall, signals.batches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', type=int, default=3000)
+    parser.add_argument('--width', type=int, default=146)
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--batch', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    cache_dir = tempfile.mkdtemp()
+    urls = fill_cache(cache_dir, args.images, args.width)
+    size = QtCore.QSize(120, 168)
+    print(f'{args.images} cached {args.width} px JPEGs scaled to {size.width()} px, '
+          f'{os.cpu_count()} CPUs, {args.batch} jobs per worker turn')
+    for workers in (int(w) for w in args.workers.split(',')):
+        elapsed, stall, batches = run(app, urls, cache_dir, size, workers, args.batch)
+        print(f'  {workers:2} workers  {args.images / elapsed:7.0f} images/s  '
+              f'longest GUI stall {stall * 1000:5.1f} ms  {batches} batches')
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Offline benchmark suite: the search, import, image loading and rendering
+paths measured against a local stand-in serving recorded (or synthetic)
+fixtures, with results written as JSON so runs can be compared between
+commits.
+
+    python -m benchmarks.suite [--latency 0.05] [--fixtures DIR] [--output results.json]
+    python -m benchmarks.suite --compare baseline.json [--tolerance 0.2]
+
+Benchmarks (``--only`` picks some):
+
+* ``search`` — ``ScryfallAPI.search`` latency and paging throughput;
+* ``filtered_search`` — ``filtered_search`` against an owned collection;
+* ``archidekt_import`` — streaming an export into a ``Collection``: time
+  and peak traced memory;
+* ``image_loading`` — cold and disk-cached thumbnail loads through the
+  ``LoadScheduler``, with the per-stage timings;
+* ``display_results`` — ``ScryfallGallery._display_results`` plus the
+  first layout and paint, for each of ``--cards``.
+
+Metric names end in their unit.  Those ending in ``_per_s`` are better
+higher, the other timings and sizes (``_s``, ``_ms``, ``_bytes``) better
+lower; counts are informational.  With ``--compare``, changes beyond the
+tolerance in the wrong direction are reported as regressions and the exit
+status is 1.
+"""
+import argparse, json, os, platform, statistics, subprocess, sys, tempfile, time, tracemalloc
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6 import QtCore, QtWidgets
+
+from benchmarks import fixtures as fixture_sets
+from benchmarks.check_responsiveness import run_until
+from benchmarks.stand_in import StandInServer
+from core import http_client, image_loader
+from core.collection import Collection, OwnedCard, parse_export
+from core.collection_index import CollectionIndex
+from core.http_client import HttpClient
+from core.image_loader import ImageLoaderSignals, stage_timings
+from core.load_scheduler import VISIBLE, LoadScheduler
+from core.pixmap_cache import pixmap_cache
+from core.scryfall_api import ScryfallAPI
+
+
+def _api(server):
+    api = ScryfallAPI(http=HttpClient(pool_size=ScryfallAPI.MAX_PAGE_WORKERS + 2))
+    api.BASE_URL = f'{server.url}/cards/search'
+    api.COLLECTION_URL = f'{server.url}/cards/collection'
+    api.ARCHIDEKT_BASE_URL = server.url
+    return api
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def bench_search(server, fixtures, args):
+    api = _api(server)
+    latencies = []
+    for _ in range(5):
+        latencies.append(_timed(lambda: api.search(fixtures.query, 1))[1])
+    pages, seconds = _timed(lambda: list(api.iter_search_pages(fixtures.query)))
+    cards = sum(len(page.get('data', [])) for page in pages)
+    return {
+        'search_p50_ms': statistics.median(latencies) * 1000,
+        'all_pages_s': seconds,
+        'pages': len(pages),
+        'cards': cards,
+        'cards_per_s': cards / seconds,
+    }
+
+
+def bench_filtered_search(server, fixtures, args):
+    api = _api(server)
+    owned = Collection()
+    for card in fixtures.cards[::3]:
+        owned.add(_owned(card))
+    index = CollectionIndex(owned)
+    before = server.request_count
+    matches, seconds = _timed(lambda: api.filtered_search(fixtures.query, index))
+    return {
+        'filtered_search_s': seconds,
+        'requests': server.request_count - before,
+        'owned': len(owned),
+        'matches': len(matches),
+    }
+
+
+def _owned(card):
+    return OwnedCard(card['name'], 1, 'Normal', 'NM', '', '', card.get('id', ''))
+
+
+def bench_archidekt_import(server, fixtures, args):
+    api = _api(server)
+
+    def run():
+        collection = Collection()
+        for text in api.iter_archidekt_pages(1):
+            collection.add_all(parse_export(text))
+        return collection
+
+    collection, seconds = _timed(run)
+    # Export pages are prepared up front, so the stand-in thread allocates
+    # little next to the importer while memory is traced.
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'import_s': seconds,
+        'rows_per_s': collection.rows / seconds if seconds else 0.0,
+        'peak_bytes': peak,
+        'rows': collection.rows,
+        'printings': len(collection),
+    }
+
+
+def bench_image_loading(server, fixtures, args):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    image_loader.configure(cache_format='original', defer_writes=True)
+    size = QtCore.QSize(146, 204)
+    cache_dir = tempfile.mkdtemp()
+    urls = [f'{server.url}/img?v=normal&i={i}' for i in range(args.images)]
+    results = {}
+    for run in ('cold', 'cached'):
+        pixmap_cache.clear()
+        stage_timings.reset()
+        scheduler = LoadScheduler(max_workers=6)
+        signals = ImageLoaderSignals()
+        remaining = set(urls)
+        signals.image_loaded.connect(lambda url, pix: remaining.discard(url))
+        signals.image_error.connect(lambda url, message: remaining.discard(url))
+        start = time.perf_counter()
+        for url in urls:
+            scheduler.submit(url, cache_dir, size, signals, VISIBLE)
+        run_until(app, lambda: not remaining, 120)
+        seconds = time.perf_counter() - start
+        scheduler.wait_for_done()
+        results[f'{run}_s'] = seconds
+        results[f'{run}_images_per_s'] = len(urls) / seconds
+        for stage, stats in stage_timings.snapshot().items():
+            results[f'{run}_{stage}_p50_ms'] = stats['p50_ms']
+            results[f'{run}_{stage}_p90_ms'] = stats['p90_ms']
+    return results
+
+
+def bench_display_results(server, fixtures, args):
+    from benchmarks.synthetic import make_cards
+    from ui.config import GalleryConfig
+    from ui.main_window import ScryfallGallery
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    GalleryConfig.COLLECTION_STORE_PATH = os.path.join(tempfile.mkdtemp(), 'collections.sqlite')
+    window = ScryfallGallery(tempfile.mkdtemp())
+    window.resize(1280, 900)
+    window.show()
+    results = {}
+    for count in args.cards:
+        cards = make_cards(count)
+        for i, card in enumerate(cards):
+            card['image_uris'] = {v: f'{server.url}/img?v={v}&layout={i}' for v in card['image_uris']}
+        samples = []
+        for _ in range(3):
+            start = time.perf_counter()
+            window._display_results(cards)
+            window.view.doItemsLayout()
+            window.view.viewport().repaint()
+            samples.append(time.perf_counter() - start)
+            window.scheduler.new_generation('gallery')
+            app.processEvents()
+        results[f'{count}_cards_ms'] = statistics.median(samples) * 1000
+    window.scheduler.new_generation('gallery')
+    window.scheduler.wait_for_done(30000)
+    window.close()
+    return results
+
+
+BENCHMARKS = {
+    'search': bench_search,
+    'filtered_search': bench_filtered_search,
+    'archidekt_import': bench_archidekt_import,
+    'image_loading': bench_image_loading,
+    'display_results': bench_display_results,
+}
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args, fixtures):
+    results = {}
+    with StandInServer(fixtures.routes(), args.latency) as server:
+        for name in args.only:
+            samples = [BENCHMARKS[name](server, fixtures, args) for _ in range(args.repeat)]
+            # Median of each metric over the repeats.
+            results[name] = {key: round(statistics.median(s[key] for s in samples), 3)
+                             for key in samples[0] if all(key in s for s in samples)}
+            print(f'{name}:')
+            for key, value in results[name].items():
+                print(f'  {key:28} {value}')
+    return {
+        'meta': {
+            'commit': _commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'qt': QtCore.QT_VERSION_STR,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'fixtures': fixtures.source,
+            'latency': args.latency,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+
+def lower_is_better(metric):
+    return not higher_is_better(metric) and metric.endswith(('_s', '_ms', '_bytes'))
+
+
+def compare(baseline, current, tolerance):
+    """Regressions of *current* against *baseline* as ``(benchmark, metric, old, new)``."""
+    regressions = []
+    for name, metrics in current['results'].items():
+        old_metrics = baseline.get('results', {}).get(name, {})
+        for metric, new in metrics.items():
+            old = old_metrics.get(metric)
+            if not old or not isinstance(old, (int, float)):
+                continue
+            change = (new - old) / old
+            if (higher_is_better(metric) and change < -tolerance
+                    or lower_is_better(metric) and change > tolerance):
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmark suite')
+    parser.add_argument('--latency', type=float, default=0.05, help='stand-in delay per request, seconds')
+    parser.add_argument('--fixtures', help='directory recorded with "python -m benchmarks.fixtures record"')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='comma-separated benchmarks to run')
+    parser.add_argument('--cards', default='175,1000,5000', help='card counts for display_results')
+    parser.add_argument('--images', type=int, default=120, help='thumbnails for image_loading')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative change counted as a regression')
+    args = parser.parse_args(argv)
+    args.only = [name.strip() for name in args.only.split(',') if name.strip()]
+    for name in args.only:
+        if name not in BENCHMARKS:
+            raise ValueError(f'Unknown benchmark "{name}"')
+    args.cards = [int(count) for count in args.cards.split(',')]
+
+    QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    http_client.configure(pool_size=8)
+    fixtures = fixture_sets.load(args.fixtures) if args.fixtures else fixture_sets.synthetic()
+    report = run(args, fixtures)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        print(f"Compared with {args.compare} (commit {baseline.get('meta', {}).get('commit')}): "
+              f'{len(regressions)} regressions beyond {args.tolerance:.0%}')
+        for name, metric, old, new in regressions:
+            print(f'  {name}.{metric}: {old} -> {new}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Deterministic synthetic Scryfall card objects for the benchmarks."""
+import random
+import uuid
+
+TYPES = ['Creature — Goblin Warrior', 'Creature — Elf Druid', 'Instant', 'Sorcery',
+         'Artifact', 'Enchantment — Aura', 'Legendary Creature — Human Wizard', 'Land']
+TEXTS = ['Draw a card.', 'Flying', 'Haste', 'Destroy target creature.', 'Add {G}.',
+         'Counter target spell.', 'Trample', 'When this enters, create a 1/1 token.']
+SETS = ['lea', 'm21', 'znr', 'neo', 'dmu', 'one', 'mom', 'woe']
+RARITIES = ['common', 'uncommon', 'rare', 'mythic']
+SYLLABLES = ['gor', 'ath', 'mir', 'val', 'zen', 'kor', 'ul', 'dra', 'fen', 'oth', 'ris', 'nak']
+
+
+def card_name(rng, i):
+    return ' '.join(
+        ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        for _ in range(rng.randint(1, 3))) + f' {i}'
+
+
+def make_cards(n, seed=1):
+    rng = random.Random(seed)
+    cards = []
+    for i in range(n):
+        card_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        colors = sorted(rng.sample('WUBRG', rng.choice([0, 1, 1, 1, 2, 3])))
+        image = f'https://cards.scryfall.io/{{size}}/front/{card_id[0]}/{card_id[1]}/{card_id}.jpg'
+        cards.append({
+            'object': 'card',
+            'id': card_id,
+            'oracle_id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'name': card_name(rng, i),
+            'type_line': rng.choice(TYPES),
+            'oracle_text': ' '.join(rng.sample(TEXTS, 2)),
+            'colors': colors,
+            'color_identity': colors,
+            'cmc': float(rng.randint(0, 8)),
+            'set': rng.choice(SETS),
+            'collector_number': str(rng.randint(1, 400)),
+            'rarity': rng.choice(RARITIES),
+            'image_uris': {
+                size: image.format(size=size).replace('.jpg', '.png' if size == 'png' else '.jpg')
+                for size in ('small', 'normal', 'large', 'png')
+            },
+        })
+    return cards
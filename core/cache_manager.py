@@ -0,0 +1,397 @@
+"""
+Manager for the on-disk image cache (``resources/cache``).
+
+Files are still named ``<sha1(url)>.<ext>``, but every write goes through a
+temporary file and ``os.replace`` so a crash never leaves a truncated
+image behind, and an SQLite index (``index.sqlite`` inside the cache
+directory) records size, source URL, last access and hit count.  Files
+keep the format they were stored in; ``transcode`` re-encodes them into a
+smaller one in the background, one file at a time while the app is idle.  The
+index also keeps a tiny preview of every downloaded image, which outlives
+the file itself so a placeholder can be painted before anything is read.  When the
+directory grows past its byte budget a background thread evicts files by
+LRU (or LFU) order down to 90 % of the budget.  Files whose size no longer
+matches the index, or that fail to decode, are dropped so they are fetched
+again.
+
+    python -m core.cache_manager report
+    python -m core.cache_manager prune --max-mb 500
+    python -m core.cache_manager verify
+    python -m core.cache_manager transcode --format webp --quality 85
+"""
+import argparse, hashlib, os, sqlite3, threading, time
+
+INDEX_NAME = 'index.sqlite'
+# Temporary files older than this (seconds) are left over from an
+# interrupted write; younger ones may belong to a write in progress.
+TMP_MAX_AGE = 300
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT PRIMARY KEY,
+    filename TEXT,
+    url TEXT,
+    size INTEGER,
+    created REAL,
+    last_access REAL,
+    hits INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_access ON files(last_access);
+CREATE TABLE IF NOT EXISTS transcode_skipped (
+    key TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS previews (
+    key TEXT PRIMARY KEY,
+    data BLOB
+);
+'''
+
+
+def cache_key(url):
+    return hashlib.sha1(url.encode()).hexdigest()
+
+
+class CacheManager:
+    POLICIES = ('lru', 'lfu')
+
+    def __init__(self, cache_dir, max_bytes=2 * 2**30, policy='lru'):
+        if policy not in self.POLICIES:
+            raise ValueError(f'Unknown eviction policy "{policy}"')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.evictions = 0
+        self.corrupt = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._evicting = False
+        # Access times are buffered and written in batches to keep lookups cheap.
+        self._pending_access = {}
+        self._db = sqlite3.connect(os.path.join(cache_dir, INDEX_NAME), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=OFF')  # the index can always be rebuilt by scan()
+        self._db.executescript(_SCHEMA)
+        if self._db.execute('SELECT COUNT(*) FROM files').fetchone()[0] == 0:
+            self.scan()
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM files').fetchone()[0]
+
+    def path_for(self, url, ext='webp'):
+        return os.path.join(self.cache_dir, f'{cache_key(url)}.{ext}')
+
+    def lookup(self, url):
+        """Return the cached file for *url*, or ``None`` if it is missing or damaged."""
+        key = cache_key(url)
+        with self._lock:
+            row = self._db.execute('SELECT filename, size FROM files WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            path = os.path.join(self.cache_dir, row[0])
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = None
+            if size != row[1]:
+                if size is not None:
+                    self.corrupt += 1  # truncated or overwritten behind our back
+                self._drop(key, path)
+                self.misses += 1
+                return None
+            self.hits += 1
+            hits = self._pending_access.get(key, (0, 0))[1]
+            self._pending_access[key] = (time.time(), hits + 1)
+            if len(self._pending_access) >= 64:
+                self._flush_access()
+        return path
+
+    def contains(self, url):
+        """True if *url* is indexed; unlike ``lookup`` this does not count as an access."""
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM files WHERE key = ?', (cache_key(url),)).fetchone() is not None
+
+    def store(self, url, writer, ext='webp'):
+        """
+        Atomically create the cache file for *url*.  *writer* receives a
+        temporary path and returns a truthy value once it has written it.
+        """
+        key = cache_key(url)
+        path = self.path_for(url, ext)
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            if not writer(tmp):
+                raise OSError(f'Could not write cache file for {url}')
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        size = os.path.getsize(path)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute('SELECT size, filename FROM files WHERE key = ?', (key,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, 0)',
+                             (key, os.path.basename(path), url, size, now, now))
+            self._db.commit()
+            self._size += size - (old[0] if old else 0)
+            if old and old[1] != os.path.basename(path):
+                self._remove_file(os.path.join(self.cache_dir, old[1]))  # stored in another format before
+            over_budget = self._size > self.max_bytes and not self._evicting
+            if over_budget:
+                self._evicting = True
+        if over_budget:
+            threading.Thread(target=self._evict_in_background, daemon=True).start()
+        return path
+
+    def put_preview(self, url, data):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO previews VALUES (?, ?)', (cache_key(url), data))
+            self._db.commit()
+
+    def previews(self, urls):
+        """Stored previews of *urls*, as ``{url: data}``; URLs without one are left out."""
+        by_key = {cache_key(url): url for url in urls}
+        found = {}
+        keys = list(by_key)
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                found.update(self._db.execute(
+                    f'SELECT key, data FROM previews WHERE key IN ({",".join("?" * len(chunk))})', chunk))
+        return {by_key[key]: data for key, data in found.items()}
+
+    def discard(self, url):
+        """Forget a file that turned out to be corrupt so the next load refetches it."""
+        key = cache_key(url)
+        with self._lock:
+            row = self._db.execute('SELECT filename FROM files WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self.corrupt += 1
+                self._drop(key, os.path.join(self.cache_dir, row[0]))
+
+    def _drop(self, key, path):
+        row = self._db.execute('SELECT size FROM files WHERE key = ?', (key,)).fetchone()
+        self._db.execute('DELETE FROM files WHERE key = ?', (key,))
+        self._db.commit()
+        self._pending_access.pop(key, None)
+        if row is not None:
+            self._size -= row[0]
+        self._remove_file(path)
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _flush_access(self):
+        if self._pending_access:
+            self._db.executemany(
+                'UPDATE files SET last_access = ?, hits = hits + ? WHERE key = ?',
+                [(when, hits, key) for key, (when, hits) in self._pending_access.items()])
+            self._db.commit()
+            self._pending_access.clear()
+
+    def flush(self):
+        with self._lock:
+            self._flush_access()
+
+    def _evict_in_background(self):
+        try:
+            self.evict()
+        finally:
+            with self._lock:
+                self._evicting = False
+
+    def evict(self, target=None):
+        """Delete files in policy order until the cache holds at most *target* bytes (default 90 % of the budget)."""
+        target = int(self.max_bytes * 0.9) if target is None else target
+        order = 'last_access' if self.policy == 'lru' else 'hits, last_access'
+        removed = 0
+        with self._lock:
+            self._flush_access()
+            if self._size <= target:
+                return 0
+            rows = self._db.execute(f'SELECT key, filename, size FROM files ORDER BY {order}').fetchall()
+        for key, filename, size in rows:
+            with self._lock:
+                if self._size <= target:
+                    break
+                self._drop(key, os.path.join(self.cache_dir, filename))
+                self.evictions += 1
+                removed += 1
+        return removed
+
+    def scan(self):
+        """Reconcile the index with the directory: adopt unindexed files, forget missing ones."""
+        now = time.time()
+        on_disk = {}
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file() or entry.name.startswith(INDEX_NAME):
+                continue
+            if entry.name.endswith('.tmp'):
+                if now - entry.stat().st_mtime > TMP_MAX_AGE:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:  # renamed into place meanwhile
+                        pass
+                continue
+            on_disk[entry.name.split('.', 1)[0]] = entry
+        with self._lock:
+            indexed = {k: f for k, f in self._db.execute('SELECT key, filename FROM files')}
+            for key in indexed.keys() - on_disk.keys():
+                self._db.execute('DELETE FROM files WHERE key = ?', (key,))
+            self._db.executemany(
+                'INSERT INTO files VALUES (?, ?, NULL, ?, ?, ?, 0)',
+                [(key, e.name, e.stat().st_size, e.stat().st_mtime, e.stat().st_atime or now)
+                 for key, e in on_disk.items() if key not in indexed])
+            self._db.commit()
+            self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM files').fetchone()[0]
+
+    def verify(self, decode=None):
+        """
+        Drop files whose size disagrees with the index or, when *decode* is
+        given (``decode(path) -> bool``), that fail to decode.  Returns the
+        number of files dropped.
+        """
+        with self._lock:
+            rows = self._db.execute('SELECT key, filename, size FROM files').fetchall()
+        bad = 0
+        for key, filename, size in rows:
+            path = os.path.join(self.cache_dir, filename)
+            ok = os.path.exists(path) and os.path.getsize(path) == size
+            if ok and decode is not None:
+                ok = decode(path)
+            if not ok:
+                bad += 1
+                with self._lock:
+                    self._drop(key, path)
+        self.corrupt += bad
+        return bad
+
+    def transcode(self, ext, convert, idle=None, stop=None, poll=0.2):
+        """
+        Re-encode cached files into format *ext* where that makes them
+        smaller.  *convert(src, dst)* writes the re-encoded file and
+        returns a truthy value.  Files are converted one at a time, each
+        only once *idle()* is true; *stop()* ends the pass early.  Files
+        that would not shrink are remembered and not tried again.
+        Returns ``(files converted, bytes saved)``.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT key, filename, size FROM files WHERE filename NOT LIKE ? '
+                'AND key NOT IN (SELECT key FROM transcode_skipped)', (f'%.{ext}',)).fetchall()
+        converted = saved = 0
+        for key, filename, size in rows:
+            while idle is not None and not idle():
+                if stop is not None and stop():
+                    return converted, saved
+                time.sleep(poll)
+            if stop is not None and stop():
+                break
+            src = os.path.join(self.cache_dir, filename)
+            dst = os.path.join(self.cache_dir, f'{key}.{ext}')
+            tmp = f'{dst}.transcode.tmp'
+            try:
+                ok = convert(src, tmp) and os.path.getsize(tmp) < size
+            except OSError:
+                ok = False
+            with self._lock:
+                current = self._db.execute('SELECT filename FROM files WHERE key = ?', (key,)).fetchone()
+                if not ok or current is None or current[0] != filename:
+                    self._remove_file(tmp)
+                    if not ok:
+                        self._db.execute('INSERT OR IGNORE INTO transcode_skipped VALUES (?)', (key,))
+                        self._db.commit()
+                    continue
+                new_size = os.path.getsize(tmp)
+                os.replace(tmp, dst)
+                self._db.execute('UPDATE files SET filename = ?, size = ? WHERE key = ?',
+                                 (os.path.basename(dst), new_size, key))
+                self._db.commit()
+                self._size += new_size - size
+                self._remove_file(src)
+            converted += 1
+            saved += size - new_size
+        return converted, saved
+
+    def report(self):
+        with self._lock:
+            self._flush_access()
+            files, oldest, unknown = self._db.execute(
+                'SELECT COUNT(*), MIN(last_access), SUM(url IS NULL) FROM files').fetchone()
+            previews = self._db.execute('SELECT COUNT(*) FROM previews').fetchone()[0]
+        return {
+            'directory': os.path.abspath(self.cache_dir),
+            'files': files,
+            'bytes': self._size,
+            'budget': self.max_bytes,
+            'policy': self.policy,
+            'oldest_access': oldest,
+            'files_without_url': unknown or 0,
+            'previews': previews,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'corrupt': self.corrupt,
+        }
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def cache_manager_for(cache_dir, **kwargs):
+    """The process-wide manager for *cache_dir*; *kwargs* only apply on first use."""
+    key = os.path.abspath(cache_dir)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = CacheManager(cache_dir, **kwargs)
+        return manager
+
+
+def _decodes(path):
+    from PyQt6 import QtGui
+    return not QtGui.QImage(path).isNull()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect and prune the image cache.')
+    parser.add_argument('--cache-dir', default='./resources/cache')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('report', help='show cache usage')
+    prune = sub.add_parser('prune', help='evict files down to a size budget')
+    prune.add_argument('--max-mb', type=float, required=True)
+    prune.add_argument('--policy', choices=CacheManager.POLICIES, default='lru')
+    sub.add_parser('verify', help='drop files that are truncated or do not decode')
+    transcode = sub.add_parser('transcode', help='re-encode cached files where that makes them smaller')
+    transcode.add_argument('--format', choices=('webp', 'png'), default='webp')
+    transcode.add_argument('--quality', type=int, default=85)
+    args = parser.parse_args(argv)
+
+    manager = CacheManager(args.cache_dir, policy=getattr(args, 'policy', 'lru'))
+    manager.scan()
+    if args.command == 'prune':
+        removed = manager.evict(int(args.max_mb * 2**20))
+        print(f'Removed {removed} files')
+    elif args.command == 'verify':
+        print(f'Dropped {manager.verify(decode=_decodes)} damaged files')
+    elif args.command == 'transcode':
+        from core.image_loader import transcode_file
+        converted, saved = manager.transcode(
+            args.format, lambda src, dst: transcode_file(src, dst, args.format, args.quality))
+        print(f'Transcoded {converted} files, saving {saved / 2**20:.1f} MB')
+    for key, value in manager.report().items():
+        print(f'{key:18} {value}')
+    manager.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Offline card index built from a Scryfall bulk-data dump.
+
+The dump (``oracle_cards`` / ``default_cards`` JSON, optionally gzipped) is
+streamed object by object into a SQLite database.  Card JSON is stored
+zlib-compressed next to a handful of lower-cased / bit-packed columns that
+the query evaluator in ``core.scryfall_query`` filters on.
+
+    python -m core.card_index build oracle-cards.json
+    python -m core.card_index query "t:goblin c:r cmc<=2"
+"""
+import argparse, gzip, json, os, sqlite3, threading, time, zlib
+
+from core.scryfall_query import card_fields, to_sql
+
+PAGE_SIZE = 175
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cards (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT UNIQUE,
+    oracle_key TEXT,
+    name_lc TEXT, type_line_lc TEXT, oracle_text_lc TEXT,
+    colors INTEGER, color_identity INTEGER,
+    cmc REAL, set_code TEXT, rarity INTEGER,
+    data BLOB
+);
+CREATE INDEX IF NOT EXISTS cards_name ON cards(name_lc);
+CREATE INDEX IF NOT EXISTS cards_set ON cards(set_code);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, card_id TEXT);
+'''
+
+
+def iter_bulk_cards(path, chunk_size=1 << 20):
+    """Yield card dicts from a bulk-data JSON array without loading the whole file."""
+    opener = gzip.open if path.endswith('.gz') else open
+    decoder = json.JSONDecoder()
+    with opener(path, 'rt', encoding='utf-8') as f:
+        buf, pos, started = '', 0, False
+        while True:
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                    pos += 1
+                if not started and pos < len(buf):
+                    if buf[pos] != '[':
+                        raise ValueError('Bulk data file must contain a JSON array')
+                    started = True
+                    pos += 1
+                    continue
+                if pos >= len(buf) or buf[pos] == ']':
+                    break
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break  # object continues in the next chunk
+                pos = end
+                yield obj
+            if not chunk:
+                return
+
+
+def _card_row(card):
+    f = card_fields(card)
+    return (
+        card.get('id'), card.get('oracle_id') or card.get('id'),
+        f['name'], f['type_line'], f['oracle_text'], f['colors'], f['color_identity'],
+        f['cmc'], f['set_code'], f['rarity'],
+        zlib.compress(json.dumps(card, separators=(',', ':')).encode()),
+    )
+
+
+class CardIndex:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM cards').fetchone()[0]
+
+    def add_cards(self, cards, batch_size=2000):
+        """Insert (or replace) *cards*; returns the number written."""
+        with self._lock:
+            return self._write(cards, batch_size)
+
+    def _write(self, cards, batch_size, replace=False):
+        # One transaction: a failure part-way (e.g. a truncated bulk file)
+        # leaves the index as it was.
+        try:
+            if replace:
+                self._db.execute('DELETE FROM cards')
+            count, batch = 0, []
+            for card in cards:
+                if card.get('object', 'card') != 'card':
+                    continue
+                batch.append(_card_row(card))
+                if len(batch) >= batch_size:
+                    count += self._insert(batch)
+                    batch = []
+            count += self._insert(batch)
+            # oracle_cards dumps hold one printing per oracle id, which lets
+            # search() skip the GROUP BY that default_cards dumps need.
+            unique = self._db.execute(
+                'SELECT COUNT(*) = COUNT(DISTINCT oracle_key) FROM cards').fetchone()[0]
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('unique_oracles', ?)", (unique,))
+            self._db.commit()
+        except BaseException:
+            self._db.rollback()
+            raise
+        return count
+
+    def _insert(self, rows):
+        self._db.executemany(
+            'INSERT OR REPLACE INTO cards (id, oracle_key, name_lc, type_line_lc, oracle_text_lc, '
+            'colors, color_identity, cmc, set_code, rarity, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def build_from_bulk(self, path):
+        """Replace the cards with those of a bulk-data file, or keep them if it cannot be read."""
+        with self._lock:
+            return self._write(iter_bulk_cards(path), 2000, replace=True)
+
+    def add_aliases(self, pairs):
+        """Record ``(name, card_id)`` pairs; a ``None`` id marks a name known not to exist."""
+        with self._lock:
+            self._db.executemany('INSERT OR REPLACE INTO aliases VALUES (?, ?)',
+                                 [(name.lower(), card_id) for name, card_id in pairs])
+            self._db.commit()
+
+    def lookup_names(self, names):
+        """
+        Map each of *names* that the index knows about to its card dict, or to
+        ``None`` when it was recorded as not existing.  Unknown names are omitted.
+        """
+        by_lower = {}
+        for name in names:
+            by_lower.setdefault(name.lower(), []).append(name)
+        keys, found = list(by_lower), {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ','.join('?' * len(chunk))
+                rows = self._db.execute(
+                    f'SELECT a.alias, c.data FROM aliases a LEFT JOIN cards c ON c.id = a.card_id '
+                    f'WHERE a.alias IN ({marks}) '
+                    f'UNION ALL SELECT name_lc, data FROM cards WHERE name_lc IN ({marks})',
+                    chunk + chunk).fetchall()
+                for key, data in rows:
+                    if data is not None or key not in found:
+                        found[key] = data
+        return {name: json.loads(zlib.decompress(data)) if data is not None else None
+                for key, data in found.items() for name in by_lower[key]}
+
+    def search(self, query, page=1):
+        """Answer *query* like the ``cards/search`` endpoint: one card per oracle id, by name."""
+        where, args = to_sql(query)
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'unique_oracles'").fetchone()
+            if row and row[0]:
+                first = f'SELECT rowid FROM cards WHERE {where}'
+            else:
+                first = f'SELECT MIN(rowid) FROM cards WHERE {where} GROUP BY oracle_key'
+            total = self._db.execute(f'SELECT COUNT(*) FROM ({first})', args).fetchone()[0]
+            rows = self._db.execute(
+                f'SELECT data FROM cards WHERE rowid IN ({first}) '
+                'ORDER BY name_lc, rowid LIMIT ? OFFSET ?',
+                args + [PAGE_SIZE, (page - 1) * PAGE_SIZE]).fetchall()
+        return {
+            'object': 'list',
+            'total_cards': total,
+            'has_more': page * PAGE_SIZE < total,
+            'data': [json.loads(zlib.decompress(r[0])) for r in rows],
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or query the offline Scryfall card index.')
+    parser.add_argument('--index', default='./resources/cards.sqlite')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='import a Scryfall bulk-data JSON file')
+    build.add_argument('bulk_file')
+    query = sub.add_parser('query', help='run a search against the index')
+    query.add_argument('query')
+    query.add_argument('--page', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    index = CardIndex(args.index)
+    start = time.perf_counter()
+    if args.command == 'build':
+        count = index.build_from_bulk(args.bulk_file)
+        print(f'Indexed {count} cards in {time.perf_counter() - start:.1f}s')
+    else:
+        data = index.search(args.query, args.page)
+        for card in data['data']:
+            print(card.get('name'))
+        print(f"{data['total_cards']} cards ({(time.perf_counter() - start) * 1000:.1f} ms)")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""
+Compact in-memory representation of an owned card collection.
+
+Archidekt exports (and CSV files saved from them) are parsed row by row
+into ``OwnedCard`` records that keep only the columns the gallery uses.
+Rows for the same printing and finish — e.g. split by condition or added
+on different days — are merged into one record with the summed quantity.
+
+``CollectionStore`` persists collections in SQLite so a collection does
+not have to be downloaded or parsed again to be used; ``sync_archidekt``
+and ``load_csv`` only process what changed since the stored copy.
+"""
+import csv, hashlib, io, os, sqlite3, threading, time
+from operator import itemgetter
+
+# Column headers seen in Archidekt CSV exports (and the export API's field
+# names), lower-cased, mapped to OwnedCard attributes.
+COLUMNS = {
+    'quantity': 'quantity', 'qty': 'quantity', 'count': 'quantity',
+    'name': 'name', 'card__oraclecard__name': 'name', 'card name': 'name',
+    'finish': 'finish', 'modifier': 'finish', 'foil': 'finish',
+    'condition': 'condition',
+    'date added': 'added', 'createdat': 'added', 'added': 'added',
+    'edition code': 'edition_code', 'card__edition__editioncode': 'edition_code', 'set code': 'edition_code',
+    'collector number': 'collector_number', 'card__collectornumber': 'collector_number',
+    'scryfall id': 'scryfall_id', 'card__uid': 'scryfall_id', 'scryfall_id': 'scryfall_id',
+}
+
+
+class OwnedCard:
+    __slots__ = ('name', 'quantity', 'finish', 'condition', 'edition_code',
+                 'collector_number', 'scryfall_id', 'added')
+
+    def __init__(self, name, quantity=1, finish='', condition='', edition_code='',
+                 collector_number='', scryfall_id='', added=''):
+        self.name = name
+        self.quantity = quantity
+        self.finish = finish
+        self.condition = condition
+        self.edition_code = edition_code
+        self.collector_number = collector_number
+        self.scryfall_id = scryfall_id
+        self.added = added
+
+    @property
+    def key(self):
+        """Identifies the printing and finish; duplicate rows share it."""
+        printing = self.scryfall_id or f'{self.name}|{self.edition_code}|{self.collector_number}'
+        return f'{printing}|{self.finish}'
+
+    def __repr__(self):
+        return f'OwnedCard({self.name!r}, quantity={self.quantity}, edition_code={self.edition_code!r})'
+
+
+def iter_owned_cards(lines):
+    """
+    Parse an Archidekt CSV export from *lines* (a file object or any
+    iterable of lines) into ``OwnedCard`` records, one row at a time.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = {}
+    for i, title in enumerate(header):
+        attr = COLUMNS.get(title.strip().lower())
+        if attr is not None:
+            positions.setdefault(attr, i)
+    if 'name' not in positions:
+        raise ValueError('CSV has no card name column')
+    # Columns the export lacks read an empty cell appended to every row.
+    blank = len(header)
+    pick = itemgetter(*(positions.get(attr, blank) for attr in OwnedCard.__slots__))
+    for row in reader:
+        if len(row) != blank:
+            row = (row + [''] * blank)[:blank]
+        row.append('')
+        name, quantity, *rest = pick(row)
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            quantity = int(quantity) if quantity else 1
+        except ValueError:
+            quantity = 1
+        yield OwnedCard(name, quantity, *rest)
+
+
+def parse_export(csv_text):
+    return iter_owned_cards(io.StringIO(csv_text))
+
+
+class Collection:
+    """Owned cards keyed by printing, with duplicate rows merged."""
+
+    def __init__(self, cards=()):
+        self._cards = {}
+        self.rows = 0
+        self.add_all(cards)
+
+    def add(self, card, key=None):
+        self.rows += 1
+        if key is None:
+            key = card.key
+        existing = self._cards.get(key)
+        if existing is None:
+            self._cards[key] = card
+        else:
+            existing.quantity += card.quantity
+
+    def add_all(self, cards):
+        for card in cards:
+            self.add(card)
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __iter__(self):
+        return iter(self._cards.values())
+
+    def names(self):
+        return {card.name for card in self._cards.values()}
+
+    @property
+    def total_quantity(self):
+        return sum(card.quantity for card in self._cards.values())
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return Collection(iter_owned_cards(f))
+
+
+SCHEMA_VERSION = 2
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS collections (
+    source TEXT PRIMARY KEY,
+    rows INTEGER,
+    updated REAL,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    source TEXT,
+    page INTEGER,
+    hash TEXT,
+    rows INTEGER,
+    PRIMARY KEY (source, page)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS owned (
+    source TEXT,
+    page INTEGER,
+    key TEXT,
+    name TEXT,
+    quantity INTEGER,
+    finish TEXT,
+    condition TEXT,
+    edition_code TEXT,
+    collector_number TEXT,
+    scryfall_id TEXT,
+    added TEXT,
+    PRIMARY KEY (source, page, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+_FIELDS = OwnedCard.__slots__
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode() if isinstance(text, str) else text).hexdigest()
+
+
+class CollectionStore:
+    """
+    SQLite store of collections keyed by *source*, e.g.
+    ``archidekt:550191`` or ``csv:/path/to/file.csv``.
+
+    Rows are kept per export page together with a hash of the page's text,
+    so a re-sync only has to parse and write the pages that changed.  A
+    *fingerprint* per source (the CSV file's mtime, size and hash) lets an
+    unchanged file be recognised without reading it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if self._db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            # Older layouts only hold data that can be synced again.
+            self._db.executescript('DROP TABLE IF EXISTS owned; DROP TABLE IF EXISTS pages; '
+                                   'DROP TABLE IF EXISTS collections;')
+            self._db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self._db.executescript(_SCHEMA)
+
+    def page_hashes(self, source):
+        with self._lock:
+            return dict(self._db.execute('SELECT page, hash FROM pages WHERE source = ?', (source,)))
+
+    def save_page(self, source, page, digest, collection):
+        """Replace the rows of one export *page*; *collection* holds that page's records."""
+        with self._lock:
+            self._db.execute('DELETE FROM owned WHERE source = ? AND page = ?', (source, page))
+            self._db.executemany(
+                f'INSERT INTO owned VALUES (?, ?, ?, {", ".join("?" * len(_FIELDS))})',
+                ((source, page, card.key, *(getattr(card, f) for f in _FIELDS)) for card in collection))
+            self._db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)',
+                             (source, page, digest, collection.rows))
+            self._db.commit()
+
+    def finish_sync(self, source, pages, fingerprint=None):
+        """Record a completed sync of *pages* pages; pages beyond them no longer exist."""
+        with self._lock:
+            self._db.execute('DELETE FROM owned WHERE source = ? AND page > ?', (source, pages))
+            self._db.execute('DELETE FROM pages WHERE source = ? AND page > ?', (source, pages))
+            rows = self._db.execute('SELECT COALESCE(SUM(rows), 0) FROM pages WHERE source = ?',
+                                    (source,)).fetchone()[0]
+            self._db.execute('INSERT OR REPLACE INTO collections VALUES (?, ?, ?, ?)',
+                             (source, rows, time.time(), fingerprint))
+            self._db.commit()
+
+    def save(self, source, collection, fingerprint=None):
+        """Store *collection* as the single page of *source*."""
+        self.save_page(source, 1, fingerprint or '', collection)
+        self.finish_sync(source, 1, fingerprint)
+
+    def fingerprint(self, source):
+        with self._lock:
+            row = self._db.execute('SELECT fingerprint FROM collections WHERE source = ?', (source,)).fetchone()
+        return row[0] if row else None
+
+    def set_fingerprint(self, source, fingerprint):
+        with self._lock:
+            self._db.execute('UPDATE collections SET fingerprint = ? WHERE source = ?', (fingerprint, source))
+            self._db.commit()
+
+    def load(self, source):
+        """The stored collection for *source*, or ``None`` if it was never synced."""
+        with self._lock:
+            row = self._db.execute('SELECT rows FROM collections WHERE source = ?', (source,)).fetchone()
+            if row is None:
+                return None
+            cursor = self._db.execute(
+                f'SELECT key, {", ".join(_FIELDS)} FROM owned WHERE source = ? ORDER BY page', (source,))
+            collection = Collection()
+            for key, *values in cursor:
+                collection.add(OwnedCard(*values), key)
+        collection.rows = row[0]
+        return collection
+
+    @property
+    def last_source(self):
+        """The collection loaded most recently, to be restored at startup."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'last_source'").fetchone()
+        return row[0] if row else None
+
+    @last_source.setter
+    def last_source(self, source):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('last_source', ?)", (source,))
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def sync_archidekt(api, store, collection_id, cancelled=None, progress=None):
+    """
+    Bring the stored copy of an Archidekt collection up to date.  Every
+    export page is downloaded, but only pages whose text changed since the
+    last sync are parsed and written.  Returns ``(collection, pages,
+    changed_pages)``, or ``None`` when *cancelled* stopped the sync.
+    *progress* is called with ``(pages_done, changed_pages)``.
+    """
+    source = f'archidekt:{collection_id}'
+    known = store.page_hashes(source)
+    pages = changed = 0
+    for pages, text in enumerate(api.iter_archidekt_pages(collection_id, cancelled), 1):
+        digest = content_hash(text)
+        if known.get(pages) != digest:
+            store.save_page(source, pages, digest, Collection(parse_export(text)))
+            changed += 1
+        if progress is not None:
+            progress(pages, changed)
+    if cancelled is not None and cancelled():
+        return None
+    if pages < len(known):
+        changed += 1  # trailing pages were removed
+    store.finish_sync(source, pages)
+    store.last_source = source
+    return store.load(source), pages, changed
+
+
+def load_csv(store, path):
+    """
+    The collection in the CSV file at *path*, re-parsed only when the file
+    changed since it was last stored.  Returns ``(collection, changed)``.
+    """
+    source = f'csv:{os.path.abspath(path)}'
+    stat = os.stat(path)
+    quick = f'{stat.st_mtime_ns}:{stat.st_size}'
+    stored = store.fingerprint(source)
+    if stored is not None and stored.startswith(quick + ':'):
+        store.last_source = source
+        return store.load(source), False
+    with open(path, 'rb') as f:
+        digest = hashlib.file_digest(f, 'sha1').hexdigest()
+    if stored is not None and stored.endswith(':' + digest):
+        # Touched but not modified.
+        store.set_fingerprint(source, f'{quick}:{digest}')
+        store.last_source = source
+        return store.load(source), False
+    collection = read_csv(path)
+    store.save(source, collection, f'{quick}:{digest}')
+    store.last_source = source
+    return collection, True
@@ -0,0 +1,145 @@
+"""
+Lookups from Scryfall card objects to what the collection owns.
+
+Owned records carry a name as Archidekt writes it (often only the front
+face of a double-faced or split card), usually a Scryfall ID and a set /
+collector number, but no oracle ID.  ``CollectionIndex`` keys them every
+way a search result can be matched:
+
+* Scryfall ID and ``(set, collector number)`` find the exact printing;
+* the normalised name finds the card regardless of printing; an ``A // B``
+  name also answers to its front face ``A``, and a result named ``A // B``
+  falls back to ``A``;
+* oracle IDs are learned from results matched by printing or name, so a
+  printing whose name is spelled differently still finds its card.
+
+Every lookup is a dict access, so ``join`` is linear in the number of
+results and independent of the collection's size.
+"""
+import unicodedata
+
+
+def normalize_name(name):
+    """Lower-cased, accent-free, whitespace-collapsed *name*."""
+    if not name.isascii():
+        name = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+    return ' '.join(name.casefold().split())
+
+
+def front_face(name):
+    """The normalised front face of an ``A // B`` name, or ``None``."""
+    if '//' not in name:
+        return None
+    return normalize_name(name.split('//', 1)[0])
+
+
+class _Owned:
+    """Quantities owned of one card (all printings of one name)."""
+    __slots__ = ('name', 'quantity', 'printings')
+
+    def __init__(self, name):
+        self.name = name
+        self.quantity = 0
+        self.printings = 0
+
+
+class CollectionIndex:
+    """
+    Index of a ``core.collection.Collection`` for matching search results.
+
+    ``owned(card)`` returns ``(owned_quantity, printing_quantity)`` for a
+    Scryfall card object: copies of the card in any printing, and copies of
+    this exact printing.
+    """
+
+    def __init__(self, collection=()):
+        self._by_name = {}      # normalised name or face alias -> _Owned
+        self._by_oracle = {}    # oracle_id -> _Owned, learned while matching
+        self._by_printing = {}  # scryfall id or (set, collector number) -> [_Owned, quantity]
+        self._names = set()
+        for card in collection:
+            self.add(card)
+
+    @classmethod
+    def from_names(cls, names):
+        """An index of one copy of each name, for callers that only have names."""
+        index = cls()
+        for name in names:
+            index._group(name).quantity += 1
+        return index
+
+    def _group(self, name):
+        key = normalize_name(name)
+        owned = self._by_name.get(key)
+        if owned is None:
+            owned = self._by_name[key] = _Owned(name)
+            self._names.add(name)
+            # A face alias never replaces a card's own full name.
+            face = front_face(name)
+            if face:
+                self._by_name.setdefault(face, owned)
+        return owned
+
+    def add(self, card):
+        """Add an ``OwnedCard`` record."""
+        owned = self._group(card.name)
+        owned.quantity += card.quantity
+        owned.printings += 1
+        keys = [card.scryfall_id] if card.scryfall_id else []
+        if card.edition_code and card.collector_number:
+            keys.append((card.edition_code.lower(), card.collector_number))
+        for key in keys:
+            entry = self._by_printing.get(key)
+            if entry is None:
+                self._by_printing[key] = [owned, card.quantity]
+            else:
+                entry[1] += card.quantity
+
+    def __len__(self):
+        return len(self._names)
+
+    def names(self):
+        """The owned card names as the collection spells them."""
+        return self._names
+
+    def _find(self, card):
+        # Exact printing first, then the card's oracle identity, then names.
+        printing = self._by_printing.get(card.get('id'))
+        if printing is None and card.get('collector_number'):
+            printing = self._by_printing.get((card.get('set', ''), card['collector_number']))
+        if printing is not None:
+            return printing[0], printing[1]
+        oracle_id = card.get('oracle_id')
+        owned = self._by_oracle.get(oracle_id) if oracle_id else None
+        if owned is None:
+            name = card.get('name', '')
+            owned = self._by_name.get(normalize_name(name))
+            if owned is None and '//' in name:
+                owned = self._by_name.get(front_face(name))
+        return owned, 0
+
+    def owned(self, card):
+        owned, printing = self._find(card)
+        if owned is None:
+            return 0, 0
+        oracle_id = card.get('oracle_id')
+        if oracle_id:
+            self._by_oracle.setdefault(oracle_id, owned)
+        return owned.quantity, printing
+
+    def owned_quantity(self, card):
+        return self.owned(card)[0]
+
+    def join(self, cards):
+        """
+        The owned cards among *cards*, each annotated in place with
+        ``owned_quantity`` and ``owned_printing_quantity``.
+        """
+        matches = []
+        for card in cards:
+            quantity, printing = self.owned(card)
+            if quantity:
+                card['owned_quantity'] = quantity
+                card['owned_printing_quantity'] = printing
+                matches.append(card)
+        return matches
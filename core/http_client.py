@@ -0,0 +1,149 @@
+"""
+Shared HTTP client for every network call the application makes.
+
+One keep-alive ``requests.Session`` with a connection pool sized to the
+worker count, per-host token-bucket rate limits, retries with jittered
+exponential backoff (honouring ``Retry-After``) and default timeouts.
+``get_client().stats.snapshot()`` reports request / retry / byte counters and
+latency percentiles.
+"""
+import email.utils, random, threading, time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.instrumentation import tracer
+from core.rate_limiter import RateLimiter
+
+# Scryfall asks clients to stay at or below 10 requests per second on the
+# API host; image hosts (cards.scryfall.io) are not rate limited.
+HOST_RATES = {'api.scryfall.com': 10}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpStats:
+    def __init__(self, window=2000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.bytes = 0
+
+    def record(self, seconds, size):
+        with self._lock:
+            self.requests += 1
+            self.bytes += size
+            self._latencies.append(seconds * 1000)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {'requests': self.requests, 'retries': self.retries,
+                     'errors': self.errors, 'bytes': self.bytes}
+        for p in (50, 90, 99):
+            stats[f'p{p}_ms'] = latencies[min(len(latencies) - 1, len(latencies) * p // 100)] if latencies else 0.0
+        return stats
+
+
+class HttpClient:
+    def __init__(self, pool_size=10, timeout=(5, 30), max_retries=4, backoff=0.5,
+                 max_backoff=30, host_rates=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = HttpStats()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._limiters = {host: RateLimiter(rate) for host, rate in (host_rates or HOST_RATES).items()}
+
+    def set_rate(self, host, rate):
+        self._limiters[host] = RateLimiter(rate)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, retrying connection errors, timeouts, 429 and 5xx
+        responses.  The final response is returned as-is (call
+        ``raise_for_status()``); the final connection error is re-raised.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        limiter = self._limiters.get(urlsplit(url).hostname)
+        attempt = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            start = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.stats.record_error()
+                if attempt >= self.max_retries:
+                    raise
+                delay = None
+            else:
+                self.stats.record(time.perf_counter() - start, len(resp.content))
+                if tracer.enabled:
+                    tracer.complete(f'{method} {urlsplit(url).hostname}', 'http', start, time.perf_counter() - start,
+                                    {'status': resp.status_code, 'bytes': len(resp.content), 'attempt': attempt})
+                if resp.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return resp
+                delay = self._retry_after(resp)
+            self.stats.record_retry()
+            time.sleep(delay if delay is not None else self._backoff_delay(attempt))
+            attempt += 1
+
+    def _backoff_delay(self, attempt):
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def _retry_after(self, resp):
+        value = resp.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return min(self.max_backoff, max(0.0, float(value)))
+        except ValueError:
+            pass
+        try:
+            when = email.utils.parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+        return min(self.max_backoff, max(0.0, when - time.time()))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def configure(**kwargs):
+    """Replace the shared client, e.g. ``configure(pool_size=pool.maxThreadCount())``."""
+    global _client
+    with _client_lock:
+        _client = HttpClient(**kwargs)
+    return _client
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -1,9 +1,287 @@
-import hashlib, os, requests
+"""
+Loading card images: from the disk cache, or downloaded and then stored.
+
+How downloads are kept on disk is configurable (``configure``):
+``'original'`` writes the downloaded bytes untouched, ``'webp'`` and
+``'png'`` re-encode the decoded image (WebP at *quality*, lossy).  By
+default the cache file is written after the thumbnail has been handed
+out rather than before.  The time spent in each stage (download, decode,
+encode — writing the cache file, including any re-encoding — and scale)
+is recorded in ``stage_timings``, and as trace spans while
+``core.instrumentation`` records.
+
+Workers only ever handle ``QImage``; ``QPixmap`` is not safe to use
+outside the GUI thread.  They hand finished thumbnails to
+``ImageLoaderSignals.deliver``, which converts them to pixmaps on the GUI
+thread once per frame and reports them in one batch.
+"""
+import threading, time
+from collections import deque
+
 from PyQt6 import QtCore, QtGui
 
+from core.cache_manager import cache_manager_for
+from core.http_client import get_client
+from core.instrumentation import traced, tracer
+from core.pixmap_cache import pixmap_cache
+
+CACHE_FORMATS = ('original', 'webp', 'png')
+_settings = {'format': 'original', 'quality': 85, 'defer_writes': True}
+
+
+def configure(cache_format=None, quality=None, defer_writes=None):
+    if cache_format is not None:
+        if cache_format not in CACHE_FORMATS:
+            raise ValueError(f'Unknown cache format "{cache_format}"')
+        _settings['format'] = cache_format
+    if quality is not None:
+        _settings['quality'] = quality
+    if defer_writes is not None:
+        _settings['defer_writes'] = defer_writes
+    return dict(_settings)
+
+
+class StageTimings:
+    STAGES = ('download', 'decode', 'encode', 'scale')
+
+    def __init__(self, window=2000):
+        self._lock = threading.Lock()
+        self._samples = {stage: deque(maxlen=window) for stage in self.STAGES}
+        self._totals = dict.fromkeys(self.STAGES, 0.0)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._samples[stage].append(seconds * 1000)
+            self._totals[stage] += seconds * 1000
+        if tracer.enabled:
+            tracer.complete(f'image.{stage}', 'image', time.perf_counter() - seconds, seconds)
+
+    def snapshot(self):
+        stats = {}
+        with self._lock:
+            for stage, samples in self._samples.items():
+                ordered = sorted(samples)
+                if ordered:
+                    stats[stage] = {
+                        'count': len(ordered),
+                        'total_ms': round(self._totals[stage], 1),
+                        'p50_ms': round(ordered[len(ordered) // 2], 2),
+                        'p90_ms': round(ordered[len(ordered) * 9 // 10], 2),
+                    }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            for stage in self.STAGES:
+                self._samples[stage].clear()
+                self._totals[stage] = 0.0
+
+
+stage_timings = StageTimings()
+
+
 class ImageLoaderSignals(QtCore.QObject):
+    """
+    Where loaded thumbnails are reported; create it on the GUI thread.
+
+    Workers call ``deliver`` with scaled ``QImage``s.  Everything delivered
+    within one frame is converted to ``QPixmap`` together, put into
+    ``pixmap_cache`` and reported as a single ``images_loaded`` batch of
+    ``(url, pixmap)`` pairs, followed by one ``image_loaded`` per image for
+    listeners that want them individually.
+    """
+    FRAME_MS = 16
+
     image_loaded = QtCore.pyqtSignal(str, QtGui.QPixmap)
+    images_loaded = QtCore.pyqtSignal(list)
     image_error = QtCore.pyqtSignal(str, str)
+    _delivered = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pending = {}  # (url, width, height) -> (url, size, QImage)
+        self.batches = 0
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FRAME_MS)
+        self._timer.timeout.connect(self.flush)
+        self._delivered.connect(self._schedule)
+
+    def deliver(self, url, size, image):
+        """Report *image*, *url* scaled to *size*; callable from any thread."""
+        with self._lock:
+            first = not self._pending
+            self._pending[url, size.width(), size.height()] = (url, size, image)
+        if first:
+            self._delivered.emit()
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @traced('image.flush', 'ui')
+    def flush(self):
+        """Convert and report everything delivered so far (GUI thread only)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        batch = []
+        for url, size, image in pending.values():
+            # Another listener may have converted the same thumbnail this frame.
+            pix = pixmap_cache.peek(url, size)
+            if pix is None:
+                pix = QtGui.QPixmap.fromImage(image)
+                pixmap_cache.put(url, size, pix)
+            batch.append((url, pix))
+        self.batches += 1
+        self.images_loaded.emit(batch)
+        for url, pix in batch:
+            self.image_loaded.emit(url, pix)
+
+
+def fetch_source(url, cache_dir):
+    """
+    Full-size image of *url* as ``(QImage, store)``.  *store* is ``None``
+    when the image came from the disk cache; otherwise it writes the cache
+    file and must be called (``run_store``) once the caller has used the
+    image.
+    """
+    cache = cache_manager_for(cache_dir)
+    path = cache.lookup(url)
+    tracer.count('disk_cache.hits' if path is not None else 'disk_cache.misses')
+    if path is not None:
+        start = time.perf_counter()
+        image = QtGui.QImage(path)
+        stage_timings.record('decode', time.perf_counter() - start)
+        if not image.isNull():
+            return image, None
+        cache.discard(url)  # corrupt file: fall through and refetch
+    image, data = _download(url)
+    store = lambda: _store(cache, url, image, data)
+    if not _settings['defer_writes']:
+        store()
+        store = None
+    return image, store
+
+
+def run_store(store):
+    """Call a *store* returned by ``fetch_source``, if any; a failed write only leaves the image uncached."""
+    if store is None:
+        return
+    try:
+        store()
+    except Exception:
+        pass  # not cached; the next load downloads it again
+
+
+def _download(url):
+    start = time.perf_counter()
+    resp = get_client().get(url)
+    resp.raise_for_status()
+    data = resp.content
+    decoding = time.perf_counter()
+    stage_timings.record('download', decoding - start)
+    image = QtGui.QImage()
+    if not image.loadFromData(data):
+        raise ValueError('Could not decode image')
+    stage_timings.record('decode', time.perf_counter() - decoding)
+    return image, data
+
+
+def _sniff_ext(data):
+    if data.startswith(b'\xff\xd8'):
+        return 'jpg'
+    if data.startswith(b'\x89PNG'):
+        return 'png'
+    if data[8:12] == b'WEBP':
+        return 'webp'
+    return 'img'
+
+
+def _write_bytes(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def _store(cache, url, image, data):
+    start = time.perf_counter()
+    cache_format = _settings['format']
+    if cache_format == 'original':
+        cache.store(url, lambda tmp: _write_bytes(tmp, data), _sniff_ext(data))
+    else:
+        quality = _settings['quality']
+        cache.store(url, lambda tmp: image.save(tmp, cache_format.upper(), quality), cache_format)
+    cache.put_preview(url, make_preview(image))
+    stage_timings.record('encode', time.perf_counter() - start)
+
+
+def transcode_file(src, dst, cache_format='webp', quality=85):
+    """Re-encode the image file *src* into *dst*; for ``CacheManager.transcode``."""
+    image = QtGui.QImage(src)
+    return not image.isNull() and image.save(dst, cache_format.upper(), quality)
+
+
+# Width and height, in pixels, of the previews kept in the cache index.
+PREVIEW_SIZE = (5, 7)
+_PREVIEW_FORMAT = QtGui.QImage.Format.Format_RGB888
+
+
+def make_preview(image):
+    """A few-pixel summary of *image*; scaled up it gives a blurred placeholder."""
+    small = image.scaled(*PREVIEW_SIZE, QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                         QtCore.Qt.TransformationMode.SmoothTransformation).convertToFormat(_PREVIEW_FORMAT)
+    bits = small.constBits()
+    bits.setsize(small.sizeInBytes())
+    return bytes(bits)
+
+
+def preview_image(data):
+    """The ``QImage`` of preview *data* made by ``make_preview``."""
+    width, height = PREVIEW_SIZE
+    return QtGui.QImage(data, width, height, len(data) // height, _PREVIEW_FORMAT).copy()
+
+
+def warm_cache(url, cache_dir):
+    """
+    Make sure *url* is in the disk cache without keeping the decoded image.
+    Returns the number of bytes downloaded (0 if it was already cached).
+    """
+    cache = cache_manager_for(cache_dir)
+    if cache.contains(url):
+        return 0
+    image, data = _download(url)
+    _store(cache, url, image, data)
+    return len(data)
+
+
+def scale_to(pix, size):
+    """Scale *pix* (a ``QImage`` or ``QPixmap``) to fit *size*, keeping its aspect ratio."""
+    return pix.scaled(
+        size,
+        QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+        QtCore.Qt.TransformationMode.SmoothTransformation
+    )
+
+
+def covers(pix, size):
+    """True if *pix* can be scaled into *size* without being enlarged."""
+    return pix.width() >= size.width() or pix.height() >= size.height()
+
+
+def reduce_source(pix, size, headroom=2.0):
+    """
+    Shrink a decoded image to at most *headroom* times *size*, so it can
+    serve somewhat larger thumbnails later without keeping the full
+    resolution in memory.
+    """
+    limit = QtCore.QSize(int(size.width() * headroom), int(size.height() * headroom))
+    if pix.width() <= limit.width() and pix.height() <= limit.height():
+        return pix
+    return scale_to(pix, limit)
+
 
 class ImageLoader(QtCore.QRunnable):
     def __init__(self, url, cache_dir, thumb_size, signals):
@@ -15,23 +293,10 @@ class ImageLoader(QtCore.QRunnable):
 
     @QtCore.pyqtSlot()
     def run(self):
-        key = hashlib.sha1(self.url.encode()).hexdigest()
-        webp_path = os.path.join(self.cache_dir, f'{key}.webp')
         try:
-            if os.path.exists(webp_path):
-                pix = QtGui.QPixmap(webp_path)
-            else:
-                resp = requests.get(self.url)
-                resp.raise_for_status()
-                pix = QtGui.QPixmap()
-                pix.loadFromData(resp.content)
-                pix.save(webp_path, 'WEBP', quality=85)
-
-            scaled = pix.scaled(
-                self.thumb_size,
-                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-                QtCore.Qt.TransformationMode.SmoothTransformation
-            )
-            self.signals.image_loaded.emit(self.url, scaled)
+            image, store = fetch_source(self.url, self.cache_dir)
+            self.signals.deliver(self.url, self.thumb_size, scale_to(image, self.thumb_size))
         except Exception as e:
             self.signals.image_error.emit(self.url, str(e))
+            return
+        run_store(store)  # after the thumbnail has been handed out
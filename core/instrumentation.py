@@ -0,0 +1,179 @@
+"""
+Hot-path instrumentation: timed spans and counters that can be exported
+as a Chrome trace.
+
+Spans are recorded for API calls, HTTP requests, the image loading stages
+and the gallery's layout and paint passes, and counters are bumped for
+cache hits and misses; the window samples queue depths and cache
+statistics into the trace while it records.  Events go into a bounded
+ring; ``export`` writes them in the Chrome trace event format, which
+chrome://tracing and https://ui.perfetto.dev open.  Per-name totals are
+kept alongside for the window's stats panel.
+
+Recording is off until ``tracer.enabled`` is set; until then every hook
+is one attribute check.
+
+    python -m core.instrumentation summary trace.json
+"""
+import argparse, functools, json, os, threading, time
+from collections import deque
+from contextlib import nullcontext
+
+_NO_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.category, self.start, time.perf_counter() - self.start, self.args)
+
+
+class Tracer:
+    def __init__(self, max_events=200_000):
+        self.enabled = False
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._events = deque(maxlen=max_events)
+        self._threads = {}  # thread ident -> name
+        self._totals = {}   # span name -> [count, total seconds, longest]
+        self._counts = {}
+
+    def span(self, name, category='app', args=None):
+        """Context manager timing a block as a span; does nothing while disabled."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, category, args)
+
+    def complete(self, name, category, start, seconds, args=None):
+        """Record a span measured by the caller (``start`` from ``time.perf_counter``)."""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._threads.setdefault(thread.ident, thread.name)
+            self._events.append(('X', name, category, start, seconds, thread.ident, args))
+            totals = self._totals.get(name)
+            if totals is None:
+                self._totals[name] = [1, seconds, seconds]
+            else:
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] = max(totals[2], seconds)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def sample(self, name, values):
+        """Record the current *values* (a dict of numbers) as a counter track."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._events.append(('C', name, 'counters', time.perf_counter(), 0, 0, dict(values)))
+
+    def totals(self):
+        with self._lock:
+            return {name: {'count': count, 'total_ms': round(total * 1000, 1),
+                           'mean_ms': round(total / count * 1000, 2), 'max_ms': round(longest * 1000, 2)}
+                    for name, (count, total, longest) in sorted(self._totals.items())}
+
+    def counts(self):
+        with self._lock:
+            return dict(sorted(self._counts.items()))
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self._totals.clear()
+            self._counts.clear()
+            self.dropped = 0
+
+    def export(self, path, metadata=None):
+        """Write the recorded events as a Chrome trace; returns how many were written."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+            counts = dict(self._counts)
+        trace = [{'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in threads.items()]
+        for ph, name, category, start, seconds, tid, args in events:
+            event = {'ph': ph, 'name': name, 'cat': category, 'pid': pid, 'tid': tid,
+                     'ts': round((start - self._origin) * 1e6, 1)}
+            if ph == 'X':
+                event['dur'] = round(seconds * 1e6, 1)
+            if args:
+                event['args'] = args
+            trace.append(event)
+        other = {'counts': counts, 'dropped_events': self.dropped, **(metadata or {})}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms', 'otherData': other}, f, default=str)
+        return len(events)
+
+
+# Shared by every instrumented module.
+tracer = Tracer()
+
+
+def traced(name, category='app'):
+    """Decorator recording each call of the function as a span."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                tracer.complete(name, category, start, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def summarize(trace):
+    """Per-span totals of a Chrome trace loaded from JSON, longest total first."""
+    totals = {}
+    for event in trace.get('traceEvents', []):
+        if event.get('ph') != 'X':
+            continue
+        entry = totals.setdefault((event.get('cat', ''), event['name']), [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += event.get('dur', 0) / 1000
+        entry[2] = max(entry[2], event.get('dur', 0) / 1000)
+    return sorted(((cat, name, count, total, longest) for (cat, name), (count, total, longest) in totals.items()),
+                  key=lambda row: -row[3])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize a trace exported from the stats panel')
+    parser.add_argument('command', choices=('summary',))
+    parser.add_argument('path')
+    args = parser.parse_args(argv)
+    with open(args.path, encoding='utf-8') as f:
+        trace = json.load(f)
+    print(f"{'category':10} {'span':32} {'count':>7} {'total ms':>10} {'max ms':>9}")
+    for cat, name, count, total, longest in summarize(trace):
+        print(f'{cat:10} {name:32} {count:7} {total:10.1f} {longest:9.2f}')
+    for name, value in trace.get('otherData', {}).get('counts', {}).items():
+        print(f'{name:43} {value:7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""
+Priority scheduler for image loads.
+
+``ImageLoader`` runnables handed straight to a ``QThreadPool`` cannot be
+cancelled or reordered, so a new search used to leave hundreds of stale
+downloads ahead of the images now on screen.  The scheduler keeps its own
+priority queue instead:
+
+* every request names an *owner* (``'gallery'``, ``'detail'``, …) and is
+  tagged with that owner's current generation; ``new_generation(owner)``
+  drops all of the owner's queued work at once;
+* jobs are served in priority order — ``PREVIEW`` (the low-resolution
+  stand-ins for cells on screen) first, then ``VISIBLE`` cells, then
+  ``PREFETCH``, then the detail dialog's full-size ``DETAIL`` image — and
+  first-come first-served within a priority;
+* requests for a URL that is already queued or downloading are merged into
+  that job: the image is fetched once and scaled for every requested size.
+
+A download that has already started is allowed to finish (its result still
+lands in the caches) but is only reported to listeners that are current.
+
+Workers decode and scale ``QImage``s only and hand the thumbnails to each
+listener's ``ImageLoaderSignals.deliver``, which turns them into pixmaps
+on the GUI thread, a frame's worth at a time.  With *batch* above one a
+worker runs up to that many jobs before giving its thread back to the
+pool.
+
+Each load keeps the decoded image in ``pixmap_cache`` as the URL's source,
+reduced to twice the requested size, and with an *atlas* (a
+``core.thumb_atlas.ThumbAtlas``) its thumbnails are packed there too, for
+the next start.  A downloaded image is written to the disk cache only
+after its thumbnails have been delivered.  Later requests for a size the
+source covers (e.g. after the thumbnail slider moved) are rescaled from it
+without any disk or network access.
+"""
+import heapq, itertools, threading, time
+from collections import deque
+
+from PyQt6 import QtCore
+
+from core.image_loader import covers, fetch_source, reduce_source, run_store, scale_to, stage_timings
+from core.pixmap_cache import pixmap_cache
+
+PREVIEW, VISIBLE, PREFETCH, DETAIL = 0, 1, 2, 3
+PRIORITY_NAMES = {PREVIEW: 'preview', VISIBLE: 'visible', PREFETCH: 'prefetch', DETAIL: 'detail'}
+
+
+def _emit(signal, *args):
+    try:
+        signal.emit(*args)
+    except RuntimeError:
+        pass  # the listener's signals object was deleted with its window
+
+
+def _deliver(signals, url, size, image):
+    try:
+        signals.deliver(url, size, image)
+    except RuntimeError:
+        pass
+
+
+class _Job:
+    __slots__ = ('url', 'cache_dir', 'priority', 'submitted', 'listeners', 'running')
+
+    def __init__(self, url, cache_dir, priority):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.priority = priority
+        self.submitted = time.perf_counter()
+        # (owner, generation, size, signals) tuples
+        self.listeners = []
+        self.running = False
+
+
+class _Slot(QtCore.QRunnable):
+    """One unit of pool capacity; runs whichever job is most urgent when it starts."""
+
+    def __init__(self, scheduler):
+        super().__init__()
+        self.scheduler = scheduler
+
+    def run(self):
+        for _ in range(self.scheduler.batch):
+            if not self.scheduler._run_next():
+                break
+
+
+class LoadScheduler:
+    def __init__(self, max_workers=6, pool=None, batch=1, atlas=None):
+        self.pool = pool or QtCore.QThreadPool()
+        if pool is None:
+            self.pool.setMaxThreadCount(max_workers)
+        self.batch = max(1, batch)
+        self.atlas = atlas
+        self.submitted = 0
+        self.merged = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.failed = 0
+        self.rescaled = 0
+        self._generations = {}
+        self._jobs = {}     # url -> _Job, queued or running
+        self._heap = []     # (priority, seq, job); stale entries are skipped
+        self._seq = itertools.count()
+        self._waits = {p: deque(maxlen=1000) for p in PRIORITY_NAMES}
+        self._lock = threading.Lock()
+
+    def new_generation(self, owner):
+        """Invalidate everything *owner* asked for so far; returns the new generation."""
+        with self._lock:
+            gen = self._generations.get(owner, 0) + 1
+            self._generations[owner] = gen
+            self._prune()
+            return gen
+
+    def replace(self, owner, requests):
+        """
+        Make *requests* — ``(url, cache_dir, size, signals, priority)``
+        tuples — the only work outstanding for *owner*.  Unlike
+        ``new_generation`` followed by ``submit``, jobs that are still
+        wanted keep their place in the queue (or keep running) and only the
+        rest are dropped.
+        """
+        with self._lock:
+            self._generations[owner] = self._generations.get(owner, 0) + 1
+        for url, cache_dir, size, signals, priority in requests:
+            self.submit(url, cache_dir, size, signals, priority, owner)
+        with self._lock:
+            self._prune()
+
+    def _prune(self):
+        for url, job in list(self._jobs.items()):
+            job.listeners = [l for l in job.listeners if self._generations.get(l[0], 0) == l[1]]
+            if not job.listeners and not job.running:
+                del self._jobs[url]
+                self.cancelled += 1
+
+    def submit(self, url, cache_dir, size, signals, priority=VISIBLE, owner='gallery'):
+        """
+        Ask for *url* scaled to *size*; it is delivered to *signals* (or
+        ``image_error`` fires) unless *owner* starts a new generation first.
+        """
+        with self._lock:
+            listener = (owner, self._generations.get(owner, 0), size, signals)
+            self.submitted += 1
+            job = self._jobs.get(url)
+            if job is not None:
+                self.merged += 1
+                if listener not in job.listeners:
+                    job.listeners.append(listener)
+                if priority < job.priority and not job.running:
+                    job.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), job))
+                    self.pool.start(_Slot(self))
+                return
+            job = self._jobs[url] = _Job(url, cache_dir, priority)
+            job.listeners.append(listener)
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+        self.pool.start(_Slot(self))
+
+    def _pop(self):
+        with self._lock:
+            while self._heap:
+                priority, _, job = heapq.heappop(self._heap)
+                if job.running or priority != job.priority or self._jobs.get(job.url) is not job:
+                    continue  # cancelled, or re-queued at a higher priority
+                job.running = True
+                self._waits[priority].append(time.perf_counter() - job.submitted)
+                return job
+        return None
+
+    def _finish(self, job, ok):
+        """Retire *job* and return the listeners that are still current."""
+        with self._lock:
+            self._jobs.pop(job.url, None)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            return [l for l in job.listeners if self._generations.get(l[0], 0) == l[1]]
+
+    def _run_next(self):
+        job = self._pop()
+        if job is None:
+            return False
+        with self._lock:
+            sizes = [l[2] for l in job.listeners]
+        if not sizes:
+            self._finish(job, True)
+            return True
+        need = QtCore.QSize(max(s.width() for s in sizes), max(s.height() for s in sizes))
+        source = pixmap_cache.source(job.url)
+        image = store = None
+        try:
+            if source is not None and covers(source, need):
+                with self._lock:
+                    self.rescaled += 1
+            else:
+                image, store = fetch_source(job.url, job.cache_dir)
+                start = time.perf_counter()
+                source = reduce_source(image, need)
+                stage_timings.record('scale', time.perf_counter() - start)
+                pixmap_cache.put_source(job.url, source)
+        except Exception as e:
+            for _, _, _, signals in self._finish(job, False):
+                _emit(signals.image_error, job.url, str(e))
+            return True
+        listeners = self._finish(job, True)
+        # Listeners merged in while the job ran may want a larger size than
+        # the source was reduced for: reduce the full image again, or load
+        # once more for them when it was not fetched here.
+        wanted = QtCore.QSize(max((l[2].width() for l in listeners), default=0),
+                              max((l[2].height() for l in listeners), default=0))
+        if not covers(source, wanted):
+            if image is not None:
+                start = time.perf_counter()
+                source = reduce_source(image, wanted)
+                stage_timings.record('scale', time.perf_counter() - start)
+                pixmap_cache.put_source(job.url, source)
+            else:
+                for owner, _, size, signals in listeners:
+                    if not covers(source, size):
+                        self.submit(job.url, job.cache_dir, size, signals, job.priority, owner)
+                listeners = [l for l in listeners if covers(source, l[2])]
+        scaled = {}
+        for _, _, size, signals in listeners:
+            key = (size.width(), size.height())
+            if key not in scaled:
+                start = time.perf_counter()
+                scaled[key] = scale_to(source, size)
+                stage_timings.record('scale', time.perf_counter() - start)
+                if self.atlas is not None:
+                    self.atlas.put(job.url, scaled[key], size)
+            _deliver(signals, job.url, size, scaled[key])
+        run_store(store)
+        return True
+
+    def queue_depth(self, priority=None):
+        """Jobs waiting for a worker; with *priority*, only those at least that urgent."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values()
+                       if not job.running and (priority is None or job.priority <= priority))
+
+    def stats(self):
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if not job.running)
+            waits = {}
+            for priority, samples in self._waits.items():
+                ordered = sorted(samples)
+                if ordered:
+                    waits[PRIORITY_NAMES[priority]] = {
+                        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 1),
+                        'p90_ms': round(ordered[int(len(ordered) * 0.9)] * 1000, 1),
+                        'max_ms': round(ordered[-1] * 1000, 1),
+                    }
+            stats = {'queued': queued, 'running': len(self._jobs) - queued,
+                     'submitted': self.submitted, 'merged': self.merged,
+                     'cancelled': self.cancelled, 'completed': self.completed,
+                     'failed': self.failed, 'rescaled': self.rescaled, 'wait': waits}
+        stats['stages'] = stage_timings.snapshot()
+        return stats
+
+    def wait_for_done(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def configure(**kwargs):
+    """Replace the shared scheduler, e.g. ``configure(max_workers=8)``."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = LoadScheduler(**kwargs)
+    return _scheduler
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LoadScheduler()
+        return _scheduler
@@ -0,0 +1,83 @@
+"""
+In-memory card-name completion for the query box.
+
+Names are kept case- and accent-folded in sorted arrays, so completing a
+prefix is a binary search plus a short scan: a few microseconds for the
+~30k names of Scryfall's catalog, with no network or disk access.  Names
+match from their start first; then from the start of any later word or
+card face (``bolt`` finds *Lightning Bolt*, ``fire`` finds *Fire // Ice*).
+"""
+import unicodedata
+from bisect import bisect_left
+
+# Characters that make the query box text a search expression rather than
+# (the start of) a card name.
+_SYNTAX = frozenset(':<>=()')
+
+
+def fold(text):
+    """*text* lower-cased with accents dropped, as names are compared."""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    text = unicodedata.normalize('NFKD', text.replace('æ', 'ae'))
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def name_prefix(query):
+    """The name *query* starts to spell out, or ``None`` when it uses search syntax."""
+    text = query.strip()
+    if text.startswith('!'):
+        text = text[1:]
+    text = text.strip('"').strip()
+    if not text or text.startswith('-') or _SYNTAX.intersection(text):
+        return None
+    return text
+
+
+class NameIndex:
+    def __init__(self, names=()):
+        starts, words = {}, {}
+        for name in names:
+            key = fold(name)
+            starts.setdefault(key, name)
+            faces = key.split(' // ')
+            for face in faces[1:]:
+                words.setdefault((face, name), name)
+            for face in faces:
+                pos = face.find(' ')
+                while pos != -1:
+                    words.setdefault((face[pos + 1:], name), name)
+                    pos = face.find(' ', pos + 1)
+        self._keys = sorted(starts)
+        self._names = [starts[key] for key in self._keys]
+        self._word_keys = sorted(words)
+        self._word_names = [words[key] for key in self._word_keys]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def complete(self, prefix, limit=10):
+        """Up to *limit* names starting with *prefix*, then names with a later word starting with it."""
+        key = fold(prefix.strip())
+        if not key or limit <= 0:
+            return []
+        found = self._scan(self._keys, self._names, key, key, limit, ())
+        if len(found) < limit:
+            seen = set(found)
+            found += self._scan(self._word_keys, self._word_names, (key,), key, limit - len(found), seen)
+        return found
+
+    @staticmethod
+    def _scan(keys, names, start, prefix, limit, seen):
+        found = []
+        for i in range(bisect_left(keys, start), len(keys)):
+            key = keys[i]
+            if not (key[0] if isinstance(key, tuple) else key).startswith(prefix):
+                break
+            name = names[i]
+            if name not in seen and name not in found:
+                found.append(name)
+                if len(found) == limit:
+                    break
+        return found
@@ -0,0 +1,111 @@
+"""
+Process-wide in-memory cache of decoded, scaled images, in front of the
+image files in ``resources/cache``.
+
+Entries are keyed on ``(url, width, height)`` of the requested target size
+and bounded by their pixel-buffer size in bytes; the least recently used
+ones are evicted first.  Next to the scaled thumbnails the cache can hold
+one *source* per URL: the decoded image at a resolution somewhat above the
+thumbnail, from which other sizes are rescaled without touching the disk.
+
+Thumbnails are ``QPixmap``s, ready to paint, and are only put on the GUI
+thread.  Sources are ``QImage``s, because the load workers that decode
+and rescale them run on ``QThreadPool`` threads; access is guarded by a
+lock for them.
+"""
+import threading
+from collections import OrderedDict
+
+
+class PixmapCache:
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url, size):
+        return url, size.width(), size.height()
+
+    @staticmethod
+    def _cost(pix):
+        return pix.width() * pix.height() * max(pix.depth(), 8) // 8
+
+    def get(self, url, size):
+        key = self._key(url, size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, url, size):
+        """Like ``get`` but not counted as a hit or miss; used when repainting."""
+        key = self._key(url, size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def source(self, url):
+        """The decoded source image kept for *url*, if any (not counted)."""
+        key = (url, None, None)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put_source(self, url, pix):
+        self._put((url, None, None), pix)
+
+    def largest(self, url):
+        """The biggest cached image of *url* at any size, e.g. as a preview; may be a ``QImage`` source."""
+        with self._lock:
+            best = None
+            for key, (pix, _) in self._entries.items():
+                if key[0] == url and (best is None or pix.width() > best.width()):
+                    best = pix
+            return best
+
+    def put(self, url, size, pix):
+        self._put(self._key(url, size), pix)
+
+    def _put(self, key, pix):
+        cost = self._cost(pix)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (pix, cost)
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+
+# Shared by ScryfallGallery and CardDetailDialog.
+pixmap_cache = PixmapCache()
@@ -0,0 +1,170 @@
+"""
+Background prefetch of the next page of search results.
+
+Once a page is on screen, ``Prefetcher.prefetch`` fetches the following
+page's JSON and downloads the thumbnails of its first screenful into the
+disk cache, so that moving on to that page needs neither a search request
+nor image downloads.  Prefetching runs on its own small thread pool;
+thumbnail downloads wait while the foreground image scheduler has work
+queued and share a bandwidth budget.  Everything prefetched for a query
+is dropped as soon as another query is searched.
+"""
+import threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from core.image_loader import warm_cache
+from core.rate_limiter import RateLimiter
+
+
+class Prefetcher:
+    # Prefetched result pages kept at most; older ones are dropped first.
+    MAX_PAGES = 4
+    IDLE_POLL = 0.05
+
+    def __init__(self, api, cache_dir, max_workers=2, bytes_per_second=2 * 2**20, idle=None):
+        self.api = api
+        self.cache_dir = cache_dir
+        # Called before each thumbnail download; returns False while
+        # foreground loads should go first.
+        self.idle = idle
+        self._bandwidth = RateLimiter(bytes_per_second, burst=bytes_per_second) if bytes_per_second else None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.query = None
+        self._pages = OrderedDict()  # (query, page) -> search result page
+        self._pending = set()        # (query, page) being fetched
+        self._requested = set()      # thumbnail URLs queued for warming
+        self._ready = set()          # ... and those now in the disk cache
+        self.pages_fetched = 0
+        self.thumbnails_fetched = 0
+        self.bytes_fetched = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.thumbnail_hits = 0
+        self.thumbnail_misses = 0
+
+    def set_query(self, query):
+        """Drop everything prefetched or queued for another query."""
+        with self._lock:
+            if query != self.query:
+                self._reset()
+                self.query = query
+
+    def cancel(self):
+        with self._lock:
+            self._reset()
+            self.query = None
+
+    def _reset(self):
+        self._generation += 1
+        self._pages.clear()
+        self._pending.clear()
+        self._requested.clear()
+        self._ready.clear()
+
+    def prefetch(self, query, page, url_for_card, thumbnails):
+        """
+        Fetch result *page* of *query* and warm the disk cache with the
+        images *url_for_card* picks for its first *thumbnails* cards.
+        *url_for_card* is called on a prefetch thread.
+        """
+        key = (query, page)
+        with self._lock:
+            if query != self.query:
+                self._reset()
+                self.query = query
+            if key in self._pages or key in self._pending:
+                return
+            self._pending.add(key)
+            generation = self._generation
+        self._pool.submit(self._fetch_page, generation, key, url_for_card, thumbnails)
+
+    def _current(self, generation):
+        return generation == self._generation
+
+    def _fetch_page(self, generation, key, url_for_card, thumbnails):
+        if not self._current(generation):
+            return
+        try:
+            data = self.api.search(*key)
+        except Exception:
+            data = None
+        with self._lock:
+            self._pending.discard(key)
+            if data is None or not self._current(generation):
+                return
+            self._pages[key] = data
+            while len(self._pages) > self.MAX_PAGES:
+                self._pages.popitem(last=False)
+            self.pages_fetched += 1
+            urls = []
+            for card in data.get('data', [])[:thumbnails]:
+                url = url_for_card(card)
+                if url and url not in self._requested:
+                    self._requested.add(url)
+                    urls.append(url)
+        for url in urls:
+            self._pool.submit(self._warm, generation, url)
+
+    def _warm(self, generation, url):
+        while self.idle is not None and not self.idle():
+            if not self._current(generation):
+                return
+            time.sleep(self.IDLE_POLL)
+        if not self._current(generation):
+            return
+        try:
+            downloaded = warm_cache(url, self.cache_dir)
+        except Exception:
+            return
+        with self._lock:
+            if self._current(generation):
+                self._ready.add(url)
+            if downloaded:
+                self.thumbnails_fetched += 1
+                self.bytes_fetched += downloaded
+        if downloaded and self._bandwidth is not None:
+            self._bandwidth.acquire(downloaded)
+
+    def take_page(self, query, page):
+        """The prefetched result *page* of *query*, or ``None``."""
+        key = (query, page)
+        with self._lock:
+            data = self._pages.pop(key, None)
+            if data is not None:
+                self.page_hits += 1
+            elif key in self._pending:
+                self.page_misses += 1  # asked for before it arrived
+            return data
+
+    def note_displayed(self, urls):
+        """Count which of the displayed *urls* the prefetch had ready."""
+        with self._lock:
+            for url in urls:
+                if url in self._requested:
+                    if url in self._ready:
+                        self.thumbnail_hits += 1
+                    else:
+                        self.thumbnail_misses += 1
+
+    def stats(self):
+        with self._lock:
+            pages = self.page_hits + self.page_misses
+            thumbnails = self.thumbnail_hits + self.thumbnail_misses
+            return {
+                'pages_fetched': self.pages_fetched,
+                'page_hits': self.page_hits,
+                'page_misses': self.page_misses,
+                'page_hit_rate': round(self.page_hits / pages, 3) if pages else None,
+                'thumbnails_fetched': self.thumbnails_fetched,
+                'thumbnail_hits': self.thumbnail_hits,
+                'thumbnail_misses': self.thumbnail_misses,
+                'thumbnail_hit_rate': round(self.thumbnail_hits / thumbnails, 3) if thumbnails else None,
+                'bytes_fetched': self.bytes_fetched,
+            }
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,340 @@
+"""
+Headless pre-warming of the caches the desktop app reads, e.g. overnight:
+
+    python -m core.prewarm --query "t:goblin" --query "set:neo"
+    python -m core.prewarm --queries queries.txt --archidekt 12345 --csv collection.csv
+
+Search result pages go into the response cache, collections into the
+collection store (the last one becomes the collection the app opens with)
+and the card objects of their cards into the card store.  Then the
+thumbnail images the gallery would show (and with ``--detail`` the
+detail dialog's large image) are downloaded into the image cache in
+parallel, within the HTTP client's per-host rate limits and an optional
+download budget.
+
+Progress is checkpointed in an SQLite file: search pages already fetched
+and images already cached are skipped when the command runs again, so an
+interrupted run resumes where it stopped.  A source whose requests fail
+is reported and skipped; the run goes on with the others and the images.
+Sources refused by the server (a 4xx, e.g. a query matching nothing) are
+not retried by later runs, other failures are.  Nothing here imports the
+GUI.
+"""
+import argparse, os, sqlite3, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from core import http_client, image_loader
+from core.cache_manager import cache_manager_for
+from core.card_index import CardIndex
+from core.collection import CollectionStore, load_csv, sync_archidekt
+from core.image_loader import warm_cache
+from core.rate_limiter import RateLimiter
+from core.response_cache import ResponseCache
+from core.scryfall_api import ScryfallAPI
+from utils.helpers import IMAGE_WIDTHS, best_image_url
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    next_page INTEGER DEFAULT 1,
+    done INTEGER DEFAULT 0  -- 1 when finished, -1 when refused for good
+);
+CREATE TABLE IF NOT EXISTS images (
+    url TEXT PRIMARY KEY,
+    done INTEGER DEFAULT 0
+);
+'''
+
+
+class Checkpoint:
+    """What a pre-warm run has finished: source progress and image URLs."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def next_page(self, source):
+        """The first page of *source* still to fetch, or ``None`` once it is done."""
+        row = self._db.execute('SELECT next_page, done FROM sources WHERE source = ?', (source,)).fetchone()
+        if row is None:
+            return 1
+        return None if row[1] else row[0]
+
+    def advance(self, source, next_page, done=False, urls=()):
+        """Record the images of one fetched page and where *source* continues."""
+        with self._lock:
+            self._db.executemany('INSERT OR IGNORE INTO images (url) VALUES (?)', ((u,) for u in urls))
+            self._db.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?)', (source, next_page, int(done)))
+            self._db.commit()
+
+    def fail(self, source):
+        """Record that *source* was refused and is not to be retried."""
+        with self._lock:
+            self._db.execute('INSERT OR IGNORE INTO sources (source) VALUES (?)', (source,))
+            self._db.execute('UPDATE sources SET done = -1 WHERE source = ?', (source,))
+            self._db.commit()
+
+    def pending_images(self):
+        return [url for url, in self._db.execute('SELECT url FROM images WHERE done = 0 ORDER BY rowid')]
+
+    def image_counts(self):
+        return self._db.execute('SELECT COUNT(*), COALESCE(SUM(done), 0) FROM images').fetchone()
+
+    def images_done(self, urls):
+        with self._lock:
+            self._db.executemany('UPDATE images SET done = 1 WHERE url = ?', ((u,) for u in urls))
+            self._db.commit()
+
+    def reset(self):
+        with self._lock:
+            self._db.execute('DELETE FROM sources')
+            self._db.execute('DELETE FROM images')
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+class Stats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.cards = 0
+        self.images = 0
+        self.cached = 0
+        self.failed = 0
+        self.bytes = 0
+        self.failed_sources = {}  # source -> error message
+        self._lock = threading.Lock()
+
+    def add_image(self, downloaded):
+        with self._lock:
+            self.images += 1
+            if downloaded:
+                self.bytes += downloaded
+            else:
+                self.cached += 1
+
+    def snapshot(self):
+        seconds = max(time.perf_counter() - self.start, 1e-9)
+        return {
+            'seconds': round(seconds, 1),
+            'cards': self.cards,
+            'cards_per_s': round(self.cards / seconds, 1),
+            'images': self.images,
+            'already_cached': self.cached,
+            'failed': self.failed,
+            'images_per_s': round(self.images / seconds, 1),
+            'mb': round(self.bytes / 2**20, 1),
+            'mb_per_s': round(self.bytes / 2**20 / seconds, 2),
+            'failed_sources': dict(self.failed_sources),
+        }
+
+
+def image_urls(card, widths, detail=False):
+    """The images the gallery shows *card* at for each thumbnail width (and the detail dialog's)."""
+    urls = {best_image_url(card, width) for width in widths}
+    if detail:
+        urls.add(best_image_url(card, IMAGE_WIDTHS['large']))
+    urls.discard(None)
+    return urls
+
+
+class Prewarmer:
+    """
+    Fills the caches for a list of sources: ``query:<q>``,
+    ``archidekt:<id>`` or ``csv:<path>``.  *stop* is an optional callable;
+    once it returns true the run stops after the work in flight and can be
+    resumed from the checkpoint.
+    """
+
+    def __init__(self, api, cache_dir, checkpoint, collection_store=None, widths=(120,), detail=False,
+                 workers=8, images_per_second=None, bytes_per_second=None, stop=None, progress=None):
+        self.api = api
+        self.cache_dir = cache_dir
+        self.checkpoint = checkpoint
+        self.collection_store = collection_store
+        self.widths = widths
+        self.detail = detail
+        self.workers = workers
+        self.stop = stop or (lambda: False)
+        self.progress = progress
+        self.stats = Stats()
+        self._images = RateLimiter(images_per_second, burst=workers) if images_per_second else None
+        self._bandwidth = RateLimiter(bytes_per_second, burst=bytes_per_second) if bytes_per_second else None
+
+    def run(self, sources):
+        for source in sources:
+            if self.stop():
+                break
+            kind, _, value = source.partition(':')
+            if kind not in ('query', 'archidekt', 'csv'):
+                raise ValueError(f'Unknown source "{source}"')
+            try:
+                if kind == 'query':
+                    self._search(source, value)
+                else:
+                    self._collection(source, kind, value)
+            except requests.RequestException as e:
+                self.stats.failed_sources[source] = str(e)
+                response = getattr(e, 'response', None)
+                if response is not None and 400 <= response.status_code < 500:
+                    self.checkpoint.fail(source)  # asking again gets the same answer
+        if not self.stop():
+            self._download(self.checkpoint.pending_images())
+        return self.stats.snapshot()
+
+    def _urls(self, cards):
+        urls = set()
+        for card in cards:
+            urls |= image_urls(card, self.widths, self.detail)
+        self.stats.cards += len(cards)
+        return urls
+
+    def _search(self, source, query):
+        page = self.checkpoint.next_page(source)
+        while page is not None and not self.stop():
+            data = self.api.search(query, page)
+            more = data.get('has_more', False)
+            urls = self._urls(data.get('data', []))
+            self.checkpoint.advance(source, page + 1, not more, urls)
+            self._report()
+            page = page + 1 if more else None
+
+    def _collection(self, source, kind, value):
+        if self.checkpoint.next_page(source) is None:
+            return
+        if self.collection_store is None:
+            raise ValueError('Collections need a collection store')
+        if kind == 'archidekt':
+            synced = sync_archidekt(self.api, self.collection_store, int(value), self.stop)
+            if synced is None:
+                return
+            collection = synced[0]
+        else:
+            collection = load_csv(self.collection_store, value)[0]
+        # Cards the card store already knows are not requested again.
+        cards = self.api.resolve_collection(sorted(collection.names()))
+        self.checkpoint.advance(source, 1, True, self._urls(cards))
+        self._report()
+
+    def _download(self, urls):
+        done = []
+        last = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='prewarm') as pool:
+            pending = iter(urls)
+            futures = {}
+
+            def submit():
+                url = next(pending, None)
+                if url is not None and not self.stop():
+                    futures[pool.submit(self._fetch, url)] = url
+
+            for _ in range(self.workers * 2):
+                submit()
+            while futures:
+                future = next(as_completed(futures))
+                url = futures.pop(future)
+                if future.result():
+                    done.append(url)
+                submit()
+                if len(done) >= 50 or time.perf_counter() - last > 2:
+                    self.checkpoint.images_done(done)
+                    done = []
+                    last = time.perf_counter()
+                    self._report()
+        self.checkpoint.images_done(done)
+        self._report()
+
+    def _fetch(self, url):
+        if self._images is not None:
+            self._images.acquire()
+        try:
+            downloaded = warm_cache(url, self.cache_dir)
+        except Exception:
+            with self.stats._lock:
+                self.stats.failed += 1
+            return False
+        self.stats.add_image(downloaded)
+        if downloaded and self._bandwidth is not None:
+            self._bandwidth.acquire(downloaded)
+        return True
+
+    def _report(self):
+        if self.progress is not None:
+            self.progress(self.stats.snapshot())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-warm the caches of the card gallery without opening it.')
+    parser.add_argument('--query', action='append', default=[], help='search query (repeatable)')
+    parser.add_argument('--queries', help='file with one search query per line')
+    parser.add_argument('--archidekt', type=int, action='append', default=[], help='Archidekt collection ID')
+    parser.add_argument('--csv', action='append', default=[], help='collection CSV export')
+    parser.add_argument('--widths', default='120', help='thumbnail widths in device pixels, comma-separated')
+    parser.add_argument('--detail', action='store_true', help="also fetch the detail dialog's large image")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--images-per-second', type=float, default=25)
+    parser.add_argument('--mb-per-second', type=float, help='download budget for images')
+    parser.add_argument('--cache-dir', default='./resources/cache')
+    parser.add_argument('--cache-format', choices=image_loader.CACHE_FORMATS, default='original')
+    parser.add_argument('--response-cache', default='./resources/responses.sqlite')
+    parser.add_argument('--card-store', default='./resources/collection_cards.sqlite')
+    parser.add_argument('--collection-store', default='./resources/collections.sqlite')
+    parser.add_argument('--checkpoint', default='./resources/prewarm.sqlite')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint of an earlier run')
+    args = parser.parse_args(argv)
+
+    sources = [f'query:{q}' for q in args.query]
+    if args.queries:
+        with open(args.queries, encoding='utf-8') as f:
+            sources += [f'query:{line.strip()}' for line in f if line.strip() and not line.startswith('#')]
+    sources += [f'archidekt:{i}' for i in args.archidekt]
+    sources += [f'csv:{os.path.abspath(path)}' for path in args.csv]
+    if not sources:
+        parser.error('nothing to pre-warm: give --query, --queries, --archidekt or --csv')
+
+    http_client.configure(pool_size=args.workers + ScryfallAPI.MAX_PAGE_WORKERS)
+    image_loader.configure(cache_format=args.cache_format)
+    cache_manager_for(args.cache_dir)
+    api = ScryfallAPI(card_store=CardIndex(args.card_store),
+                      response_cache=ResponseCache(args.response_cache, ttl=6 * 3600, max_bytes=64 * 2**20))
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.reset()
+    last = [0.0]
+
+    def progress(stats):
+        if time.perf_counter() - last[0] >= 5:
+            last[0] = time.perf_counter()
+            print(f"{stats['cards']} cards ({stats['cards_per_s']}/s), {stats['images']} images "
+                  f"({stats['images_per_s']}/s, {stats['mb']} MB at {stats['mb_per_s']} MB/s)", flush=True)
+
+    interrupted = threading.Event()
+    prewarmer = Prewarmer(
+        api, args.cache_dir, checkpoint, CollectionStore(args.collection_store),
+        widths=[int(w) for w in args.widths.split(',')], detail=args.detail, workers=args.workers,
+        images_per_second=args.images_per_second,
+        bytes_per_second=args.mb_per_second * 2**20 if args.mb_per_second else None,
+        stop=interrupted.is_set, progress=progress)
+    try:
+        stats = prewarmer.run(sources)
+    except KeyboardInterrupt:
+        interrupted.set()
+        stats = prewarmer.stats.snapshot()
+        print('Interrupted; run the same command again to resume.')
+    total, done = checkpoint.image_counts()
+    print(f"{stats['cards']} cards in {stats['seconds']}s ({stats['cards_per_s']} cards/s); "
+          f"{stats['images']} images, {stats['already_cached']} already cached, {stats['failed']} failed; "
+          f"{stats['mb']} MB ({stats['mb_per_s']} MB/s); {done} of {total} images done")
+    for source, error in stats['failed_sources'].items():
+        print(f'failed: {source}: {error}')
+    cache_manager_for(args.cache_dir).flush()
+    checkpoint.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+import threading, time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: *rate* requests per second, bursts of up to *burst*.
+
+    ``acquire(amount)`` takes several tokens at once, e.g. bytes against a
+    bandwidth budget.  An amount larger than the bucket is allowed through
+    once the bucket is full and leaves it in debt, delaying later callers.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                needed = min(amount, self.burst)
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
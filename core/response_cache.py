@@ -0,0 +1,117 @@
+"""
+Disk-backed cache for API responses (Scryfall search pages and the card-name
+catalog).
+
+Bodies are stored zlib-compressed in SQLite together with their ``ETag`` /
+``Last-Modified`` validators.  Entries younger than *ttl* seconds are served
+without touching the network; older ones are revalidated with a conditional
+request.  The least recently used entries are evicted once the compressed
+bodies exceed *max_bytes*.
+"""
+import os, sqlite3, threading, time, zlib
+from collections import namedtuple
+
+CachedResponse = namedtuple('CachedResponse', 'body etag last_modified fresh')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL,
+    accessed_at REAL,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses(accessed_at);
+'''
+
+
+# Key of Scryfall's card-name catalog.
+CATALOG_KEY = 'catalog:card-names'
+
+
+def search_key(query, page):
+    """Cache key for a search page; queries differing only in case or spacing share it."""
+    return f"search:{' '.join(query.lower().split())}:{page}"
+
+
+class ResponseCache:
+    def __init__(self, path, ttl=3600, max_bytes=50 * 2**20):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, key, ttl=None):
+        """
+        Return a ``CachedResponse`` for *key* or ``None``; counts a hit only
+        when fresh.  *ttl* overrides the cache's for this lookup.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self._db.commit()
+            fresh = now - row[3] < (self.ttl if ttl is None else ttl)
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return CachedResponse(zlib.decompress(row[0]), row[1], row[2], fresh)
+
+    def put(self, key, body, etag=None, last_modified=None):
+        blob = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, blob, etag, last_modified, now, now, len(blob)))
+            self._size += len(blob) - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def mark_revalidated(self, key):
+        """The server answered 304: the stored body is fresh for another *ttl*."""
+        now = time.time()
+        with self._lock:
+            self.revalidated += 1
+            self._db.execute('UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?',
+                             (now, now, key))
+            self._db.commit()
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            row = self._db.execute(
+                'SELECT key, size FROM responses ORDER BY accessed_at LIMIT 1').fetchone()
+            if row is None:
+                break
+            self._db.execute('DELETE FROM responses WHERE key = ?', (row[0],))
+            self._size -= row[1]
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._db.commit()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses, 'revalidated': self.revalidated,
+                    'evictions': self.evictions, 'entries': entries, 'bytes': self._size}
@@ -2,55 +2,240 @@ import requests
 import json
 import csv
 import io
+from concurrent.futures import ThreadPoolExecutor
+
+from core.collection_index import CollectionIndex
+from core.http_client import get_client
+from core.instrumentation import traced
+from core.response_cache import CATALOG_KEY, search_key
+from core.scryfall_query import PRINTING_FIELDS, QueryError, compile_filter, query_fields
 
 class ScryfallAPI:
     BASE_URL = 'https://api.scryfall.com/cards/search'
+    COLLECTION_URL = 'https://api.scryfall.com/cards/collection'
+    COLLECTION_BATCH_SIZE = 75
+    CATALOG_URL = 'https://api.scryfall.com/catalog/card-names'
+    # The name catalog only grows with set releases; a week-old copy is
+    # good enough for completion.
+    CATALOG_TTL = 7 * 24 * 3600
     ARCHIDEKT_BASE_URL = 'https://archidekt.com'
+    # Rows per export page.  Only one page of CSV text is held at a time and
+    # the next one downloads while it is parsed, so pages can stay large
+    # enough that round trips do not dominate.
+    ARCHIDEKT_PAGE_SIZE = 10000
+    PAGE_SIZE = 175
+    MAX_PAGE_WORKERS = 4
+
+    def __init__(self, card_index=None, card_store=None, http=None, response_cache=None):
+        # When set, searches are answered from the offline bulk-data index.
+        self.card_index = card_index
+        # CardIndex persisting cards resolved through /cards/collection.
+        self.card_store = card_store
+        self._http = http
+        # ResponseCache for search pages; fresh entries skip the network.
+        self.response_cache = response_cache
+
+    @property
+    def http(self):
+        # Rate limiting to Scryfall's 10 req/s happens per host in the client.
+        return self._http or get_client()
 
+    @traced('api.search', 'api')
     def search(self, query, page=1):
-        params = {'q': query, 'page': page}
-        resp = requests.get(self.BASE_URL, params=params)
-        resp.raise_for_status()
+        if self.card_index is not None:
+            return self.card_index.search(query, page)
+        return self._get_json(self.BASE_URL, {'q': query, 'page': page}, search_key(query, page))
+
+    @traced('api.card_names', 'api')
+    def card_names(self):
+        """
+        Every card name Scryfall knows, from ``/catalog/card-names``.  The
+        catalog is kept in the response cache for ``CATALOG_TTL``; when it
+        cannot be refreshed the stale copy is returned.
+        """
+        return self._get_json(self.CATALOG_URL, None, CATALOG_KEY, self.CATALOG_TTL, stale_ok=True).get('data', [])
+
+    def _get_json(self, url, params, key, ttl=None, stale_ok=False):
+        if self.response_cache is None:
+            resp = self.http.get(url, params=params)
+            resp.raise_for_status()
+            return resp.json()
+
+        cached = self.response_cache.get(key, ttl)
+        if cached is not None and cached.fresh:
+            return json.loads(cached.body)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        try:
+            resp = self.http.get(url, params=params, headers=headers)
+            if resp.status_code == 304 and cached is not None:
+                self.response_cache.mark_revalidated(key)
+                return json.loads(cached.body)
+            resp.raise_for_status()
+        except requests.exceptions.RequestException:
+            if stale_ok and cached is not None:
+                return json.loads(cached.body)
+            raise
+        self.response_cache.put(key, resp.content, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
         return resp.json()
 
-    def filtered_search(self, query, collection_names):
-        page, results = 1, []
-        while True:
-            data = self.search(query, page)
-            for card in data.get('data', []):
-                if card.get('name') in collection_names:
-                    results.append(card)
-            if not data.get('has_more'):
-                break
-            page += 1
-        return results
+    def _page_count(self, data):
+        return (data.get('total_cards', 0) - 1) // self.PAGE_SIZE + 1
 
-    def get_archidekt_collection_from_api(self, collection_id):
-        all_cards = []
-        page = 1
-        has_more = True
+    def iter_search_pages(self, query, cancelled=None, first=None, progress=None):
+        """
+        Yield every result page of *query* in order.  Page 1 (fetched here
+        unless passed in as *first*) tells us ``total_cards``; the remaining
+        pages are fetched concurrently and handed out as soon as all earlier
+        pages have arrived.  *cancelled* is an optional callable checked
+        between pages; *progress* is called with ``(pages_done, pages)``.
+        """
+        if first is None:
+            first = self.search(query, 1)
+        last_page = self._page_count(first) if first.get('has_more') else 1
+        if progress is not None:
+            progress(1, last_page)
+        yield first
+        if last_page == 1:
+            return
+        pool = ThreadPoolExecutor(max_workers=self.MAX_PAGE_WORKERS)
+        try:
+            futures = [pool.submit(self.search, query, page) for page in range(2, last_page + 1)]
+            for page, future in enumerate(futures, 2):
+                if cancelled is not None and cancelled():
+                    return
+                data = future.result()
+                if progress is not None:
+                    progress(page, last_page)
+                yield data
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
-        while has_more:
+    def iter_filtered_search(self, query, collection, cancelled=None, progress=None):
+        """
+        Yield lists of cards matching *query* that are in *collection*, a
+        ``CollectionIndex`` (or a set of card names), annotated with
+        ``owned_quantity`` and ``owned_printing_quantity``.
+
+        Two strategies are available: page through the whole search result
+        and keep the owned cards, or resolve the owned cards through
+        ``/cards/collection`` and evaluate the query locally.  The one needing
+        fewer requests is used; the second only when the query can be
+        evaluated locally and tests no printing-level field (``set:``,
+        ``r:``), as the collection lookup returns one arbitrary printing.
+        """
+        owned = collection if isinstance(collection, CollectionIndex) else CollectionIndex.from_names(collection)
+        collection_names = owned.names()
+        first = None
+        if self.card_index is None and collection_names:
             try:
-                json_response = self._fetch_archidekt_page(collection_id, page)
+                predicate = None if query_fields(query) & PRINTING_FIELDS else compile_filter(query)
+            except QueryError:
+                predicate = None  # needs Scryfall's full syntax
+            if predicate is not None:
+                batch_requests = self.estimate_collection_requests(collection_names)
+                if batch_requests > 1:
+                    first = self.search(query, 1)
+                if first is None or batch_requests < self._page_count(first) - 1:
+                    cards = self.resolve_collection(collection_names)
+                    if progress is not None:
+                        progress(1, 1)
+                    yield sorted(owned.join(c for c in cards if predicate(c)), key=lambda c: c.get('name', ''))
+                    return
+        for data in self.iter_search_pages(query, cancelled, first, progress):
+            yield owned.join(data.get('data', []))
+
+    def filtered_search(self, query, collection):
+        return [card for cards in self.iter_filtered_search(query, collection) for card in cards]
+
+    def estimate_collection_requests(self, names):
+        known = self.card_store.lookup_names(names) if self.card_store is not None else {}
+        missing = sum(1 for name in names if name not in known)
+        return -(-missing // self.COLLECTION_BATCH_SIZE)
+
+    @traced('api.resolve_collection', 'api')
+    def resolve_collection(self, names):
+        """
+        Return card objects for *names*, requesting the ones the card store
+        does not know yet from ``/cards/collection`` in batches of 75.
+        """
+        known = self.card_store.lookup_names(names) if self.card_store is not None else {}
+        missing = [name for name in names if name not in known]
+        batches = [missing[i:i + self.COLLECTION_BATCH_SIZE]
+                   for i in range(0, len(missing), self.COLLECTION_BATCH_SIZE)]
+        resolved, aliases = [], []
+        with ThreadPoolExecutor(max_workers=self.MAX_PAGE_WORKERS) as pool:
+            for batch, data in zip(batches, pool.map(self._fetch_collection_batch, batches)):
+                cards = data.get('data', [])
+                resolved.extend(cards)
+                aliases.extend(self._collection_aliases(batch, cards))
+        if self.card_store is not None and batches:
+            self.card_store.add_cards(resolved)
+            self.card_store.add_aliases(aliases)
+
+        cards, seen = [], set()
+        for card in [c for c in known.values() if c is not None] + resolved:
+            if card.get('id') not in seen:
+                seen.add(card.get('id'))
+                cards.append(card)
+        return cards
+
+    @traced('api.collection_batch', 'api')
+    def _fetch_collection_batch(self, names):
+        resp = self.http.post(self.COLLECTION_URL, json={'identifiers': [{'name': n} for n in names]})
+        resp.raise_for_status()
+        return resp.json()
+
+    @staticmethod
+    def _collection_aliases(names, cards):
+        # /cards/collection does not say which identifier produced which card;
+        # a name matches a card by its full name or one of its face names.
+        by_name = {}
+        for card in cards:
+            by_name[card.get('name', '').lower()] = card.get('id')
+            for face in card.get('card_faces') or ():
+                by_name.setdefault(face.get('name', '').lower(), card.get('id'))
+        # Names that did not resolve are remembered as missing (None).
+        return [(name, by_name.get(name.lower())) for name in names]
+
+    def iter_archidekt_pages(self, collection_id, cancelled=None):
+        """
+        Yield the CSV text of each export page.  The next page is requested
+        as soon as the current one says there is more, so it downloads
+        while the caller parses.
+        """
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(self._fetch_archidekt_page, collection_id, 1)
+            page = 1
+            while future is not None:
+                json_response = future.result()
                 csv_content = json_response.get('content')
                 has_more = json_response.get('moreContent', False)
-
+                del json_response
                 if not csv_content:
-                    break
+                    return
+                future = None
+                if has_more and not (cancelled is not None and cancelled()):
+                    page += 1
+                    future = pool.submit(self._fetch_archidekt_page, collection_id, page)
+                yield csv_content
 
-                cards = self._parse_archidekt_csv(csv_content)
-                all_cards.extend(cards)
-                
+    def get_archidekt_collection_from_api(self, collection_id):
+        all_cards = []
+        try:
+            for page, csv_content in enumerate(self.iter_archidekt_pages(collection_id), 1):
+                all_cards.extend(self._parse_archidekt_csv(csv_content))
                 print(f"Fetched page {page}. Total cards so far: {len(all_cards)}")
-                page += 1
-
-            except requests.exceptions.RequestException as e:
-                print(f"Error fetching Archidekt collection from API on page {page}: {e}")
-                return []
-        
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching Archidekt collection from API: {e}")
+            return []
         return all_cards
 
+    @traced('api.archidekt_page', 'api')
     def _fetch_archidekt_page(self, collection_id, page):
         url = f"{self.ARCHIDEKT_BASE_URL}/api/collection/export/v2/{collection_id}/"
         headers = {
@@ -66,9 +251,9 @@ class ScryfallAPI:
             ],
             "page": page,
             "game": 1,
-            "pageSize": 10000
+            "pageSize": self.ARCHIDEKT_PAGE_SIZE
         }
-        resp = requests.post(url, headers=headers, data=json.dumps(payload))
+        resp = self.http.post(url, headers=headers, data=json.dumps(payload))
         resp.raise_for_status()
         return resp.json()
 
@@ -0,0 +1,383 @@
+"""
+Parser for the subset of the Scryfall search syntax that can be answered
+locally: bare / quoted / ``!exact`` names, ``t:``, ``o:``, ``c:``, ``id:``,
+``cmc``/``mv``, ``set:`` and ``r:``, combined with implicit AND, ``or``,
+``-`` negation and parentheses.
+
+``parse()`` returns a small node tree; ``to_sql()`` turns it into a WHERE
+clause over the ``cards`` table of ``core.card_index`` and ``compile_filter()``
+into a predicate over card dicts, for filtering cards already held locally.
+``query_fields()`` tells which fields a query looks at: terms on
+``PRINTING_FIELDS`` depend on the printing, not just the card.
+"""
+import operator, re
+
+COLOR_BITS = {'w': 1, 'u': 2, 'b': 4, 'r': 8, 'g': 16}
+COLOR_NAMES = {
+    'white': 'w', 'blue': 'u', 'black': 'b', 'red': 'r', 'green': 'g',
+    'azorius': 'wu', 'dimir': 'ub', 'rakdos': 'br', 'gruul': 'rg', 'selesnya': 'gw',
+    'orzhov': 'wb', 'izzet': 'ur', 'golgari': 'bg', 'boros': 'rw', 'simic': 'gu',
+}
+RARITIES = {'common': 0, 'uncommon': 1, 'rare': 2, 'special': 3, 'mythic': 4, 'bonus': 5}
+RARITY_ALIASES = {'c': 'common', 'u': 'uncommon', 'r': 'rare', 'm': 'mythic', 's': 'special'}
+
+FIELD_ALIASES = {
+    't': 'type', 'type': 'type',
+    'o': 'oracle', 'oracle': 'oracle',
+    'c': 'color', 'color': 'color', 'colour': 'color',
+    'id': 'identity', 'identity': 'identity', 'ci': 'identity',
+    'cmc': 'cmc', 'mv': 'cmc', 'manavalue': 'cmc',
+    's': 'set', 'set': 'set', 'e': 'set', 'edition': 'set',
+    'r': 'rarity', 'rarity': 'rarity',
+    'name': 'name',
+}
+# Fields that differ between printings of the same card.
+PRINTING_FIELDS = frozenset({'set', 'rarity'})
+
+_TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<neg>-)(?=\S)
+  | (?P<term>
+        (?P<key>[A-Za-z]+)(?P<op>!=|>=|<=|:|=|>|<)(?P<val>"[^"]*"|[^\s()]+)
+      | (?P<exact>!)?(?P<word>"[^"]*"|[^\s()]+)
+    )
+''', re.VERBOSE)
+
+
+_OPERATORS = {
+    ':': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '>=': operator.ge, '<=': operator.le, '>': operator.gt, '<': operator.lt,
+}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def color_mask(colors):
+    mask = 0
+    for c in colors or ():
+        mask |= COLOR_BITS.get(c.lower(), 0)
+    return mask
+
+
+def card_fields(card):
+    """The searchable fields of a Scryfall card dict, normalised for matching."""
+    faces = card.get('card_faces') or []
+    oracle_text = card.get('oracle_text')
+    if oracle_text is None and faces:
+        oracle_text = '\n//\n'.join(f.get('oracle_text', '') for f in faces)
+    type_line = card.get('type_line') or ' // '.join(f.get('type_line', '') for f in faces)
+    colors = card.get('colors')
+    if colors is None and faces:
+        colors = {c for f in faces for c in f.get('colors', ())}
+    return {
+        'name': card.get('name', '').lower(),
+        'type_line': type_line.lower(),
+        'oracle_text': (oracle_text or '').lower(),
+        'colors': color_mask(colors),
+        'color_identity': color_mask(card.get('color_identity')),
+        'cmc': float(card.get('cmc') or 0),
+        'set_code': (card.get('set') or '').lower(),
+        'rarity': RARITIES.get(card.get('rarity'), 0),
+    }
+
+
+class And:
+    def __init__(self, children):
+        self.children = children
+
+    def to_sql(self):
+        parts = [c.to_sql() for c in self.children]
+        return '(' + ' AND '.join(p[0] for p in parts) + ')', [a for p in parts for a in p[1]]
+
+    def match(self, fields):
+        return all(c.match(fields) for c in self.children)
+
+
+class Or:
+    def __init__(self, children):
+        self.children = children
+
+    def to_sql(self):
+        parts = [c.to_sql() for c in self.children]
+        return '(' + ' OR '.join(p[0] for p in parts) + ')', [a for p in parts for a in p[1]]
+
+    def match(self, fields):
+        return any(c.match(fields) for c in self.children)
+
+
+class Not:
+    def __init__(self, child):
+        self.child = child
+
+    def to_sql(self):
+        sql, args = self.child.to_sql()
+        return f'(NOT {sql})', args
+
+    def match(self, fields):
+        return not self.child.match(fields)
+
+
+class Term:
+    def __init__(self, field, op, value):
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def to_sql(self):
+        return getattr(self, f'_sql_{self.field}')()
+
+    def match(self, fields):
+        return getattr(self, f'_match_{self.field}')(fields)
+
+    # -- text fields ---------------------------------------------------
+    def _text_sql(self, column):
+        value = self.value.lower()
+        if self.op == '=':
+            return f'{column}_lc = ?', [value]
+        return f'instr({column}_lc, ?) > 0', [value]
+
+    def _text_match(self, text):
+        value = self.value.lower()
+        return text == value if self.op == '=' else value in text
+
+    def _sql_name(self):
+        return self._text_sql('name')
+
+    def _sql_type(self):
+        return self._text_sql('type_line')
+
+    def _sql_oracle(self):
+        return self._text_sql('oracle_text')
+
+    def _match_name(self, fields):
+        return self._text_match(fields['name'])
+
+    def _match_type(self, fields):
+        return self._text_match(fields['type_line'])
+
+    def _match_oracle(self, fields):
+        return self._text_match(fields['oracle_text'])
+
+    # -- colours -------------------------------------------------------
+    def _color_operands(self, column):
+        """Return ``(special, op, mask)``; *special* is "m" / "c" for multicolour / colourless."""
+        value = self.value.lower()
+        value = COLOR_NAMES.get(value, value)
+        if value in ('m', 'multicolor'):
+            return 'm', None, None
+        if value in ('c', 'colorless'):
+            return 'c', None, None
+        mask = 0
+        for ch in value:
+            if ch not in COLOR_BITS:
+                raise QueryError(f'Unknown colour "{self.value}"')
+            mask |= COLOR_BITS[ch]
+        op = self.op
+        if op == ':':
+            # Scryfall treats c: as "at least these colours" and id: as "fits within"
+            op = '<=' if column == 'color_identity' else '>='
+        return None, op, mask
+
+    def _color_sql(self, column):
+        special, op, mask = self._color_operands(column)
+        if special == 'm':
+            return f'(({column} & ({column} - 1)) != 0)', []
+        if special == 'c':
+            return f'{column} = 0', []
+        superset = f'(({column} & {mask}) = {mask})'
+        subset = f'(({column} & ~{mask}) = 0)'
+        return {
+            '=': f'{column} = {mask}',
+            '!=': f'{column} != {mask}',
+            '>=': superset,
+            '<=': subset,
+            '>': f'({superset} AND {column} != {mask})',
+            '<': f'({subset} AND {column} != {mask})',
+        }[op], []
+
+    def _color_match(self, column, colors):
+        special, op, mask = self._color_operands(column)
+        if special == 'm':
+            return colors & (colors - 1) != 0
+        if special == 'c':
+            return colors == 0
+        superset = colors & mask == mask
+        subset = colors & ~mask == 0
+        return {
+            '=': colors == mask,
+            '!=': colors != mask,
+            '>=': superset,
+            '<=': subset,
+            '>': superset and colors != mask,
+            '<': subset and colors != mask,
+        }[op]
+
+    def _sql_color(self):
+        return self._color_sql('colors')
+
+    def _sql_identity(self):
+        return self._color_sql('color_identity')
+
+    def _match_color(self, fields):
+        return self._color_match('colors', fields['colors'])
+
+    def _match_identity(self, fields):
+        return self._color_match('color_identity', fields['color_identity'])
+
+    # -- numeric / exact fields ----------------------------------------
+    def _compare(self, column, value):
+        op = '=' if self.op == ':' else self.op
+        return f'{column} {op} ?', [value]
+
+    def _cmc_value(self):
+        try:
+            return float(self.value)
+        except ValueError:
+            raise QueryError(f'Invalid mana value "{self.value}"') from None
+
+    def _rarity_value(self):
+        name = RARITY_ALIASES.get(self.value.lower(), self.value.lower())
+        if name not in RARITIES:
+            raise QueryError(f'Unknown rarity "{self.value}"')
+        return RARITIES[name]
+
+    def _sql_cmc(self):
+        return self._compare('cmc', self._cmc_value())
+
+    def _sql_set(self):
+        return self._compare('set_code', self.value.lower())
+
+    def _sql_rarity(self):
+        return self._compare('rarity', self._rarity_value())
+
+    def _match_cmc(self, fields):
+        return _OPERATORS[self.op](fields['cmc'], self._cmc_value())
+
+    def _match_set(self, fields):
+        return _OPERATORS[self.op](fields['set_code'], self.value.lower())
+
+    def _match_rarity(self, fields):
+        return _OPERATORS[self.op](fields['rarity'], self._rarity_value())
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def _tokenize(query):
+    pos, tokens = 0, []
+    while pos < len(query):
+        m = _TOKEN_RE.match(query, pos)
+        if not m:
+            raise QueryError(f'Unexpected character at position {pos}: "{query[pos]}"')
+        pos = m.end()
+        if m.group('ws'):
+            continue
+        if m.group('lparen'):
+            tokens.append(('(', None))
+        elif m.group('rparen'):
+            tokens.append((')', None))
+        elif m.group('neg'):
+            tokens.append(('-', None))
+        elif m.group('key'):
+            key = m.group('key').lower()
+            if key not in FIELD_ALIASES:
+                raise QueryError(f'Unsupported search keyword "{key}"')
+            tokens.append(('term', Term(FIELD_ALIASES[key], m.group('op'), _unquote(m.group('val')))))
+        else:
+            word = _unquote(m.group('word'))
+            if not m.group('exact') and word.lower() in ('or', 'and'):
+                tokens.append((word.lower(), None))
+            else:
+                tokens.append(('term', Term('name', '=' if m.group('exact') else ':', word)))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def next(self):
+        tok = self.tokens[self.pos]
+        self.pos += 1
+        return tok
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QueryError('Unbalanced parentheses')
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == 'or':
+            self.next()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self):
+        children = []
+        while self.peek() not in (None, ')', 'or'):
+            if self.peek() == 'and':
+                self.next()
+                continue
+            children.append(self.parse_unary())
+        if not children:
+            raise QueryError('Empty expression')
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_unary(self):
+        kind, value = self.next()
+        if kind == '-':
+            return Not(self.parse_unary())
+        if kind == '(':
+            node = self.parse_or()
+            if self.peek() != ')':
+                raise QueryError('Unbalanced parentheses')
+            self.next()
+            return node
+        if kind == 'term':
+            return value
+        raise QueryError(f'Unexpected "{kind}"')
+
+
+def parse(query):
+    tokens = _tokenize(query)
+    if not tokens:
+        raise QueryError('Empty query')
+    return _Parser(tokens).parse()
+
+
+def to_sql(query):
+    return parse(query).to_sql()
+
+
+def query_fields(query):
+    """The set of fields the terms of *query* test."""
+    found, nodes = set(), [parse(query)]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, Term):
+            found.add(node.field)
+        elif isinstance(node, Not):
+            nodes.append(node.child)
+        else:
+            nodes.extend(node.children)
+    return found
+
+
+def compile_filter(query):
+    """Return a predicate ``f(card) -> bool`` equivalent to searching for *query*."""
+    node = parse(query)
+    node.to_sql()  # surface QueryErrors (bad colours, rarities, ...) up front
+    return lambda card: node.match(card_fields(card))
@@ -0,0 +1,109 @@
+from PyQt6 import QtCore
+
+from core.collection import sync_archidekt
+from core.collection_index import CollectionIndex
+
+
+class SearchWorkerSignals(QtCore.QObject):
+    # Every signal carries the generation of the request that produced it so
+    # the receiver can drop results of a query that has since been replaced.
+    page_ready = QtCore.pyqtSignal(int, list)
+    result = QtCore.pyqtSignal(int, object)
+    # (generation, pages done, pages in total or 0 when not known yet)
+    progress = QtCore.pyqtSignal(int, int, int)
+    finished = QtCore.pyqtSignal(int)
+    failed = QtCore.pyqtSignal(int, str)
+
+
+class CallWorker(QtCore.QRunnable):
+    """
+    Runs *fn* off the GUI thread and emits its return value as ``result``.
+    Once the optional *cancelled* callable returns true a worker still
+    waiting in the pool does nothing, and one already running emits nothing.
+    """
+
+    def __init__(self, fn, generation, signals, cancelled=None):
+        super().__init__()
+        self.fn = fn
+        self.generation = generation
+        self.signals = signals
+        self.cancelled = cancelled
+
+    def _cancelled(self):
+        return self.cancelled is not None and self.cancelled()
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        if self._cancelled():
+            return
+        try:
+            value = self.fn()
+        except Exception as e:
+            if not self._cancelled():
+                self.signals.failed.emit(self.generation, str(e))
+            return
+        if self._cancelled():
+            return
+        self.signals.result.emit(self.generation, value)
+        self.signals.finished.emit(self.generation)
+
+
+class FilteredSearchWorker(QtCore.QRunnable):
+    """Runs ``ScryfallAPI.iter_filtered_search`` and streams each page's matches."""
+
+    def __init__(self, api, query, collection, generation, signals, cancelled=None):
+        super().__init__()
+        self.api = api
+        self.query = query
+        self.collection = collection
+        self.generation = generation
+        self.signals = signals
+        self.cancelled = cancelled
+
+    def _progress(self, done, total):
+        self.signals.progress.emit(self.generation, done, total)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            for cards in self.api.iter_filtered_search(
+                    self.query, self.collection, self.cancelled, self._progress):
+                if self.cancelled is not None and self.cancelled():
+                    return
+                self.signals.page_ready.emit(self.generation, cards)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.finished.emit(self.generation)
+
+
+class ArchidektWorker(QtCore.QRunnable):
+    """
+    Syncs an Archidekt collection into *store* (a ``CollectionStore``) and
+    emits ``(CollectionIndex, pages, changed_pages)`` as ``result``.
+    """
+
+    def __init__(self, api, collection_id, generation, signals, store, cancelled=None):
+        super().__init__()
+        self.api = api
+        self.collection_id = collection_id
+        self.generation = generation
+        self.signals = signals
+        self.store = store
+        self.cancelled = cancelled
+
+    def _progress(self, pages, changed):
+        self.signals.progress.emit(self.generation, pages, 0)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            synced = sync_archidekt(self.api, self.store, self.collection_id, self.cancelled, self._progress)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        if synced is None:
+            return
+        collection, pages, changed = synced
+        self.signals.result.emit(self.generation, (CollectionIndex(collection), pages, changed))
+        self.signals.finished.emit(self.generation)
@@ -0,0 +1,241 @@
+"""
+Packed store of pre-scaled thumbnails, for painting a warm page without
+touching the image cache.
+
+Thumbnails for a fixed set of thumbnail widths are kept as raw
+``ARGB32_Premultiplied`` pixels in fixed-size slots of one file, which is
+memory-mapped in segments.  A small index file maps ``(sha1(url), box
+width, box height)`` to the slot's offset and the image's own size; it is
+read into a dict when the atlas is opened and appended to as thumbnails
+are added.  ``get`` wraps the mapped pixels in a ``QImage`` without copying
+them, so showing a cached page costs no file opens, reads or decodes.
+
+Mappings stay in place until ``close``: images handed out by ``get`` point
+into them, and are meant to be painted and dropped, not kept.  Once the
+atlas reaches its byte budget it starts a new generation: the index is
+emptied and slots are reused from the start of the file, so the oldest
+thumbnails make room for new ones.  That waits until no image handed out
+is referenced any more; until then new thumbnails are not added.
+
+One process at a time has an atlas open, under an exclusive lock on
+``<path>.lock``; opening it elsewhere raises ``AtlasInUse``.  ``clear``
+does not touch the files, which a running app may have mapped: it marks
+the atlas to start over the next time it is opened.
+
+    python -m core.thumb_atlas report resources/cache.atlas
+    python -m core.thumb_atlas clear resources/cache.atlas
+"""
+import argparse, ctypes, hashlib, mmap, os, struct, threading, weakref
+
+from PyQt6 import QtGui, sip
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_FORMAT = QtGui.QImage.Format.Format_ARGB32_Premultiplied
+_MAGIC = b'THA1'
+# sha1 digest, box width, box height, image width, image height, offset
+_RECORD = struct.Struct('<20sHHHHQ')
+
+
+class AtlasInUse(OSError):
+    """The atlas is open in another process."""
+
+
+def _try_lock(f):
+    """Lock the open file *f* exclusively without waiting; ``False`` when another process holds it."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def clear(path):
+    """Have the atlas at *path* start over the next time it is opened; safe while it is open."""
+    open(f'{path}.reset', 'wb').close()
+
+
+class ThumbAtlas:
+    # Mapped in segments so that the file can grow without moving (and
+    # invalidating) pixels that images already point at.
+    SEGMENT_BYTES = 16 * 2**20
+
+    def __init__(self, path, widths=(100, 120, 146, 180, 240), max_bytes=512 * 2**20):
+        self.path = path
+        self.widths = frozenset(widths)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.generations = 0  # times the budget was reached and slots reused
+        self._lock = threading.Lock()
+        self._segments = []  # (mmap, pin keeping its buffer exported, base address)
+        self._index = {}     # (digest, box w, box h) -> (offset, image w, image h)
+        self._images = {}    # id(weakref) -> weakref of each image handed out and still alive
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock_file = open(f'{path}.lock', 'a+b')
+        if not _try_lock(self._lock_file):
+            self._lock_file.close()
+            raise AtlasInUse(f'{path} is open in another process')
+        self._data = open(path, 'a+b')
+        self._log = open(f'{path}.idx', 'a+b')
+        self._end = 0
+        self._load()
+
+    def _load(self):
+        if os.path.exists(f'{self.path}.reset'):  # asked for by clear()
+            self._reset()
+            os.remove(f'{self.path}.reset')
+            return
+        self._log.seek(0)
+        raw = self._log.read()
+        size = os.fstat(self._data.fileno()).st_size
+        if not raw.startswith(_MAGIC) or size % self.SEGMENT_BYTES:
+            self._reset()
+            return
+        for start in range(len(_MAGIC), len(raw) - _RECORD.size + 1, _RECORD.size):
+            digest, bw, bh, w, h, offset = _RECORD.unpack_from(raw, start)
+            if offset + bw * bh * 4 <= size:  # a torn tail record is ignored
+                self._index[digest, bw, bh] = (offset, w, h)
+                self._end = max(self._end, offset + bw * bh * 4)
+        for start in range(0, size, self.SEGMENT_BYTES):
+            self._map(start)
+
+    def _reset(self):
+        self._data.truncate(0)
+        self._log.truncate(0)
+        self._log.write(_MAGIC)
+        self._log.flush()
+        self._index.clear()
+        self._end = 0
+
+    def _map(self, start):
+        mm = mmap.mmap(self._data.fileno(), self.SEGMENT_BYTES, offset=start)
+        pin = ctypes.c_char.from_buffer(mm)
+        self._segments.append((mm, pin, ctypes.addressof(pin)))
+
+    @staticmethod
+    def _key(url, size):
+        return hashlib.sha1(url.encode()).digest(), size.width(), size.height()
+
+    def accepts(self, size):
+        return size.width() in self.widths
+
+    def contains(self, url, size):
+        return self.accepts(size) and self._key(url, size) in self._index
+
+    def get(self, url, size):
+        """The thumbnail of *url* for the box *size*, as a ``QImage`` over the mapped pixels, or ``None``."""
+        if not self.accepts(size):
+            return None
+        key = self._key(url, size)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            offset, w, h = entry
+            _, _, base = self._segments[offset // self.SEGMENT_BYTES]
+            image = QtGui.QImage(sip.voidptr(base + offset % self.SEGMENT_BYTES), w, h, w * 4, _FORMAT)
+            ref = weakref.ref(image, self._released)
+            self._images[id(ref)] = ref
+        return image
+
+    def _released(self, ref):
+        self._images.pop(id(ref), None)
+
+    def put(self, url, image, size):
+        """Keep *image*, *url* scaled into the box *size*; ignored for other widths."""
+        if not self.accepts(size) or image.width() > size.width() or image.height() > size.height():
+            return False
+        if image.format() != _FORMAT:
+            image = image.convertToFormat(_FORMAT)
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        key = self._key(url, size)
+        slot = size.width() * size.height() * 4
+        with self._lock:
+            if self._data.closed:
+                return False
+            entry = self._index.get(key)
+            offset = entry[0] if entry is not None else self._allocate(slot)
+            if offset is None:
+                return False
+            mm = self._segments[offset // self.SEGMENT_BYTES][0]
+            start = offset % self.SEGMENT_BYTES
+            mm[start:start + image.sizeInBytes()] = bits
+            self._index[key] = (offset, image.width(), image.height())
+            self._log.write(_RECORD.pack(*key, image.width(), image.height(), offset))
+            self._log.flush()
+        return True
+
+    def _allocate(self, slot):
+        offset = self._end
+        if offset // self.SEGMENT_BYTES != (offset + slot - 1) // self.SEGMENT_BYTES:
+            offset = (offset // self.SEGMENT_BYTES + 1) * self.SEGMENT_BYTES  # slots never straddle segments
+        if offset + slot > self.max_bytes:
+            if not self._end:
+                return None  # a slot larger than the whole budget
+            if self._images:
+                return None  # pixels still shown; tried again on the next put
+            # New generation: the mapped segments stay, their slots are reused.
+            self._index.clear()
+            self._log.truncate(len(_MAGIC))
+            self.generations += 1
+            offset = 0
+        while offset + slot > len(self._segments) * self.SEGMENT_BYTES:
+            start = len(self._segments) * self.SEGMENT_BYTES
+            self._data.truncate(start + self.SEGMENT_BYTES)
+            self._map(start)
+        self._end = offset + slot
+        return offset
+
+    def _unmap(self):
+        maps = [mm for mm, _, _ in self._segments]
+        self._segments = []  # releases the pins, so the maps can close
+        for mm in maps:
+            mm.close()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._index), 'bytes': self._end, 'budget': self.max_bytes,
+                    'segments': len(self._segments), 'generations': self.generations,
+                    'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        """Unmap the atlas and release its lock; images handed out must no longer be used."""
+        with self._lock:
+            self._index.clear()
+            self._unmap()
+            self._data.close()
+            self._log.close()
+            self._lock_file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or reset the thumbnail atlas')
+    parser.add_argument('command', choices=('report', 'clear'))
+    parser.add_argument('path', nargs='?', default='./resources/cache.atlas')
+    args = parser.parse_args(argv)
+    if args.command == 'clear':
+        clear(args.path)
+    try:
+        atlas = ThumbAtlas(args.path)
+    except AtlasInUse:
+        print(f'{args.path} is in use; it starts over when next opened' if args.command == 'clear'
+              else f'{args.path} is in use')
+        return
+    for key, value in atlas.stats().items():
+        print(f'{key:10} {value}')
+    atlas.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,48 @@
 class GalleryConfig:
     THUMB_WIDTH = 120
     ASPECT_RATIO = 168 / 120
-    RESIZE_DELAY = 300
     CACHE_DIR = './resources/cache'
+    INDEX_PATH = './resources/cards.sqlite'
+    CARD_STORE_PATH = './resources/collection_cards.sqlite'
+    COLLECTION_STORE_PATH = './resources/collections.sqlite'
+    RESPONSE_CACHE_PATH = './resources/responses.sqlite'
+    RESPONSE_CACHE_TTL = 6 * 3600
+    RESPONSE_CACHE_MAX_BYTES = 64 * 2**20
+    PIXMAP_CACHE_BYTES = 256 * 2**20
+    CACHE_MAX_BYTES = 2 * 2**30
+    CACHE_POLICY = 'lru'
+    RESIZE_DELAY = 150
+    # Search while typing, once no key was pressed for LIVE_SEARCH_DELAY ms
+    # and the query has at least LIVE_SEARCH_MIN_CHARS characters.
+    LIVE_SEARCH = False
+    LIVE_SEARCH_DELAY = 300
+    LIVE_SEARCH_MIN_CHARS = 3
+    # Card names offered while a name is typed into the query box.
+    NAME_COMPLETIONS = 10
+    IMAGE_LOAD_WORKERS = 6
+    # Paint a blurred preview, then the small variant, before the final thumbnail.
+    PROGRESSIVE_THUMBNAILS = True
+    # Prefetch of the next result page and its first screenful of thumbnails.
+    PREFETCH_WORKERS = 2
+    PREFETCH_BYTES_PER_SECOND = 2 * 2**20
+    # How downloaded images are kept on disk: 'original' (the downloaded
+    # bytes), 'webp' or 'png'.  Cache files are written after the thumbnail
+    # is shown unless CACHE_DEFER_WRITES is off.
+    CACHE_FORMAT = 'original'
+    CACHE_QUALITY = 85
+    CACHE_DEFER_WRITES = True
+    # Re-encode cached files into CACHE_TRANSCODE_FORMAT while no images load.
+    CACHE_TRANSCODE_IDLE = False
+    CACHE_TRANSCODE_FORMAT = 'webp'
+    # Pre-scaled thumbnails for these slider widths are packed into one
+    # memory-mapped file, so a warm page paints without reading the cache.
+    # The file is kept next to the cache directory (``<cache dir>.atlas``)
+    # unless a path is given; no widths turns the atlas off.
+    THUMB_ATLAS_PATH = None
+    THUMB_ATLAS_WIDTHS = (100, 120, 146, 180, 240)
+    THUMB_ATLAS_MAX_BYTES = 512 * 2**20
+    # Record timings of API calls, image loading and layout from startup
+    # (otherwise from the stats panel, F12); the panel refreshes every
+    # STATS_INTERVAL ms.
+    INSTRUMENTATION = False
+    STATS_INTERVAL = 250
@@ -6,7 +6,10 @@ else that needs it.
 from __future__ import annotations
 
 from PyQt6 import QtCore, QtGui, QtWidgets
-from core.image_loader import ImageLoader, ImageLoaderSignals
+from core.image_loader import ImageLoaderSignals
+from core.load_scheduler import DETAIL, get_scheduler
+from core.pixmap_cache import pixmap_cache
+from utils.helpers import IMAGE_WIDTHS, best_image_url, card_image_uris
 import os
 
 
@@ -29,7 +32,7 @@ class CardDetailDialog(QtWidgets.QDialog):
         super().__init__(parent, QtCore.Qt.WindowType.Dialog)
         self.setWindowTitle(card.get("name", "Card details"))
         self.setModal(True)
-        self._thread_pool = QtCore.QThreadPool.globalInstance()
+        self._scheduler = get_scheduler()
         self.image_loader_signals = ImageLoaderSignals()
         self.image_loader_signals.image_loaded.connect(self._on_image_loaded)
         self.image_loader_signals.image_error.connect(self._on_image_error)
@@ -62,8 +65,8 @@ class CardDetailDialog(QtWidgets.QDialog):
 
     def _set_pixmap_from_card(self, card: dict) -> None:
         """
-        Show the largest in-memory pixmap available, or download one through
-        ImageLoader when it is not cached yet.
+        Show the largest in-memory pixmap available, or queue a load with the
+        shared scheduler when it is not cached yet.
         """
         # 1) In-memory QPixmaps already attached to the card dict?
         for key in ("pixmap_lg", "pixmap_normal", "pixmap_small"):
@@ -72,34 +75,49 @@ class CardDetailDialog(QtWidgets.QDialog):
                 self._img_lbl.setPixmap(pix)
                 return  # nothing more to do
 
-        # 2) Otherwise: start an ImageLoader job
-        url = self._best_image_url(card)
+        url = self._best_image_url(card, self.devicePixelRatioF())
         if not url:
             self._img_lbl.setText("No image available")
             return
 
-        # display a temporary message while loading
-        self._img_lbl.setText("Loading …")
-
-        # Choose a reasonably large target size (pixels); ImageLoader will
+        # Choose a reasonably large target size (pixels); the loader will
         # keep the aspect ratio.
         target_size = QtCore.QSize(480, 672)
 
+        # 2) Decoded at this size earlier in the session (shared memory cache)?
+        if (pix := pixmap_cache.get(url, target_size)) is not None:
+            self._on_image_loaded(url, pix)
+            return
+
+        # 3) Otherwise: queue a load job, showing a smaller variant
+        # the gallery already decoded (if any) until the large one arrives.
+        preview = self._cached_preview(card, target_size)
+        if preview is not None:
+            self._img_lbl.setPixmap(preview)
+        else:
+            self._img_lbl.setText("Loading …")
+
         # make sure the cache directory exists
         os.makedirs(self._cache_dir, exist_ok=True)
 
-        loader = ImageLoader(
-            url=url,
-            cache_dir=self._cache_dir,
-            thumb_size=target_size,
-            signals=self.image_loader_signals,
+        self._scheduler.submit(
+            url,
+            self._cache_dir,
+            target_size,
+            self.image_loader_signals,
+            priority=DETAIL,
+            owner="detail",
         )
-        self._thread_pool.start(loader)
+
+    def done(self, result: int) -> None:
+        # Don't keep downloading the full-size image of a closed dialog.
+        self._scheduler.new_generation("detail")
+        super().done(result)
 
     @QtCore.pyqtSlot(str, QtGui.QPixmap)
     def _on_image_loaded(self, url: str, pixmap: QtGui.QPixmap) -> None:
         """
-        Slot connected to the ImageLoader’s finished signal.
+        Slot connected to the loader’s finished signal.
         """
         self._pixmap = pixmap
         self._img_lbl.setPixmap(pixmap)
@@ -110,16 +128,22 @@ class CardDetailDialog(QtWidgets.QDialog):
         self._img_lbl.setStyleSheet("color: red;")
 
     @staticmethod
-    def _best_image_url(card: dict) -> str | None:
-        uris = card.get("image_uris", {})
-        for key in ("png", "large", "normal", "small"):
-            if uris.get(key):
-                return uris[key]
-        faces = card.get("card_faces")
-        if faces:
-            for key in ("png", "large", "normal", "small"):
-                if faces[0].get("image_uris", {}).get(key):
-                    return faces[0]["image_uris"][key]
+    def _best_image_url(card: dict, device_pixel_ratio: float = 1.0) -> str | None:
+        """``large`` on normal screens, ``png`` on high-DPI ones."""
+        return best_image_url(card, IMAGE_WIDTHS["large"] * device_pixel_ratio)
+
+    @staticmethod
+    def _cached_preview(card: dict, size: QtCore.QSize) -> QtGui.QPixmap | None:
+        uris = card_image_uris(card)
+        for key in ("normal", "small"):
+            if uris.get(key) and (pix := pixmap_cache.largest(uris[key])) is not None:
+                pix = pix.scaled(
+                    size,
+                    QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                    QtCore.Qt.TransformationMode.FastTransformation,
+                )
+                # Decoded sources are kept as QImage.
+                return QtGui.QPixmap.fromImage(pix) if isinstance(pix, QtGui.QImage) else pix
         return None
 
     @staticmethod
@@ -0,0 +1,265 @@
+"""
+Model/view gallery: a ``QListView`` in icon mode whose delegate paints card
+thumbnails straight from the pixmap cache.  Only visible cells are painted,
+and the view reports which rows are on screen so the owner can load images
+for them (plus a prefetch margin) lazily.
+"""
+from __future__ import annotations
+
+import time
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from core.instrumentation import traced, tracer
+from utils.helpers import calculate_columns
+
+CardRole = QtCore.Qt.ItemDataRole.UserRole
+UrlRole = QtCore.Qt.ItemDataRole.UserRole + 1
+
+# Placeholder tints for a card's colour identity, before any image is known.
+SWATCH_COLORS = {
+    "W": QtGui.QColor(248, 246, 216), "U": QtGui.QColor(193, 215, 233), "B": QtGui.QColor(186, 177, 171),
+    "R": QtGui.QColor(228, 153, 119), "G": QtGui.QColor(163, 192, 149),
+}
+COLORLESS = QtGui.QColor(204, 194, 192)
+
+
+class CardListModel(QtCore.QAbstractListModel):
+    """List of Scryfall card dicts together with the image URL chosen for each."""
+
+    def __init__(self, url_for_card, parent=None):
+        super().__init__(parent)
+        self._url_for_card = url_for_card
+        self._cards: list[dict] = []
+        self._urls: list[str | None] = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._cards)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self._cards[index.row()].get("name", "")
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole:
+            card = self._cards[index.row()]
+            owned = card.get("owned_quantity")
+            if owned:
+                return f"{card.get('name', '')}\nOwned: {owned} ({card.get('owned_printing_quantity', 0)} of this printing)"
+            return card.get("name", "")
+        if role == CardRole:
+            return self._cards[index.row()]
+        if role == UrlRole:
+            return self._urls[index.row()]
+        return None
+
+    def set_cards(self, cards: list[dict]) -> None:
+        self.beginResetModel()
+        self._cards = list(cards)
+        self._urls = [self._url_for_card(card) for card in self._cards]
+        self.endResetModel()
+
+    def append_cards(self, cards: list[dict]) -> None:
+        if not cards:
+            return
+        first = len(self._cards)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(cards) - 1)
+        self._cards.extend(cards)
+        self._urls.extend(self._url_for_card(card) for card in cards)
+        self.endInsertRows()
+
+    def refresh_urls(self) -> None:
+        """Recompute the image URLs, e.g. after the thumbnail width changed."""
+        self._urls = [self._url_for_card(card) for card in self._cards]
+        if self._cards:
+            self.dataChanged.emit(self.index(0), self.index(len(self._cards) - 1), [UrlRole])
+
+    def url(self, row: int) -> str | None:
+        return self._urls[row]
+
+
+class CardDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    Paints the best image *pixmap_for(url, card)* has so far (a blurred
+    preview, a smaller variant or the final thumbnail; a ``QPixmap``, or a
+    ``QImage`` straight from the thumbnail atlas), an error message
+    from *error_for(url)*, or a placeholder tinted by the card's colour
+    identity with its name.  Cards annotated with ``owned_quantity`` get a
+    badge with the count.
+    """
+
+    def __init__(self, pixmap_for, error_for, parent=None):
+        super().__init__(parent)
+        self._pixmap_for = pixmap_for
+        self._error_for = error_for
+        self.thumb_size = QtCore.QSize(120, 168)
+
+    def sizeHint(self, option, index):
+        return self.thumb_size
+
+    def paint(self, painter, option, index):
+        rect = option.rect
+        url = index.data(UrlRole)
+        card = index.data(CardRole)
+        pix = self._pixmap_for(url, card) if url else None
+        if pix is not None:
+            x = rect.x() + (rect.width() - pix.width()) // 2
+            y = rect.y() + (rect.height() - pix.height()) // 2
+            if isinstance(pix, QtGui.QImage):
+                painter.drawImage(x, y, pix)
+            else:
+                painter.drawPixmap(x, y, pix)
+        else:
+            painter.save()
+            self._paint_swatch(painter, rect.adjusted(2, 2, -2, -2), card)
+            error = self._error_for(url) if url else "No image"
+            if error:
+                painter.setPen(QtGui.QColor("red"))
+                text = f"Error: {error}"
+            else:
+                painter.setPen(option.palette.color(QtGui.QPalette.ColorRole.Text))
+                text = index.data()
+            painter.drawText(rect.adjusted(6, 6, -6, -6),
+                             QtCore.Qt.AlignmentFlag.AlignCenter | QtCore.Qt.TextFlag.TextWordWrap, text)
+            painter.restore()
+        owned = card.get("owned_quantity")
+        if owned:
+            self._paint_badge(painter, rect, f"\u00d7{owned}")
+        if option.state & QtWidgets.QStyle.StateFlag.State_Selected:
+            painter.save()
+            painter.setPen(QtGui.QPen(option.palette.color(QtGui.QPalette.ColorRole.Highlight), 2))
+            painter.drawRect(rect.adjusted(1, 1, -1, -1))
+            painter.restore()
+
+    @staticmethod
+    def _paint_swatch(painter, rect, card):
+        colors = [SWATCH_COLORS[c] for c in "WUBRG" if c in (card.get("color_identity") or ())]
+        if not colors:
+            painter.fillRect(rect, COLORLESS)
+            return
+        step = rect.width() / len(colors)
+        for i, color in enumerate(colors):
+            left = rect.x() + round(i * step)
+            painter.fillRect(QtCore.QRect(left, rect.y(), rect.x() + round((i + 1) * step) - left, rect.height()),
+                             color)
+
+    @staticmethod
+    def _paint_badge(painter, rect, text):
+        painter.save()
+        metrics = painter.fontMetrics()
+        badge = QtCore.QRect(0, 0, metrics.horizontalAdvance(text) + 8, metrics.height() + 2)
+        badge.moveBottomRight(rect.adjusted(0, 0, -6, -6).bottomRight())
+        painter.fillRect(badge, QtGui.QColor(0, 0, 0, 170))
+        painter.setPen(QtGui.QColor("white"))
+        painter.drawText(badge, QtCore.Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+
+class CardGalleryView(QtWidgets.QListView):
+    cardActivated = QtCore.pyqtSignal(dict)
+    # Emitted (debounced) whenever the set of rows on screen may have changed.
+    viewportChanged = QtCore.pyqtSignal()
+    # updateGeometries calls during the current timer event (see timerEvent).
+    _geometry_updates = 0
+
+    def __init__(self, parent=None, spacing=10):
+        super().__init__(parent)
+        self.setViewMode(QtWidgets.QListView.ViewMode.IconMode)
+        self.setResizeMode(QtWidgets.QListView.ResizeMode.Adjust)
+        self.setMovement(QtWidgets.QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self._spacing = spacing
+
+        self._viewport_timer = QtCore.QTimer(self)
+        self._viewport_timer.setSingleShot(True)
+        self._viewport_timer.setInterval(30)
+        self._viewport_timer.timeout.connect(self.viewportChanged)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_viewport_changed)
+        self.doubleClicked.connect(self._on_double_clicked)
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.modelReset.connect(self._layout_now)
+        model.rowsInserted.connect(self._layout_now)
+        model.modelReset.connect(self._schedule_viewport_changed)
+        model.rowsInserted.connect(self._schedule_viewport_changed)
+
+    def set_thumb_size(self, size: QtCore.QSize) -> None:
+        self.itemDelegate().thumb_size = size
+        self.setGridSize(QtCore.QSize(size.width() + self._spacing, size.height() + self._spacing))
+        self._layout_now()
+        self._schedule_viewport_changed()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_viewport_changed()
+
+    def _layout_now(self, *args):
+        # Run the layout Qt schedules for a model or grid change here, as
+        # one timed pass, rather than inside whichever later paint, hit test
+        # or scroll first needs it.
+        with tracer.span('gallery.layout', 'ui'):
+            self.executeDelayedItemsLayout()
+
+    # Other layouts (after a resize, debounced by Qt) run from the view's
+    # delayed-layout timer; doItemsLayout is not a Python-overridable
+    # virtual.  A timer event counts as a layout pass when it reaches
+    # updateGeometries, which doItemsLayout calls last; the view's other
+    # timers (auto-scroll, delayed updates, edit triggers) are not recorded.
+    def timerEvent(self, event):
+        if not tracer.enabled:
+            super().timerEvent(event)
+            return
+        self._geometry_updates = 0
+        start = time.perf_counter()
+        super().timerEvent(event)
+        if self._geometry_updates:
+            tracer.complete('gallery.layout', 'ui', start, time.perf_counter() - start)
+
+    def updateGeometries(self):
+        super().updateGeometries()
+        self._geometry_updates += 1
+
+    @traced('gallery.paint', 'ui')
+    def paintEvent(self, event):
+        super().paintEvent(event)
+
+    def _schedule_viewport_changed(self, *args):
+        # Connected to signals with arguments; QTimer.start(int) would take
+        # the first one as its interval.
+        self._viewport_timer.start()
+
+    def _grid_shape(self) -> tuple[int, int]:
+        """Columns, and rows (partly) on screen, of the current grid."""
+        grid = self.gridSize()
+        viewport = self.viewport().rect()
+        cols = calculate_columns(viewport.width(), grid.width() - self._spacing, self._spacing)
+        return cols, viewport.height() // grid.height() + 2
+
+    def screenful(self) -> int:
+        """How many cards fit on screen at the current thumbnail size."""
+        if self.gridSize().isEmpty():
+            return 0
+        cols, rows_on_screen = self._grid_shape()
+        return cols * rows_on_screen
+
+    def visible_rows(self, margin_screens: float = 1.0) -> range:
+        """Rows on screen, extended by *margin_screens* viewport heights above and below."""
+        count = self.model().rowCount() if self.model() else 0
+        grid = self.gridSize()
+        if not count or grid.isEmpty():
+            return range(0)
+        cols, rows_on_screen = self._grid_shape()
+        top = self.indexAt(QtCore.QPoint(self._spacing, self._spacing))
+        first = top.row() if top.isValid() else self.verticalScrollBar().value() // grid.height() * cols
+        margin = int(rows_on_screen * margin_screens) * cols
+        start = max(0, first - margin)
+        stop = min(count, first + rows_on_screen * cols + margin)
+        return range(start, stop)
+
+    def _on_double_clicked(self, index):
+        card = index.data(CardRole)
+        if card is not None:
+            self.cardActivated.emit(card)
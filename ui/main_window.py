@@ -1,11 +1,24 @@
 from PyQt6 import QtWidgets, QtCore, QtGui
-import os
-import csv
-from core.image_loader import ImageLoader, ImageLoaderSignals
+import os, threading
+from core import http_client, image_loader, load_scheduler
+from core.cache_manager import cache_manager_for
+from core.card_index import CardIndex
+from core.collection import CollectionStore, load_csv
+from core.collection_index import CollectionIndex
+from core.instrumentation import traced, tracer
+from core.image_loader import ImageLoaderSignals, covers, preview_image, transcode_file
+from core.name_index import NameIndex, name_prefix
+from core.pixmap_cache import pixmap_cache
+from core.prefetcher import Prefetcher
+from core.response_cache import ResponseCache
 from core.scryfall_api import ScryfallAPI
-from utils.helpers import calculate_columns
+from core.thumb_atlas import AtlasInUse, ThumbAtlas
+from core.search_worker import ArchidektWorker, CallWorker, FilteredSearchWorker, SearchWorkerSignals
+from utils.helpers import IMAGE_WIDTHS, best_image_url, card_image_uris
 from ui.config import GalleryConfig
 from ui.detail_window import CardDetailDialog
+from ui.stats_panel import StatsPanel
+from ui.gallery_view import CardDelegate, CardGalleryView, CardListModel, CardRole
 
 class ScryfallGallery(QtWidgets.QMainWindow):
     def __init__(self, cache_dir='./resources/cache'):
@@ -21,29 +34,122 @@ class ScryfallGallery(QtWidgets.QMainWindow):
         self.aspect_ratio = GalleryConfig.ASPECT_RATIO
         self.thumb_size = QtCore.QSize(self.thumb_width, int(self.thumb_width * self.aspect_ratio))
         self.cache_dir = cache_dir
-        os.makedirs(self.cache_dir, exist_ok=True)
+        self.cache = cache_manager_for(
+            self.cache_dir, max_bytes=GalleryConfig.CACHE_MAX_BYTES, policy=GalleryConfig.CACHE_POLICY)
         self.current_cards = []
-        self.labels = {}
-
+        # Image URLs currently being loaded for the displayed results, and
+        # the error message of those that failed.
+        self.pending_urls = set()
+        self.image_errors = {}
+        # Intermediate frames: small variants loading for cells on screen,
+        # and the previews from the cache index (None when there is none).
+        self.preview_urls = set()
+        self.previews = {}
+        self._preview_pixmaps = {}
+
+        self.collection_index = None
+        self.collection_source = None
+        self.syncing_source = None
         self.collection_names = set()
+        self.collection_store = CollectionStore(GalleryConfig.COLLECTION_STORE_PATH)
         self.filter_enabled = False
 
-        self.resize_timer = QtCore.QTimer(self)
-        self.resize_timer.setSingleShot(True)
-        self.resize_timer.timeout.connect(self._reposition_labels)
-
         self.pool = QtCore.QThreadPool.globalInstance()
-        self.api = ScryfallAPI()
+        pixmap_cache.max_bytes = GalleryConfig.PIXMAP_CACHE_BYTES
+        self.atlas = None
+        if GalleryConfig.THUMB_ATLAS_WIDTHS:
+            try:
+                self.atlas = ThumbAtlas(
+                    GalleryConfig.THUMB_ATLAS_PATH or os.path.normpath(self.cache_dir) + '.atlas',
+                    GalleryConfig.THUMB_ATLAS_WIDTHS, GalleryConfig.THUMB_ATLAS_MAX_BYTES)
+            except AtlasInUse:
+                pass  # another instance of the app has it; thumbnails come from the image cache
+        self.scheduler = load_scheduler.configure(max_workers=GalleryConfig.IMAGE_LOAD_WORKERS, atlas=self.atlas)
+        image_loader.configure(cache_format=GalleryConfig.CACHE_FORMAT, quality=GalleryConfig.CACHE_QUALITY,
+                               defer_writes=GalleryConfig.CACHE_DEFER_WRITES)
+        http_client.configure(pool_size=self.pool.maxThreadCount() + GalleryConfig.IMAGE_LOAD_WORKERS)
+        self.api = ScryfallAPI(
+            card_store=CardIndex(GalleryConfig.CARD_STORE_PATH),
+            response_cache=ResponseCache(
+                GalleryConfig.RESPONSE_CACHE_PATH,
+                ttl=GalleryConfig.RESPONSE_CACHE_TTL,
+                max_bytes=GalleryConfig.RESPONSE_CACHE_MAX_BYTES))
+        self.card_index = CardIndex(GalleryConfig.INDEX_PATH) if os.path.exists(GalleryConfig.INDEX_PATH) else None
+        # Thumbnails of the next page are only downloaded while no image
+        # loads for the rows on screen are waiting.
+        self.prefetcher = Prefetcher(
+            self.api, self.cache_dir,
+            max_workers=GalleryConfig.PREFETCH_WORKERS,
+            bytes_per_second=GalleryConfig.PREFETCH_BYTES_PER_SECOND,
+            idle=lambda: self.scheduler.queue_depth(load_scheduler.VISIBLE) == 0)
+        self.current_query = None
+        self._closing = threading.Event()
+        if GalleryConfig.CACHE_TRANSCODE_IDLE:
+            self._start_transcode()
 
         self.image_loader_signals = ImageLoaderSignals()
-        self.image_loader_signals.image_loaded.connect(self.set_image)
+        self.image_loader_signals.images_loaded.connect(self.set_images)
         self.image_loader_signals.image_error.connect(self._on_image_error)
 
+        self.resize_timer = QtCore.QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.timeout.connect(self._apply_thumb_size)
+
+        self.search_generation = 0
+        # In live mode a search starts once typing pauses; each keystroke
+        # drops the results of the text it replaces.
+        self.live_search_timer = QtCore.QTimer(self)
+        self.live_search_timer.setSingleShot(True)
+        self.live_search_timer.setInterval(GalleryConfig.LIVE_SEARCH_DELAY)
+        self.live_search_timer.timeout.connect(self._on_live_search_timeout)
+        self.search_signals = SearchWorkerSignals()
+        self.search_signals.page_ready.connect(self._on_search_page)
+        self.search_signals.result.connect(self._on_search_result)
+        self.search_signals.progress.connect(self._on_search_progress)
+        self.search_signals.finished.connect(self._on_search_finished)
+        self.search_signals.failed.connect(self._on_search_failed)
+
+        # Collections are read from the collection store (and Archidekt
+        # collections synced into it) by workers.  Each load request gets a
+        # new generation; the stored copy is shown until its sync finishes.
+        self.collection_generation = 0
+        self.synced_generation = 0
+        self.collection_signals = SearchWorkerSignals()
+        self.collection_signals.result.connect(self._on_collection_read)
+        self.collection_signals.failed.connect(self._on_collection_failed)
+        self.archidekt_signals = SearchWorkerSignals()
+        self.archidekt_signals.progress.connect(self._on_archidekt_progress)
+        self.archidekt_signals.result.connect(self._on_archidekt_synced)
+        self.archidekt_signals.failed.connect(self._on_archidekt_failed)
+
+        # Card names completed in the query box: Scryfall's name catalog,
+        # fetched (or read from the response cache) on the first keystroke,
+        # and the loaded collection's names.  Rebuilt in a worker.
+        self.name_index = NameIndex()
+        self.card_names = None
+        self.catalog_requested = False
+        self.name_index_generation = 0
+        self.name_signals = SearchWorkerSignals()
+        self.name_signals.result.connect(self._on_name_index)
+
+        self.import_signals = SearchWorkerSignals()
+        self.import_signals.result.connect(self._on_bulk_imported)
+        self.import_signals.failed.connect(self._on_bulk_import_failed)
+
         self.progressBar = QtWidgets.QProgressBar()
         self.progressBar.setVisible(False)
         self.lbl_total = QtWidgets.QLabel('')
 
+        # Timings and counters of the hot paths; F12 shows them live.
+        tracer.enabled = GalleryConfig.INSTRUMENTATION
+        self.stats_panel = StatsPanel(self._collect_stats, self, GalleryConfig.STATS_INTERVAL)
+        self.addDockWidget(QtCore.Qt.DockWidgetArea.RightDockWidgetArea, self.stats_panel)
+        self.stats_panel.hide()
+        self.stats_panel.toggleViewAction().setShortcut('F12')
+        self.addAction(self.stats_panel.toggleViewAction())
+
         self._build_ui()
+        self._restore_collection()
 
     def _build_ui(self):
         central = QtWidgets.QWidget()
@@ -51,7 +157,7 @@ class ScryfallGallery(QtWidgets.QMainWindow):
         layout = QtWidgets.QVBoxLayout(central)
 
         self._create_control_widgets(layout)
-        self._create_scroll_area(layout)
+        self._create_gallery_view(layout)
         self._create_navigation_buttons(layout)
 
         layout.addWidget(self.lbl_total)
@@ -61,12 +167,24 @@ class ScryfallGallery(QtWidgets.QMainWindow):
         self.query_edit = QtWidgets.QLineEdit()
         self.query_edit.setPlaceholderText('Enter Scryfall query')
         self.query_edit.returnPressed.connect(self.search)
+        self.query_edit.textEdited.connect(self._on_query_edited)
+        self.completions = QtCore.QStringListModel(self)
+        # The list is already matched by the name index, including on later words.
+        completer = QtWidgets.QCompleter(self.completions, self)
+        completer.setCompletionMode(QtWidgets.QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        completer.activated[str].connect(self._on_completion_chosen)
+        self.query_edit.setCompleter(completer)
         ctrl_layout.addWidget(self.query_edit)
 
         btn_search = QtWidgets.QPushButton('Search')
         btn_search.clicked.connect(self.search)
         ctrl_layout.addWidget(btn_search)
 
+        self.chk_live = QtWidgets.QCheckBox('Live')
+        self.chk_live.setChecked(GalleryConfig.LIVE_SEARCH)
+        self.chk_live.toggled.connect(self.toggle_live)
+        ctrl_layout.addWidget(self.chk_live)
+
         btn_load = QtWidgets.QPushButton('Load Collection...')
         btn_load.clicked.connect(self.load_collection)
         ctrl_layout.addWidget(btn_load)
@@ -79,6 +197,16 @@ class ScryfallGallery(QtWidgets.QMainWindow):
         btn_load_archidekt.clicked.connect(self.load_archidekt_collection)
         ctrl_layout.addWidget(btn_load_archidekt)
 
+        self.btn_bulk = QtWidgets.QPushButton('Import Bulk Data...')
+        self.btn_bulk.clicked.connect(self.import_bulk_data)
+        ctrl_layout.addWidget(self.btn_bulk)
+
+        self.chk_offline = QtWidgets.QCheckBox('Offline')
+        self.chk_offline.setEnabled(self.card_index is not None)
+        self.chk_offline.toggled.connect(self.toggle_offline)
+        self.chk_offline.setChecked(self.card_index is not None)
+        ctrl_layout.addWidget(self.chk_offline)
+
         self.chk_filter = QtWidgets.QCheckBox('Filter Collection')
         self.chk_filter.toggled.connect(self.toggle_filter)
         ctrl_layout.addWidget(self.chk_filter)
@@ -94,13 +222,15 @@ class ScryfallGallery(QtWidgets.QMainWindow):
         layout.addLayout(ctrl_layout)
         layout.addWidget(self.progressBar)
 
-    def _create_scroll_area(self, layout):
-        self.scroll = QtWidgets.QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        container = QtWidgets.QWidget()
-        self.grid = QtWidgets.QGridLayout(container)
-        self.scroll.setWidget(container)
-        layout.addWidget(self.scroll)
+    def _create_gallery_view(self, layout):
+        self.model = CardListModel(self._get_best_image_url, self)
+        self.view = CardGalleryView()
+        self.view.setItemDelegate(CardDelegate(self._thumbnail_for, self.image_errors.get, self.view))
+        self.view.setModel(self.model)
+        self.view.set_thumb_size(self.thumb_size)
+        self.view.cardActivated.connect(self._show_card_details)
+        self.view.viewportChanged.connect(self._load_visible_images)
+        layout.addWidget(self.view)
 
     def _create_navigation_buttons(self, layout):
         nav_layout = QtWidgets.QHBoxLayout()
@@ -117,19 +247,56 @@ class ScryfallGallery(QtWidgets.QMainWindow):
         self.btn_next.setEnabled(False)
         nav_layout.addWidget(self.btn_next)
 
+        btn_stats = QtWidgets.QToolButton()
+        btn_stats.setDefaultAction(self.stats_panel.toggleViewAction())
+        nav_layout.addWidget(btn_stats)
+
         layout.addLayout(nav_layout)
     
+    def _read_collection(self, source, read, message=None):
+        """Run *read* (returning a Collection or None) in a worker and show its result."""
+        def run():
+            collection = read()
+            return source, CollectionIndex(collection) if collection is not None else None, message
+
+        self.collection_generation += 1
+        self.pool.start(CallWorker(run, self.collection_generation, self.collection_signals))
+        return self.collection_generation
+
+    def _restore_collection(self):
+        # The collection used last time comes from the store; no network.
+        source = self.collection_store.last_source
+        if source is not None:
+            self._read_collection(source, lambda: self.collection_store.load(source))
+
     def load_collection(self):
         path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open Collection CSV', '', 'CSV Files (*.csv)')
         if not path:
             return
-        try:
-            with open(path, newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                self.collection_names = {row['Name'].strip() for row in reader if 'Name' in row}
-            QtWidgets.QMessageBox.information(self, 'Collection Loaded', f'Loaded {len(self.collection_names)} names')
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to load CSV: {e}')
+        self.statusBar().showMessage('Loading collection...')
+        self._read_collection(f'csv:{os.path.abspath(path)}', lambda: load_csv(self.collection_store, path)[0],
+                              'Loaded {names} names')
+
+    @QtCore.pyqtSlot(int, object)
+    def _on_collection_read(self, generation, result):
+        source, index, message = result
+        if generation != self.collection_generation or generation == self.synced_generation:
+            return
+        if index is None:
+            return
+        if message:
+            self.statusBar().clearMessage()
+        self._set_collection(index, source)
+        if message:
+            QtWidgets.QMessageBox.information(self, 'Collection Loaded', message.format(names=len(self.collection_names)))
+        if self.filter_enabled:
+            self.search()
+
+    @QtCore.pyqtSlot(int, str)
+    def _on_collection_failed(self, generation, message):
+        if generation == self.collection_generation:
+            self.statusBar().clearMessage()
+            QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to load collection: {message}')
 
     def load_archidekt_collection(self):
         collection_id_str = self.archidekt_id_edit.text().strip()
@@ -138,18 +305,113 @@ class ScryfallGallery(QtWidgets.QMainWindow):
             return
         try:
             collection_id = int(collection_id_str)
-            collection = self.api.get_archidekt_collection_from_api(collection_id)
-            if collection:
-                self.collection_names = {card['Name'].strip() for card in collection if 'Name' in card}
-                QtWidgets.QMessageBox.information(self, 'Collection Loaded', f'Loaded {len(self.collection_names)} card names from Archidekt.')
-            else:
-                QtWidgets.QMessageBox.warning(self, 'Collection Not Found', 'Could not retrieve collection from Archidekt or it is empty.')
-            if self.filter_enabled:
-                self.search()
         except ValueError:
             QtWidgets.QMessageBox.critical(self, 'Input Error', 'Invalid Archidekt Collection ID. Please enter a number.')
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to load Archidekt collection: {e}')
+            return
+        # Show the stored copy right away, then sync; a second click replaces
+        # a sync that is still running.
+        source = f'archidekt:{collection_id}'
+        generation = self._read_collection(source, lambda: self.collection_store.load(source))
+        self.statusBar().showMessage(f'Syncing Archidekt collection {collection_id}...')
+        self.syncing_source = source
+        self.pool.start(ArchidektWorker(
+            self.api, collection_id, generation, self.archidekt_signals, self.collection_store,
+            cancelled=lambda: generation != self.collection_generation))
+
+    @QtCore.pyqtSlot(int, int, int)
+    def _on_archidekt_progress(self, generation, pages, _):
+        if generation == self.collection_generation:
+            self.statusBar().showMessage(f'Syncing Archidekt collection... page {pages}')
+
+    @QtCore.pyqtSlot(int, object)
+    def _on_archidekt_synced(self, generation, result):
+        if generation != self.collection_generation:
+            return
+        self.synced_generation = generation
+        index, pages, changed = result
+        self.statusBar().clearMessage()
+        if not len(index):
+            QtWidgets.QMessageBox.warning(self, 'Collection Not Found', 'Could not retrieve collection from Archidekt or it is empty.')
+            return
+        if not changed and self.collection_source == self.syncing_source:
+            self.statusBar().showMessage('Archidekt collection is up to date', 5000)
+            return
+        self._set_collection(index, self.syncing_source)
+        QtWidgets.QMessageBox.information(
+            self, 'Collection Loaded',
+            f'Loaded {len(self.collection_names)} card names from Archidekt ({changed} of {pages} pages changed).')
+        if self.filter_enabled:
+            self.search()
+
+    @QtCore.pyqtSlot(int, str)
+    def _on_archidekt_failed(self, generation, message):
+        if generation == self.collection_generation:
+            self.statusBar().clearMessage()
+            QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to load Archidekt collection: {message}')
+
+    def _set_collection(self, index, source):
+        self.collection_index = index
+        self.collection_source = source
+        self.collection_names = index.names()
+        self._rebuild_name_index()
+
+    def _rebuild_name_index(self):
+        catalog = self.card_names
+        fetch = catalog is None and self.catalog_requested
+        collection = list(self.collection_names)
+
+        def build():
+            names = catalog or []
+            if fetch:
+                try:
+                    names = self.api.card_names()
+                except Exception:
+                    return None, NameIndex(collection)  # retried with the next rebuild
+            return names, NameIndex(names + collection)
+
+        self.name_index_generation += 1
+        self.pool.start(CallWorker(build, self.name_index_generation, self.name_signals))
+
+    @QtCore.pyqtSlot(int, object)
+    def _on_name_index(self, generation, result):
+        catalog, index = result
+        if catalog is not None:
+            self.card_names = catalog
+        if generation == self.name_index_generation:
+            self.name_index = index
+
+    def import_bulk_data(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, 'Open Scryfall Bulk Data', '', 'Bulk Data (*.json *.json.gz)')
+        if not path:
+            return
+        if self.card_index is None:
+            self.card_index = CardIndex(GalleryConfig.INDEX_PATH)
+        self.btn_bulk.setEnabled(False)
+        self.statusBar().showMessage('Importing bulk data...')
+        index = self.card_index
+        self.pool.start(CallWorker(lambda: index.build_from_bulk(path), 0, self.import_signals))
+
+    @QtCore.pyqtSlot(int, object)
+    def _on_bulk_imported(self, generation, count):
+        self.btn_bulk.setEnabled(True)
+        self.statusBar().clearMessage()
+        self.chk_offline.setEnabled(True)
+        self.chk_offline.setChecked(True)
+        QtWidgets.QMessageBox.information(self, 'Bulk Data Imported', f'Indexed {count} cards for offline search')
+
+    @QtCore.pyqtSlot(int, str)
+    def _on_bulk_import_failed(self, generation, message):
+        self.btn_bulk.setEnabled(True)
+        self.statusBar().clearMessage()
+        QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to import bulk data: {message}')
+
+    def toggle_offline(self, enabled: bool):
+        self.api.card_index = self.card_index if enabled else None
+
+    def toggle_live(self, enabled: bool):
+        if not enabled:
+            self.live_search_timer.stop()
 
     def toggle_filter(self, enabled: bool):
         self.filter_enabled = enabled
@@ -160,11 +422,46 @@ class ScryfallGallery(QtWidgets.QMainWindow):
     def _on_slider_change(self, value):
         self.thumb_width = int(value)
         self.thumb_size = QtCore.QSize(self.thumb_width, int(self.thumb_width * self.aspect_ratio))
+        # While the slider moves the delegate rescales what is in memory with
+        # a fast transform; smooth thumbnails follow once it comes to rest.
+        self.view.set_thumb_size(self.thumb_size)
+        self.resize_timer.start(GalleryConfig.RESIZE_DELAY)
 
     def _on_slider_release(self):
-        self._display_results(self.current_cards)
+        self._apply_thumb_size()
+
+    @traced('gallery.thumb_size', 'ui')
+    def _apply_thumb_size(self):
+        self.resize_timer.stop()
+        if self.slider.isSliderDown():
+            return
+        self.model.refresh_urls()
+        self._preview_pixmaps.clear()
+        self._load_visible_images()
+
+    def _on_query_edited(self, text):
+        if not self.catalog_requested:
+            self.catalog_requested = True
+            self._rebuild_name_index()
+        prefix = name_prefix(text)
+        self.completions.setStringList(
+            self.name_index.complete(prefix, GalleryConfig.NAME_COMPLETIONS) if prefix else [])
+        if self.chk_live.isChecked():
+            self.search_generation += 1
+            self.prefetcher.cancel()
+            self.statusBar().clearMessage()
+            self.live_search_timer.start()
+
+    def _on_live_search_timeout(self):
+        if len(self.query_edit.text().strip()) >= GalleryConfig.LIVE_SEARCH_MIN_CHARS:
+            self.search()
+
+    def _on_completion_chosen(self, name):
+        self.query_edit.setText(f'!"{name}"')
+        self.search()
 
     def search(self):
+        self.live_search_timer.stop()
         self.page = 1
         QtCore.QTimer.singleShot(0, self._perform_search)
 
@@ -183,20 +480,85 @@ class ScryfallGallery(QtWidgets.QMainWindow):
         if not q:
             self._show_error('Please enter a search query')
             return
-        try:
-            if self.filter_enabled and self.collection_names:
-                self.current_cards = self.api.filtered_search(q, self.collection_names)
-                self.has_more = False
-                self.total_cards = len(self.current_cards)
-            else:
-                data = self.api.search(q, self.page)
-                self.current_cards = data.get('data', [])
-                self.has_more = data.get('has_more', False)
-                self.total_cards = data.get('total_cards', len(self.current_cards))
-        except Exception as e:
-            self._show_error(f'Error during search: {e}')
+        # Results of the previous query that are still in flight are dropped.
+        self.search_generation += 1
+        self.current_query = q
+        if self.filter_enabled and self.collection_names:
+            self.prefetcher.cancel()
+            self._start_filtered_search(q)
+            return
+        self.prefetcher.set_query(q)
+        page = self.page
+        data = self.prefetcher.take_page(q, page)
+        if data is not None:
+            self._on_search_result(self.search_generation, data, prefetched=True)
             return
+        self.statusBar().showMessage('Searching...')
+        generation = self.search_generation
+        self.pool.start(CallWorker(lambda: self.api.search(q, page), generation, self.search_signals,
+                                   cancelled=lambda: generation != self.search_generation))
+
+    @QtCore.pyqtSlot(int, object)
+    def _on_search_result(self, generation, data, prefetched=False):
+        if generation != self.search_generation:
+            return
+        self.current_cards = data.get('data', [])
+        self.has_more = data.get('has_more', False)
+        self.total_cards = data.get('total_cards', len(self.current_cards))
+        self._update_ui()
+        screenful = self.view.screenful()
+        if prefetched:
+            self.prefetcher.note_displayed(
+                self.model.url(row) for row in range(min(screenful, self.model.rowCount())))
+        if self.has_more:
+            width = self.thumb_width * self.devicePixelRatioF()
+            self.prefetcher.prefetch(self.current_query, self.page + 1,
+                                     lambda card: best_image_url(card, width), screenful)
+
+    def _start_filtered_search(self, q):
+        # Pages are fetched concurrently in the worker; matches are appended
+        # to the gallery as they arrive instead of after the last page.
+        self.current_cards = []
+        self.has_more = False
+        self.total_cards = 0
         self._update_ui()
+        generation = self.search_generation
+        worker = FilteredSearchWorker(
+            self.api, q, self.collection_index, generation, self.search_signals,
+            cancelled=lambda: generation != self.search_generation)
+        self.pool.start(worker)
+
+    @QtCore.pyqtSlot(int, list)
+    def _on_search_page(self, generation, cards):
+        if generation != self.search_generation or not cards:
+            return
+        self.current_cards.extend(cards)
+        self.total_cards = len(self.current_cards)
+        self.lbl_total.setText(f"Total cards in collection matching query: {self.total_cards} (searching...)")
+        self._append_results(cards)
+
+    @QtCore.pyqtSlot(int, int, int)
+    def _on_search_progress(self, generation, done, total):
+        if generation == self.search_generation:
+            self.statusBar().showMessage(f'Searching... page {done} of {total}')
+
+    @QtCore.pyqtSlot(int)
+    def _on_search_finished(self, generation):
+        if generation != self.search_generation:
+            return
+        self.statusBar().clearMessage()
+        if self.filter_enabled and self.collection_names:
+            self.lbl_total.setText(f"Total cards in collection matching query: {self.total_cards}")
+
+    @QtCore.pyqtSlot(int, str)
+    def _on_search_failed(self, generation, message):
+        if generation == self.search_generation:
+            self.statusBar().clearMessage()
+            if self.chk_live.isChecked():
+                # Half-typed queries often match nothing, which Scryfall reports as an error.
+                self.statusBar().showMessage(f'Error during search: {message}', 5000)
+            else:
+                self._show_error(f'Error during search: {message}')
 
     def _update_ui(self):
         self.lbl_page.setText(f'Page {self.page} / {((self.total_cards - 1) // 175 + 1) if not self.filter_enabled else ""}')
@@ -205,10 +567,6 @@ class ScryfallGallery(QtWidgets.QMainWindow):
             f"Total cards matching query: {self.total_cards}"
         )
         self._update_nav_buttons()
-        count = len(self.current_cards)
-        self.progressBar.setMaximum(count)
-        self.progressBar.setValue(0)
-        self.progressBar.setVisible(True)
         self._display_results(self.current_cards)
 
     def _update_nav_buttons(self):
@@ -218,23 +576,6 @@ class ScryfallGallery(QtWidgets.QMainWindow):
     def _show_error(self, msg):
         QtWidgets.QMessageBox.critical(self, 'Error', msg)
 
-    def resizeEvent(self, event):
-        self.resize_timer.start(GalleryConfig.RESIZE_DELAY)
-        super().resizeEvent(event)
-
-    def _reposition_labels(self):
-        if not self.current_cards:
-            return
-        for i in reversed(range(self.grid.count())):
-            self.grid.takeAt(i)
-        cols = calculate_columns(self.scroll.viewport().width(), self.thumb_width)
-        for idx, card in enumerate(self.current_cards):
-            url = self._get_best_image_url(card)
-            lbl = self.labels.get(url)
-            if lbl:
-                row, col = divmod(idx, cols)
-                self.grid.addWidget(lbl, row, col)
-
     # ------------------------------------------------------------------
     # NEW: slot to pop up the detail window
     # ------------------------------------------------------------------
@@ -246,73 +587,191 @@ class ScryfallGallery(QtWidgets.QMainWindow):
         """
         CardDetailDialog(card, self, cache_dir=GalleryConfig.CACHE_DIR).exec()
 
+    @traced('gallery.display_results', 'ui')
     def _display_results(self, cards):
-        while self.grid.count():
-            widget = self.grid.takeAt(0).widget()
-            if widget:
-                widget.deleteLater()
-        self.labels.clear()
-
-        cols = calculate_columns(self.scroll.viewport().width(), self.thumb_width)
-        for idx, card in enumerate(cards):
-            row, col = divmod(idx, cols)
-
-            url = self._get_best_image_url(card)
-
-            # --- create a clickable label instead of a plain QLabel ----
-            lbl = ClickableLabel(card)
-            lbl.doubleClicked.connect(self._show_card_details)          # NEW
-            lbl.setFixedSize(self.thumb_size)
-            lbl.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.scheduler.new_generation('gallery')
+        self.pending_urls.clear()
+        self.preview_urls.clear()
+        self._preview_pixmaps.clear()
+        self.image_errors.clear()
+        self.progressBar.setMaximum(0)
+        self.progressBar.setValue(0)
+        self.progressBar.setVisible(False)
+        self.view.set_thumb_size(self.thumb_size)
+        self.model.set_cards(cards)
+        self.view.scrollToTop()
 
-            self.grid.addWidget(lbl, row, col)
-            self.labels[url] = lbl
+    @traced('gallery.append_results', 'ui')
+    def _append_results(self, cards):
+        self.model.append_cards(cards)
 
-            loader = ImageLoader(url, self.cache_dir, self.thumb_size, self.image_loader_signals)
-            self.pool.start(loader)
+    @traced('gallery.load_visible', 'ui')
+    def _load_visible_images(self):
+        """
+        Queue loads for the rows on screen, then for a one-screen prefetch
+        margin.  Loads queued for rows that have scrolled out of range are
+        dropped; those still wanted are merged back into their running or
+        queued job by the scheduler.
+
+        Cells on screen whose image has to be downloaded first get the
+        card's ``small`` variant as an intermediate frame, and every cell
+        without an image paints the preview kept in the cache index.
+        """
+        if self.slider.isSliderDown() or self.resize_timer.isActive():
+            return
+        size = self.view.itemDelegate().thumb_size
+        visible = self.view.visible_rows(margin_screens=0)
+        progressive = GalleryConfig.PROGRESSIVE_THUMBNAILS
+        wanted, frames = {}, {}
+        for row in self.view.visible_rows(margin_screens=1.0):
+            url = self.model.url(row)
+            if not url or url in wanted or url in self.image_errors:
+                continue
+            # A warm thumbnail is painted straight from memory or the atlas,
+            # without a worker or disk read.
+            if url in self.pending_urls or (pixmap_cache.get(url, size) is None
+                                            and not (self.atlas and self.atlas.contains(url, size))):
+                wanted[url] = load_scheduler.VISIBLE if row in visible else load_scheduler.PREFETCH
+                small = card_image_uris(self.model.data(self.model.index(row), CardRole)).get('small')
+                if progressive and small:
+                    frames[url] = small
+        if progressive:
+            self._load_previews(list(wanted) + list(frames.values()))
+        intermediate = {}
+        for url, small in frames.items():
+            if wanted[url] == load_scheduler.VISIBLE and (
+                    small in self.preview_urls
+                    or url not in self.pending_urls and self._needs_small_frame(url, small)):
+                intermediate[small] = load_scheduler.PREVIEW
+        requests = sorted([*intermediate.items(), *wanted.items()], key=lambda item: item[1])
+        self.scheduler.replace('gallery', [
+            (url, self.cache_dir, size, self.image_loader_signals, priority) for url, priority in requests])
+        self.preview_urls = set(intermediate)
+        self.pending_urls = set(wanted)
+        self.progressBar.setMaximum(len(wanted))
+        self.progressBar.setValue(0)
+        self.progressBar.setVisible(bool(wanted))
+
+    def _needs_small_frame(self, url, small):
+        # Only worth it when the final image is another variant that has to
+        # be downloaded; one already on disk decodes about as fast.
+        return (small != url and small not in self.image_errors
+                and pixmap_cache.source(small) is None and not self.cache.contains(url))
+
+    def _load_previews(self, urls):
+        unknown = [url for url in urls if url not in self.previews]
+        if unknown:
+            found = self.cache.previews(unknown)
+            for url in unknown:
+                self.previews[url] = found.get(url)
+
+    def _thumbnail_for(self, url, card):
+        size = self.view.itemDelegate().thumb_size
+        pix = pixmap_cache.peek(url, size)
+        if pix is not None:
+            return pix
+        if self.atlas is not None and (image := self.atlas.get(url, size)) is not None:
+            return image  # painted straight from the mapped pixels
+        source = pixmap_cache.source(url)
+        small = card_image_uris(card).get('small') if GalleryConfig.PROGRESSIVE_THUMBNAILS else None
+        if source is None and small:
+            source = pixmap_cache.source(small)
+        if source is not None:
+            # Stand-in until the smooth thumbnail for this size arrives.
+            return QtGui.QPixmap.fromImage(source.scaled(size, QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                                                         QtCore.Qt.TransformationMode.FastTransformation))
+        for key in (url, small):
+            data = self.previews.get(key) if key else None
+            if data is not None:
+                pix = self._preview_pixmaps.get((key, size.width()))
+                if pix is None:
+                    pix = self._preview_pixmaps[key, size.width()] = QtGui.QPixmap.fromImage(preview_image(data).scaled(
+                        size, QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                        QtCore.Qt.TransformationMode.SmoothTransformation))
+                return pix
+        return None
 
     def _get_best_image_url(self, card):
-        uris = card.get('image_uris', {})
-        for key in ('png', 'large', 'normal', 'small'):
-            if uris.get(key):
+        # A variant already decoded in memory that covers the thumbnail wins,
+        # so resizing never refetches what it can rescale; otherwise the
+        # smallest variant that covers the thumbnail in device pixels.
+        dpr = self.devicePixelRatioF()
+        needed = QtCore.QSize(int(self.thumb_size.width() * dpr), int(self.thumb_size.height() * dpr))
+        uris = card_image_uris(card)
+        for key in IMAGE_WIDTHS:
+            source = pixmap_cache.source(uris[key]) if uris.get(key) else None
+            if source is not None and covers(source, needed):
                 return uris[key]
-        faces = card.get('card_faces')
-        if faces:
-            for key in ('png', 'large', 'normal', 'small'):
-                if faces[0].get('image_uris', {}).get(key):
-                    return faces[0]['image_uris'][key]
-        return None
-
-    @QtCore.pyqtSlot(str, str)
-    def _on_image_error(self, url: str, error_message: str) -> None:
-        lbl = self.labels.get(url)
-        if lbl:
-            lbl.setText(f"Error: {error_message}")
-            lbl.setStyleSheet("color: red;")
-        val = self.progressBar.value() + 1
-        self.progressBar.setValue(val)
-        if val >= self.progressBar.maximum():
-            self.progressBar.setVisible(False)
+        return best_image_url(card, self.thumb_width * dpr)
 
-    @QtCore.pyqtSlot(str, QtGui.QPixmap)
-    def set_image(self, url, pix):
-        lbl = self.labels.get(url)
-        if lbl:
-            lbl.setPixmap(pix)
-        val = self.progressBar.value() + 1
+    def _advance_progress(self, count=1):
+        val = self.progressBar.value() + count
         self.progressBar.setValue(val)
         if val >= self.progressBar.maximum():
             self.progressBar.setVisible(False)
 
-# --------------------------------------------------------------------
-# NEW: Clickable Label
-# --------------------------------------------------------------------
-class ClickableLabel(QtWidgets.QLabel):
-    doubleClicked = QtCore.pyqtSignal(dict)
-
-    def __init__(self, card: dict, parent=None):
-        super().__init__(parent)
-        self.card = card
-
-    def mouseDoubleClickEvent(self, event):
-        self.doubleClicked.emit(self.card)
\ No newline at end of file
+    @QtCore.pyqtSlot(str, str)
+    def _on_image_error(self, url: str, error_message: str) -> None:
+        # A failed intermediate frame is not an error; the final image still loads.
+        self.preview_urls.discard(url)
+        if url in self.pending_urls:
+            self.pending_urls.discard(url)
+            self.image_errors[url] = error_message
+            self.view.viewport().update()
+            self._advance_progress()
+
+    @QtCore.pyqtSlot(list)
+    def set_images(self, batch):
+        # The pixmaps are already in pixmap_cache; repaint once for the batch.
+        done = 0
+        repaint = False
+        for url, _ in batch:
+            if url in self.pending_urls:
+                self.pending_urls.discard(url)
+                done += 1
+            elif url in self.preview_urls:
+                self.preview_urls.discard(url)
+            else:
+                continue
+            repaint = True
+        if repaint:
+            self.view.viewport().update()
+        if done:
+            self._advance_progress(done)
+
+    def _collect_stats(self):
+        scheduler = self.scheduler.stats()
+        stats = {
+            'image queue': {'queued': scheduler['queued'], 'running': scheduler['running'],
+                            'visible waiting': self.scheduler.queue_depth(load_scheduler.VISIBLE),
+                            'threads': self.scheduler.pool.activeThreadCount()},
+            'worker pool': {'active': self.pool.activeThreadCount(), 'max': self.pool.maxThreadCount()},
+            'scheduler': {key: scheduler[key] for key in
+                          ('submitted', 'merged', 'cancelled', 'completed', 'failed', 'rescaled')},
+            'image stages': scheduler['stages'],
+            'http': http_client.get_client().stats.snapshot(),
+            'pixmap cache': pixmap_cache.stats(),
+            'disk cache': self.cache.report(),
+            'prefetch': self.prefetcher.stats(),
+        }
+        if self.api.response_cache is not None:
+            stats['response cache'] = self.api.response_cache.stats()
+        if self.atlas is not None:
+            stats['thumb atlas'] = self.atlas.stats()
+        stats['counts'] = tracer.counts()
+        stats['spans'] = tracer.totals()
+        return stats
+
+    def _start_transcode(self):
+        cache_format, quality = GalleryConfig.CACHE_TRANSCODE_FORMAT, GalleryConfig.CACHE_QUALITY
+        threading.Thread(
+            target=self.cache.transcode, daemon=True, name='cache-transcode',
+            args=(cache_format, lambda src, dst: transcode_file(src, dst, cache_format, quality)),
+            kwargs={'idle': lambda: self.scheduler.queue_depth() == 0, 'stop': self._closing.is_set}).start()
+
+    def closeEvent(self, event):
+        self._closing.set()
+        self.prefetcher.shutdown()
+        if self.atlas is not None:
+            self.atlas.close()  # later puts from the load workers are ignored
+        super().closeEvent(event)
@@ -0,0 +1,105 @@
+"""
+Dockable live statistics panel with trace recording and export.
+
+The panel shows whatever its owner's *collect* callable returns: a dict of
+sections, each a dict of metric names to numbers, strings or nested dicts.
+While a trace is recorded (``core.instrumentation.tracer``), sections whose
+values are all numbers are also sampled into it as counter tracks, so
+queue depths and cache statistics line up with the spans.
+"""
+from __future__ import annotations
+
+from PyQt6 import QtCore, QtWidgets
+
+from core.instrumentation import tracer
+
+
+def _format(value):
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f"{value:,}"
+    return str(value)
+
+
+class StatsPanel(QtWidgets.QDockWidget):
+    def __init__(self, collect, parent=None, interval=250):
+        super().__init__("Performance", parent)
+        self.setObjectName("statsPanel")
+        self._collect = collect
+        self._items: dict[tuple, QtWidgets.QTreeWidgetItem] = {}
+
+        body = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(body)
+        buttons = QtWidgets.QHBoxLayout()
+        self.chk_record = QtWidgets.QCheckBox("Record trace")
+        self.chk_record.setChecked(tracer.enabled)
+        self.chk_record.toggled.connect(self.set_recording)
+        buttons.addWidget(self.chk_record)
+        btn_export = QtWidgets.QPushButton("Export...")
+        btn_export.clicked.connect(self.export_trace)
+        buttons.addWidget(btn_export)
+        btn_clear = QtWidgets.QPushButton("Clear")
+        btn_clear.clicked.connect(tracer.clear)
+        buttons.addWidget(btn_clear)
+        layout.addLayout(buttons)
+
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setColumnCount(2)
+        self.tree.setHeaderLabels(["Metric", "Value"])
+        self.tree.setUniformRowHeights(True)
+        layout.addWidget(self.tree)
+        self.lbl_status = QtWidgets.QLabel("")
+        layout.addWidget(self.lbl_status)
+        self.setWidget(body)
+
+        # Runs while the panel is shown or a trace is recorded.
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self._update_timer)
+        self._update_timer()
+
+    def set_recording(self, enabled: bool) -> None:
+        tracer.enabled = enabled
+        if self.chk_record.isChecked() != enabled:
+            self.chk_record.setChecked(enabled)
+        self._update_timer()
+
+    def _update_timer(self, *args):
+        if self.isVisible() or tracer.enabled:
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def refresh(self) -> None:
+        stats = self._collect()
+        if tracer.enabled:
+            for section, values in stats.items():
+                if values and all(isinstance(v, (int, float)) for v in values.values()):
+                    tracer.sample(section, values)
+        if self.isVisible():
+            self._show(stats, (), self.tree.invisibleRootItem())
+
+    def _show(self, values, path, parent):
+        for key, value in values.items():
+            item = self._items.get(path + (key,))
+            if item is None:
+                item = QtWidgets.QTreeWidgetItem(parent, [str(key), ""])
+                item.setExpanded(not path)
+                self._items[path + (key,)] = item
+            if isinstance(value, dict):
+                self._show(value, path + (key,), item)
+            else:
+                item.setText(1, _format(value))
+
+    def export_trace(self) -> None:
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Trace", "trace.json", "Trace (*.json)")
+        if path:
+            self.export_to(path)
+
+    def export_to(self, path: str) -> int:
+        """Write the recorded trace, with the current statistics, to *path*."""
+        count = tracer.export(path, {"stats": self._collect()})
+        self.lbl_status.setText(f"{count:,} events written to {path}")
+        return count
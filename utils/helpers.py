@@ -1,2 +1,29 @@
+# Widths of the Scryfall image variants, smallest first.
+IMAGE_WIDTHS = {'small': 146, 'normal': 488, 'large': 672, 'png': 745}
+
+
 def calculate_columns(container_width, thumb_width, spacing=10):
     return max(1, container_width // (thumb_width + spacing))
+
+
+def card_image_uris(card):
+    uris = card.get('image_uris')
+    if not uris and card.get('card_faces'):
+        uris = card['card_faces'][0].get('image_uris')
+    return uris or {}
+
+
+def best_image_url(card, width=None):
+    """
+    URL of the smallest image variant at least *width* device pixels wide,
+    falling back to the largest one available; ``None`` width means largest.
+    """
+    uris = card_image_uris(card)
+    available = [key for key in IMAGE_WIDTHS if uris.get(key)]
+    if not available:
+        return None
+    if width is not None:
+        for key in available:
+            if IMAGE_WIDTHS[key] >= width:
+                return uris[key]
+    return uris[available[-1]]